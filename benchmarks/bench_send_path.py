@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the MIDI CC send path.
+
+Compares the old per-call path (get_midi_port() + mido.Message + port.send)
+with the raw-byte path used by send_midi_cc. No DAW or MIDI backend is
+needed: the server's port is replaced with an in-process port that mimics
+the rtmidi backend.
+
+Usage:
+    python benchmarks/bench_send_path.py [--count 200000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mido import Message
+
+import recording_port
+import server
+
+
+def bench_message_path(count: int) -> float:
+    """The previous send_midi_cc: look up the port and build a Message per call."""
+    start = time.perf_counter()
+    for i in range(count):
+        port = server.get_midi_port()
+        msg = Message('control_change', control=7, value=i & 0x7F, channel=i & 0x0F)
+        port.send(msg)
+    return time.perf_counter() - start
+
+
+def bench_raw_sender(count: int) -> float:
+    """Raw bytes written straight to the underlying MidiOut."""
+    send = server.raw_sender(server.get_midi_port())
+    status = server.CC_STATUS
+    start = time.perf_counter()
+    for i in range(count):
+        send(bytes((status[i & 0x0F], 7, i & 0x7F)))
+    return time.perf_counter() - start
+
+
+def bench_send_midi_cc(count: int) -> float:
+    """send_midi_cc end to end, including the output thread draining the queue."""
+    server.midi_output.max_rate = 0
+    server.midi_output.max_size = count
+    start = time.perf_counter()
+    for i in range(count):
+        # Distinct controllers so nothing is coalesced away
+        server.send_midi_cc(i % 120, i & 0x7F, (i // 120) & 0x0F)
+    server.midi_output.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=200000, help="messages per run")
+    args = parser.parse_args()
+
+    recording_port.install(server)
+
+    results = [
+        ("before: mido.Message + port.send", bench_message_path(args.count)),
+        ("after: raw bytes to MidiOut", bench_raw_sender(args.count)),
+        ("after: send_midi_cc via output thread", bench_send_midi_cc(args.count)),
+    ]
+    for name, seconds in results:
+        print(f"{name:<40} {args.count / seconds:>12,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+In-process stand-in for the virtual MIDI port, so benchmarks run on a plain
+machine without a DAW or MIDI backend.
+"""
+
+import mido
+
+
+class RecordingMidiOut:
+    """Stands in for rtmidi.MidiOut and counts the messages it receives."""
+
+    def __init__(self):
+        self.count = 0
+
+    def send_message(self, data):
+        self.count += 1
+
+
+class RecordingPort(mido.ports.BaseOutput):
+    """mido output port that behaves like the rtmidi backend without a device."""
+
+    def _open(self, **kwargs):
+        self._rt = RecordingMidiOut()
+
+    def _send(self, msg):
+        self._rt.send_message(msg.bytes())
+
+
+def install(server) -> RecordingPort:
+    """Make server.get_midi_port() return a fresh recording port."""
+    port = RecordingPort()
+    server.midi_port = port
+    return port
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Cubase MCP server.
+
+Times the CC send path, mixer tool latency and every MIDI generator at
+several lengths, with the virtual port replaced by an in-process recording
+port (no DAW or MIDI backend needed). Results are written as JSON so runs
+from different commits can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--output results.json] [--quick]
+    python benchmarks/run_benchmarks.py --compare baseline.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import recording_port
+import server
+
+
+def latency_stats(samples: list) -> dict:
+    """Summarize per-call timings (seconds) in microseconds."""
+    samples = sorted(samples)
+    return {
+        'calls': len(samples),
+        'mean_us': round(statistics.fmean(samples) * 1e6, 2),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 2),
+        'p95_us': round(samples[int(len(samples) * 0.95)] * 1e6, 2),
+        'p99_us': round(samples[int(len(samples) * 0.99)] * 1e6, 2),
+        'max_us': round(samples[-1] * 1e6, 2),
+    }
+
+
+def time_calls(fn, calls: int) -> dict:
+    """Call fn(i) `calls` times and summarize the latencies."""
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return latency_stats(samples)
+
+
+def bench_send_midi_cc(count: int) -> dict:
+    """send_midi_cc throughput, including the output thread draining the queue."""
+    port = recording_port.install(server)
+    server.midi_output.max_rate = 0
+    server.midi_output.max_size = count
+    started = time.perf_counter()
+    for i in range(count):
+        # Distinct controllers so nothing is coalesced away
+        server.send_midi_cc(i % 120, i & 0x7F, (i // 120) & 0x0F)
+    server.midi_output.flush()
+    elapsed = time.perf_counter() - started
+    return {
+        'messages': count,
+        'delivered': port._rt.count,
+        'seconds': round(elapsed, 4),
+        'messages_per_second': round(count / elapsed),
+    }
+
+
+def bench_mixer_tools(calls: int) -> dict:
+    """Per-call latency of the mixer tools as seen by an MCP client."""
+    recording_port.install(server)
+    server.midi_output.max_rate = 0
+    snapshot = [
+        {'track': track, 'volume': 100, 'pan': 64, 'mute': False, 'solo': False}
+        for track in range(1, 9)
+    ]
+    results = {
+        'mixer_set_volume': time_calls(lambda i: server.mixer_set_volume(i % 8 + 1, i & 0x7F), calls),
+        'mixer_set_pan': time_calls(lambda i: server.mixer_set_pan(i % 8 + 1, i & 0x7F), calls),
+        'mixer_mute_track': time_calls(lambda i: server.mixer_mute_track(i % 8 + 1, bool(i & 1)), calls),
+        'mixer_solo_track': time_calls(lambda i: server.mixer_solo_track(i % 8 + 1, bool(i & 1)), calls),
+        'mixer_apply_snapshot_8_tracks': time_calls(lambda i: server.mixer_apply_snapshot(snapshot), calls),
+    }
+    server.midi_output.flush()
+    return results
+
+
+def bench_generator(fn, path: str, runs: int) -> dict:
+    """Time a generator writing to `path`, `runs` times, plus the output size."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        message = fn(path)
+        samples.append(time.perf_counter() - started)
+        if not message.startswith('✓'):
+            raise RuntimeError(message)
+    size = sum(
+        os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+    ) if os.path.isdir(path) else os.path.getsize(path)
+    return {
+        'runs': runs,
+        'best_ms': round(min(samples) * 1000, 3),
+        'median_ms': round(statistics.median(samples) * 1000, 3),
+        'bytes': size,
+    }
+
+
+def bench_generators(workdir: str, lengths: list, runs: int) -> dict:
+    """Every create_* generator and transform_midi_file, at several lengths where the tool has one."""
+    results = {}
+    for repeat in lengths:
+        results[f'create_midi_note_sequence/repeat={repeat}'] = bench_generator(
+            lambda p: server.create_midi_note_sequence("60,62,64,65,67,69,71,72", p, repeat=repeat),
+            os.path.join(workdir, 'notes.mid'), runs)
+        results[f'create_midi_chord_progression/repeat={repeat}'] = bench_generator(
+            lambda p: server.create_midi_chord_progression("Cmaj7,Am7,Dm7,G7", p, repeat=repeat),
+            os.path.join(workdir, 'chords.mid'), runs)
+        results[f'create_midi_chord_progression/voice_leading/repeat={repeat}'] = bench_generator(
+            lambda p: server.create_midi_chord_progression("Cmaj7,Am7,Dm7,G7", p, repeat=repeat, voice_leading=True),
+            os.path.join(workdir, 'chords_vl.mid'), runs)
+        results[f'create_drum_pattern/bars={repeat * 4}'] = bench_generator(
+            lambda p: server.create_drum_pattern(p, 'rock', bars=repeat * 4, fill='toms'),
+            os.path.join(workdir, 'drums.mid'), runs)
+        results[f'transform_midi_file/repeat={repeat}'] = bench_generator(
+            lambda p: server.transform_midi_file(
+                os.path.join(workdir, 'chords.mid'), p, transpose=5, quantize=0.25,
+                humanize_timing=0.02, humanize_velocity=8, velocity_scale=0.9, seed=1),
+            os.path.join(workdir, 'transformed.mid'), runs)
+    results['create_midi_melody'] = bench_generator(
+        lambda p: server.create_midi_melody("happy upbeat melody", p, key="G"),
+        os.path.join(workdir, 'melody.mid'), runs)
+    results['create_song_structure'] = bench_generator(
+        lambda p: server.create_song_structure("upbeat pop song", p, key="C"),
+        os.path.join(workdir, 'song'), runs)
+    results['create_song_structure/single_file'] = bench_generator(
+        lambda p: server.create_song_structure("upbeat pop song", p, key="C", single_file=True),
+        os.path.join(workdir, 'song_single'), runs)
+    return results
+
+
+def git_commit() -> str:
+    """Current commit of the repository, if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    """Flatten nested results to {'section/name/metric': value}."""
+    flat = {}
+    for name, value in results.items():
+        key = f"{prefix}/{name}" if prefix else name
+        if isinstance(value, dict):
+            flat.update(flatten(value, key))
+        elif isinstance(value, (int, float)):
+            flat[key] = value
+    return flat
+
+
+def compare(current: dict, baseline_file: str):
+    """Print timing and throughput changes against an earlier results file."""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    old, new = flatten(baseline['results']), flatten(current['results'])
+    print(f"\nCompared with {baseline_file} ({baseline.get('commit', 'unknown')}):")
+    for key in sorted(new):
+        if key not in old or not old[key]:
+            continue
+        if not key.endswith(('_ms', '_us', 'messages_per_second')):
+            continue
+        ratio = new[key] / old[key]
+        # For throughput higher is better; for timings lower is better
+        better = ratio > 1 if key.endswith('messages_per_second') else ratio < 1
+        marker = "" if abs(ratio - 1) < 0.1 else ("  faster" if better else "  SLOWER")
+        print(f"  {key:<70} {old[key]:>12} -> {new[key]:>12} ({ratio:.2f}x){marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file to write")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--quick', action='store_true', help="fewer iterations, for a smoke test")
+    args = parser.parse_args()
+
+    # Measure generation itself, not cache hits
+    server.MIDI_CACHE_ENABLED = False
+    count, calls, runs = (20000, 500, 3) if args.quick else (200000, 5000, 10)
+    lengths = [1, 16, 256] if args.quick else [1, 16, 256, 4096]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {
+            'send_midi_cc': bench_send_midi_cc(count),
+            'mixer_tools': bench_mixer_tools(calls),
+            'generators': bench_generators(workdir, lengths, runs),
+        }
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"send_midi_cc: {results['send_midi_cc']['messages_per_second']:,} msg/s")
+    for name, stats in results['mixer_tools'].items():
+        print(f"{name:<40} p50 {stats['p50_us']:>8} us  p99 {stats['p99_us']:>8} us")
+    for name, stats in results['generators'].items():
+        print(f"{name:<55} {stats['median_ms']:>10} ms  {stats['bytes']:>10} bytes")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
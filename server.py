@@ -12,208 +12,3648 @@ Features:
 - Song creation from text descriptions
 """
 
-import mido
-from mido import Message, MidiFile, MidiTrack, MetaMessage
+from array import array
+from collections import OrderedDict, deque
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import mmap
+import multiprocessing
+import threading
 import time
 import os
+import random
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import atexit
+import bisect
+import cProfile
+import functools
+from functools import lru_cache
+import inspect
+import io
+import pstats
+import struct
+import subprocess
+import sys
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from mcp.server.fastmcp import FastMCP
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, NamedTuple, Tuple
+from mcp.server.fastmcp import Context, FastMCP
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Command-line options of `python server.py`."""
+    parser = argparse.ArgumentParser(description="Cubase MCP server")
+    parser.add_argument(
+        "--startup-time", type=int, nargs="?", const=5, metavar="RUNS",
+        help="measure cold start time over RUNS fresh server processes (default: 5) and exit",
+    )
+    parser.add_argument(
+        "--transport", choices=["stdio", "sse", "streamable-http"], default="stdio",
+        help="stdio serves one client; sse and streamable-http let several clients share one MIDI port",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def server_settings(args: Optional[argparse.Namespace]) -> Dict[str, Any]:
+    """
+    FastMCP settings for the HTTP bind address.
+
+    FastMCP decides its Host/Origin checks when it is built: a localhost bind
+    only accepts localhost requests. A wildcard bind (0.0.0.0, ::) cannot know
+    which name clients will use, so the checks are off; a specific address or
+    name is the only Host accepted.
+    """
+    if args is None or args.host in ("127.0.0.1", "localhost", "::1"):
+        return {} if args is None else {'host': args.host, 'port': args.port}
+    from mcp.server.transport_security import TransportSecuritySettings
+
+    if args.host in ("0.0.0.0", "::", ""):
+        security = TransportSecuritySettings(enable_dns_rebinding_protection=False)
+    else:
+        host = f"[{args.host}]" if ":" in args.host else args.host
+        security = TransportSecuritySettings(
+            enable_dns_rebinding_protection=True,
+            allowed_hosts=[f"{host}:*", host],
+            allowed_origins=[f"http://{host}:*", f"https://{host}:*"],
+        )
+    return {'host': args.host, 'port': args.port, 'transport_security': security}
+
+
+# Options are parsed before the server is built, since FastMCP fixes its HTTP
+# host checks at construction (imports and spawned workers use the defaults)
+ARGS = parse_args() if __name__ == "__main__" else None
 
 # Initialize FastMCP server
-mcp = FastMCP("Cubase Controller")
+mcp = FastMCP("Cubase Controller", **server_settings(ARGS))
 
-# Global MIDI port
-midi_port: Optional[mido.ports.BaseOutput] = None
+# Global MIDI port, opened on the first real-time tool call. mido and its
+# rtmidi backend are only imported then, so file generation never loads them.
+midi_port = None
+midi_port_lock = threading.Lock()
 VIRTUAL_PORT_NAME = "Cubase MCP"
 
+# Output queue bound and messages-per-second ceiling (0 = unlimited)
+MIDI_QUEUE_SIZE = int(os.environ.get("CUBASE_MCP_QUEUE_SIZE", "1024"))
+MIDI_MAX_RATE = float(os.environ.get("CUBASE_MCP_MAX_RATE", "1000"))
+
+# Generated MIDI cache (CUBASE_MCP_CACHE=0 disables it)
+MIDI_CACHE_ENABLED = os.environ.get("CUBASE_MCP_CACHE", "1") != "0"
+MIDI_CACHE_DIR = Path(
+    os.environ.get("CUBASE_MCP_CACHE_DIR", "~/.cache/cubase-mcp")
+).expanduser()
+MIDI_CACHE_DISK_BYTES = int(os.environ.get("CUBASE_MCP_CACHE_SIZE", str(256 * 1024 * 1024)))
+MIDI_CACHE_MEMORY_BYTES = 32 * 1024 * 1024
+
+# Mixer address map (JSON); unset = 8 tracks on the default CCs
+MIXER_MAP_FILE = os.environ.get("CUBASE_MCP_MIXER_MAP", "")
+
+# Virtual MIDI input opened with the output port to receive mixer feedback
+# from Cubase (unset = no feedback until mixer_listen_feedback is called)
+FEEDBACK_PORT_NAME = os.environ.get("CUBASE_MCP_FEEDBACK_PORT", "")
+
+# Every message sent to the port is journaled to this file when set
+JOURNAL_FILE = os.environ.get("CUBASE_MCP_JOURNAL", "")
+
+# Named mixer snapshots are persisted here between sessions
+SNAPSHOT_FILE = Path(
+    os.environ.get("CUBASE_MCP_SNAPSHOTS", "~/.cubase-mcp/snapshots.json")
+).expanduser()
+
 
 def get_midi_port():
-    """Get or create the virtual MIDI port."""
+    """
+    Get or create the virtual MIDI port.
+
+    Safe to call from any thread: the port is created under a lock, so
+    concurrent tool calls share one virtual port instead of racing to open two.
+    """
     global midi_port
-    if midi_port is None or midi_port.closed:
+    port = midi_port
+    if port is not None and not port.closed:
+        return port
+    with midi_port_lock:
+        if midi_port is not None and not midi_port.closed:
+            return midi_port
         try:
+            import mido
+
+            reconnect = midi_port is not None
             # Create a virtual MIDI output port
             midi_port = mido.open_output(VIRTUAL_PORT_NAME, virtual=True)
-            print(f"✓ Created virtual MIDI port: {VIRTUAL_PORT_NAME}")
+            metrics.count('port_reconnects' if reconnect else 'port_opens')
+            print(f"✓ Created virtual MIDI port: {VIRTUAL_PORT_NAME}", file=sys.stderr)
+            if FEEDBACK_PORT_NAME and not mixer_state.listening:
+                try:
+                    mixer_state.listen(FEEDBACK_PORT_NAME)
+                except Exception as e:
+                    print(f"✗ Failed to open feedback port: {e}", file=sys.stderr)
         except Exception as e:
-            print(f"✗ Failed to create MIDI port: {e}")
+            metrics.count('port_failures')
+            print(f"✗ Failed to create MIDI port: {e}", file=sys.stderr)
             raise
     return midi_port
 
+# ============================================================================
+# SERVER METRICS
+# ============================================================================
+
+# Metrics are dumped here as JSON every CUBASE_MCP_METRICS_INTERVAL seconds
+METRICS_FILE = os.environ.get("CUBASE_MCP_METRICS_FILE")
+METRICS_INTERVAL = float(os.environ.get("CUBASE_MCP_METRICS_INTERVAL", "60"))
+
+# Upper bounds (milliseconds) of the tool latency histogram buckets
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class ServerMetrics:
+    """
+    In-process counters and per-tool latency histograms.
+
+    Every tool call is timed by the `mcp_tool` decorator and lands in a fixed
+    bucket histogram, so recording is a bisect and a few integer adds under a
+    lock. Counters cover the MIDI send path and generated file output. With
+    profiling switched on, synchronous tool calls also run under cProfile and
+    the results accumulate until the metrics are reset.
+    """
+
+    COUNTERS = (
+        'port_opens',
+        'port_reconnects',
+        'port_failures',
+        'send_failures',
+        'files_generated',
+        'generator_bytes_written',
+    )
+
+    def __init__(self):
+        self.enabled = True
+        self.profiling = False
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Dict[str, Any]] = {}
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._profile_stats = None
+        self._dump_thread: Optional[threading.Thread] = None
+        self._dump_stop = threading.Event()
+        self.dump_file: Optional[str] = None
+        self.dump_interval = METRICS_INTERVAL
+
+    def count(self, counter: str, amount: int = 1):
+        """Add `amount` to one of COUNTERS."""
+        with self._lock:
+            self._counters[counter] += amount
+
+    def record(self, tool: str, seconds: float, failed: bool):
+        """Add one tool call to its latency histogram."""
+        ms = seconds * 1000
+        with self._lock:
+            entry = self._tools.get(tool)
+            if entry is None:
+                entry = self._tools[tool] = {
+                    'calls': 0,
+                    'errors': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            entry['calls'] += 1
+            entry['errors'] += failed
+            entry['total_ms'] += ms
+            if ms > entry['max_ms']:
+                entry['max_ms'] = ms
+            entry['buckets'][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+    def instrument(self, fn):
+        """
+        Wrap a tool function so each call is timed and counted.
+
+        A call counts as an error if it raises or returns a "✗ ..." message.
+        Coroutine functions get an async wrapper so FastMCP still awaits them.
+        """
+        name = fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await fn(*args, **kwargs)
+                started = time.perf_counter()
+                failed = True
+                try:
+                    result = await fn(*args, **kwargs)
+                    failed = isinstance(result, str) and result.startswith('✗')
+                    return result
+                finally:
+                    self.record(name, time.perf_counter() - started, failed)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            profile = self._start_profile()
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = isinstance(result, str) and result.startswith('✗')
+                return result
+            finally:
+                self.record(name, time.perf_counter() - started, failed)
+                if profile is not None:
+                    self._stop_profile(profile)
+        return wrapper
+
+    def _start_profile(self):
+        if not self.profiling:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active (e.g. a concurrent tool call)
+            return None
+        return profile
+
+    def _stop_profile(self, profile):
+        profile.disable()
+        with self._lock:
+            if self._profile_stats is None:
+                self._profile_stats = pstats.Stats(profile)
+            else:
+                self._profile_stats.add(profile)
+
+    def profile_report(self, limit: int = 20, sort: str = 'cumulative') -> str:
+        """Text table of the most expensive functions seen while profiling."""
+        with self._lock:
+            if self._profile_stats is None:
+                return ""
+            out = io.StringIO()
+            self._profile_stats.stream = out
+            self._profile_stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def reset(self):
+        """Zero every counter, histogram and the accumulated profile."""
+        with self._lock:
+            self._tools.clear()
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+            self._profile_stats = None
+            self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as a JSON-serializable dict."""
+        with self._lock:
+            tools = {
+                name: dict(entry, buckets=list(entry['buckets']))
+                for name, entry in self._tools.items()
+            }
+            counters = dict(self._counters)
+        output = dict(midi_output.stats)
+        counters['midi_messages_sent'] = output['sent']
+        counters['send_failures'] += output['errors']
+        counters['midi_messages_dropped'] = output['dropped']
+        counters['mixer_feedback_messages'] = mixer_state.stats['feedback_messages']
+        counters['mixer_sends_suppressed'] = mixer_state.stats['suppressed']
+        counters['midi_messages_journaled'] = midi_journal.stats['messages']
+        for entry in tools.values():
+            entry['mean_ms'] = round(entry['total_ms'] / entry['calls'], 3)
+            entry['p50_ms'] = histogram_percentile(entry['buckets'], 0.50, entry['max_ms'])
+            entry['p95_ms'] = histogram_percentile(entry['buckets'], 0.95, entry['max_ms'])
+            entry['p99_ms'] = histogram_percentile(entry['buckets'], 0.99, entry['max_ms'])
+            entry['total_ms'] = round(entry['total_ms'], 3)
+            entry['max_ms'] = round(entry['max_ms'], 3)
+        return {
+            'timestamp': time.time(),
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'bucket_bounds_ms': list(LATENCY_BUCKETS_MS),
+            'counters': counters,
+            'tools': tools,
+        }
+
+    def dump(self, path: str):
+        """Write a snapshot to `path` as JSON, replacing it atomically."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_dumping(self, path: str, interval: float):
+        """Dump to `path` every `interval` seconds on a background thread."""
+        self.stop_dumping()
+        self.dump_file = path
+        self.dump_interval = interval
+        self._dump_stop = threading.Event()
+        self._dump_thread = threading.Thread(
+            target=self._dump_loop, args=(path, interval, self._dump_stop),
+            name="metrics-dump", daemon=True,
+        )
+        self._dump_thread.start()
+
+    def stop_dumping(self):
+        """Stop the periodic dump, if one is running."""
+        self._dump_stop.set()
+        self.dump_file = None
+
+    def _dump_loop(self, path: str, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            try:
+                self.dump(path)
+            except Exception as e:
+                print(f"Error writing metrics to {path}: {e}", file=sys.stderr)
+
+
+def histogram_percentile(
+    buckets: List[int], fraction: float, max_ms: float, bounds: Tuple[float, ...] = LATENCY_BUCKETS_MS
+) -> float:
+    """
+    Estimate a latency percentile from bucket counts.
+
+    Returns the upper bound of the bucket holding the percentile, capped at
+    the largest latency actually seen.
+    """
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    rank = fraction * total
+    seen = 0
+    for bound, count in zip(bounds + (math.inf,), buckets):
+        seen += count
+        if seen >= rank:
+            return round(min(bound, max_ms), 3)
+    return round(max_ms, 3)
+
+
+metrics = ServerMetrics()
+
+
+def in_worker_process() -> bool:
+    """True in a child started by multiprocessing, e.g. a map_in_processes worker."""
+    # spawn renames the child process before it imports this module
+    return multiprocessing.current_process().name != 'MainProcess'
+
+
+# Workers re-import this module; only the server process writes the dump
+if METRICS_FILE and not in_worker_process():
+    metrics.start_dumping(METRICS_FILE, METRICS_INTERVAL)
+
+
+# Registered tool functions by name, for the tool catalog
+registered_tools: Dict[str, Any] = {}
+
+
+def mcp_tool(*args, **kwargs):
+    """
+    Register an MCP tool like `mcp.tool()`, with per-call metrics.
+
+    FastMCP calls synchronous tools on the event loop, so one long generation
+    would hold up every other client's calls. They are registered through an
+    async shim that runs them on a worker thread instead; the module keeps
+    the plain function for direct calls.
+    """
+    register = mcp.tool(*args, **kwargs)
+
+    def decorator(fn):
+        registered_tools[kwargs.get('name') or fn.__name__] = fn
+        fn = metrics.instrument(fn)
+        if inspect.iscoroutinefunction(fn):
+            return register(fn)
+
+        @functools.wraps(fn)
+        async def run_in_thread(*call_args, **call_kwargs):
+            return await asyncio.to_thread(fn, *call_args, **call_kwargs)
+
+        register(run_in_thread)
+        return fn
+
+    return decorator
+
+
+# ============================================================================
+# MIDI OUTPUT THREAD
+# ============================================================================
+
+# Status bytes per channel, so hot paths build raw messages with one lookup
+CC_STATUS = bytes(0xB0 | channel for channel in range(16))
+NOTE_ON_STATUS = bytes(0x90 | channel for channel in range(16))
+NOTE_OFF_STATUS = bytes(0x80 | channel for channel in range(16))
+
+
+def note_on_bytes(note: int, velocity: int, channel: int = 0) -> bytes:
+    """Raw 3-byte Note On. Arguments must already be validated."""
+    return bytes((NOTE_ON_STATUS[channel], note, velocity))
+
+
+def note_off_bytes(note: int, channel: int = 0) -> bytes:
+    """Raw 3-byte Note Off. Arguments must already be validated."""
+    return bytes((NOTE_OFF_STATUS[channel], note, 0))
+
+
+def raw_sender(port):
+    """
+    Return a function that writes raw message bytes to `port`.
+
+    For the rtmidi backend this is the underlying MidiOut.send_message, which
+    skips building and validating a mido.Message. Other backends get the bytes
+    wrapped in a Message.
+    """
+    rt = getattr(port, '_rt', None)
+    if rt is not None and hasattr(rt, 'send_message'):
+        return rt.send_message
+    from mido import Message
+
+    return lambda data: port.send(Message.from_bytes(data))
+
+
+class MidiOutput:
+    """
+    Single writer thread that owns all sends to the virtual MIDI port.
+
+    Raw messages go through a bounded queue. A Control Change that is still
+    waiting to be sent is overwritten in place by a newer value for the same
+    (channel, controller), so bursts collapse to the latest value. A CC is
+    only merged if nothing else was queued on its channel since, so every
+    channel still sees its messages in the order they were sent. Sends are
+    spaced to stay under `max_rate` messages per second.
+    """
+
+    def __init__(self, max_size: int = MIDI_QUEUE_SIZE, max_rate: float = MIDI_MAX_RATE):
+        self.max_size = max_size
+        self.max_rate = max_rate
+        self._queue: deque = deque()  # Raw bytes, or bytearrays for CCs that may still change
+        self._pending_cc: Dict[tuple, tuple] = {}  # (status, control) -> (bytearray, channel seq)
+        self._channel_seq = [0] * 16  # Messages queued so far per channel
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._next_send = 0.0
+        self.stats = {
+            'queued': 0,
+            'sent': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'errors': 0,
+            'max_depth': 0,
+        }
+
+    def send(self, data: bytes) -> bool:
+        """Queue one raw message. Returns False if it was dropped."""
+        return self.send_many([data])
+
+    def send_many(
+        self,
+        messages: List[bytes],
+        coalesce: bool = True,
+        on_sent: Optional[Callable[[], None]] = None
+    ) -> bool:
+        """
+        Queue several raw messages back to back under one lock.
+
+        Returns False if any of them was dropped because the queue was full.
+        Note offs are always accepted so a full queue cannot leave notes hanging.
+        With coalesce=False every CC is sent as queued, even if a newer value
+        follows. `on_sent` is called on the output thread once everything
+        queued before it has been handed to the port.
+        """
+        accepted = True
+        channel_seq = self._channel_seq
+        with self._cond:
+            for data in messages:
+                kind = data[0] & 0xF0
+                channel = data[0] & 0x0F
+                if kind == 0xB0 and coalesce:
+                    key = (data[0], data[1])
+                    pending = self._pending_cc.get(key)
+                    if pending is not None and pending[1] == channel_seq[channel]:
+                        pending[0][2] = data[2]
+                        self.stats['coalesced'] += 1
+                        continue
+                    if len(self._queue) >= self.max_size:
+                        self.stats['dropped'] += 1
+                        accepted = False
+                        continue
+                    entry = bytearray(data)
+                    channel_seq[channel] += 1
+                    self._pending_cc[key] = (entry, channel_seq[channel])
+                    self._queue.append(entry)
+                else:
+                    if len(self._queue) >= self.max_size and kind != 0x80:
+                        self.stats['dropped'] += 1
+                        accepted = False
+                        continue
+                    if kind != 0xF0:
+                        channel_seq[channel] += 1
+                    self._queue.append(data)
+                self.stats['queued'] += 1
+            if on_sent is not None:
+                self._queue.append(on_sent)
+            self.stats['max_depth'] = max(self.stats['max_depth'], len(self._queue))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="midi-output", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return accepted
+
+    def send_all(self, messages: List[bytes], timeout: Optional[float] = None) -> bool:
+        """
+        Queue all of `messages` or none of them, waiting up to `timeout`
+        seconds for room. Returns False, with nothing queued, on timeout.
+        """
+        with self._cond:  # Reentrant, so send_many below runs in the same hold
+            if not self._cond.wait_for(lambda: len(self._queue) + len(messages) <= self.max_size, timeout):
+                return False
+            return self.send_many(messages)
+
+    def depth(self) -> int:
+        """Number of messages waiting to be sent."""
+        with self._cond:
+            return len(self._queue)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queue is empty. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue, timeout)
+
+    def wait_for_room(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Wait until `count` more messages fit in the queue. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._queue) + count <= self.max_size, timeout)
+
+    def _run(self):
+        port = None
+        send = None
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                if callable(self._queue[0]):
+                    # A send_many callback: everything queued before it is sent
+                    callback = self._queue.popleft()
+                    if len(self._queue) <= self.max_size // 2:
+                        self._cond.notify_all()
+                else:
+                    callback = None
+                    if self.max_rate > 0:
+                        # Wait for the rate limit before taking the message, so CC
+                        # updates arriving meanwhile still coalesce
+                        delay = self._next_send - time.monotonic()
+                        if delay > 0:
+                            self._cond.wait(delay)
+                            continue
+                        self._next_send = max(self._next_send, time.monotonic() - 1.0 / self.max_rate)
+                        self._next_send += 1.0 / self.max_rate
+                    item = self._queue.popleft()
+                    if type(item) is bytearray:
+                        key = (item[0], item[1])
+                        if self._pending_cc[key][0] is item:
+                            del self._pending_cc[key]
+                        data = bytes(item)
+                    else:
+                        data = item
+                    # Wake flush() once empty and wait_for_room() once half drained
+                    if len(self._queue) <= self.max_size // 2:
+                        self._cond.notify_all()
+            if callback is not None:
+                callback()
+                continue
+            try:
+                # Only go back to get_midi_port() when the port was replaced or failed
+                if port is not midi_port or send is None:
+                    port = get_midi_port()
+                    send = raw_sender(port)
+                send(data)
+                self.stats['sent'] += 1
+                if midi_journal.recording:
+                    midi_journal.record(data)
+            except Exception as e:
+                send = None
+                self.stats['errors'] += 1
+                print(f"Error sending MIDI message: {e}", file=sys.stderr)
+
+
+midi_output = MidiOutput()
+
 
 def send_midi_cc(cc_number: int, value: int, channel: int = 0):
-    """Send a MIDI Control Change message."""
+    """
+    Queue a MIDI Control Change message on the output thread.
+
+    Callers validate the arguments; this is the raw fast path used by all
+    mixer and transport tools.
+    """
     try:
-        port = get_midi_port()
-        msg = Message('control_change', control=cc_number, value=value, channel=channel)
-        port.send(msg)
-        return True
+        # Open the port here so a missing port is reported to the caller
+        get_midi_port()
+        return midi_output.send(bytes((CC_STATUS[channel], cc_number, value)))
+    except Exception as e:
+        metrics.count('send_failures')
+        print(f"Error sending MIDI CC: {e}", file=sys.stderr)
+        return False
+
+
+def send_midi_messages(messages: List[bytes]) -> bool:
+    """Queue several raw messages back to back, e.g. an NRPN select and value."""
+    try:
+        get_midi_port()
+        return midi_output.send_many(messages)
     except Exception as e:
-        print(f"Error sending MIDI CC: {e}")
+        metrics.count('send_failures')
+        print(f"Error sending MIDI messages: {e}", file=sys.stderr)
         return False
 
 
 def send_midi_note(note: int, velocity: int, duration: float = 0.5, channel: int = 0):
-    """Send a MIDI note on/off sequence."""
+    """
+    Send a MIDI note on now and schedule the matching note off.
+
+    The note off is handed to the background note scheduler, so the caller
+    returns immediately instead of sleeping for the length of the note.
+    """
     try:
-        port = get_midi_port()
+        get_midi_port()
         # Note on
-        port.send(Message('note_on', note=note, velocity=velocity, channel=channel))
-        time.sleep(duration)
-        # Note off
-        port.send(Message('note_off', note=note, velocity=0, channel=channel))
+        if not midi_output.send(note_on_bytes(note, velocity, channel)):
+            return False
+        # Note off, sent later by the scheduler thread
+        note_scheduler.schedule(time.monotonic() + duration, note_off_bytes(note, channel))
         return True
     except Exception as e:
-        print(f"Error sending MIDI note: {e}")
+        metrics.count('send_failures')
+        print(f"Error sending MIDI note: {e}", file=sys.stderr)
         return False
 
 
+# ============================================================================
+# NOTE SCHEDULER
+# ============================================================================
+
+class NoteScheduler:
+    """
+    Background thread that sends MIDI messages at precise future times.
+
+    Raw messages are kept in a heap ordered by due time (monotonic clock). The
+    thread sleeps until the earliest message is due, so tool calls never block
+    while notes are sounding and overlapping notes need no extra threads.
+    """
+
+    def __init__(self):
+        self._heap: List[tuple] = []  # (due, seq, raw message)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, due: float, data: bytes):
+        """Queue a raw message to be sent at monotonic time `due`."""
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._seq), data))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="note-scheduler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                due = self._heap[0][0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    # Woken early if a sooner message is scheduled
+                    self._cond.wait(delay)
+                    continue
+                _, _, data = heapq.heappop(self._heap)
+            midi_output.send(data)
+
+
+note_scheduler = NoteScheduler()
+
+
+def parse_note_events(notes: str, duration: float) -> List[tuple]:
+    """
+    Parse a note event string into (start, duration, [notes]) tuples.
+
+    Events are comma-separated. Each event is one or more note numbers joined
+    by '+' (a chord), optionally followed by '@start' and ':duration' in
+    seconds, e.g. "60+64+67@0:1.0, 72@0.5:0.25".
+    """
+    events = []
+    for item in notes.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        event_duration = duration
+        if ':' in item:
+            item, dur_text = item.split(':', 1)
+            event_duration = float(dur_text)
+        start = 0.0
+        if '@' in item:
+            item, start_text = item.split('@', 1)
+            start = float(start_text)
+        chord = [int(n.strip()) for n in item.split('+')]
+        for n in chord:
+            if not (0 <= n <= 127):
+                raise ValueError(f"note {n} must be between 0 and 127")
+        if start < 0:
+            raise ValueError(f"start time {start} must not be negative")
+        if event_duration <= 0:
+            raise ValueError(f"duration {event_duration} must be positive")
+        events.append((start, event_duration, chord))
+    if not events:
+        raise ValueError("no notes given")
+    return events
+
+
 # ============================================================================
 # TRANSPORT CONTROLS
 # ============================================================================
 
-@mcp.tool()
+class TransportCommand(NamedTuple):
+    """A transport tool's CC and the Generic Remote command to map it to."""
+    cc: int
+    remote_command: str
+    done: str  # Result message on success
+    action: str  # "Failed to <action>" on failure
+
+
+# Every transport tool sends its CC with value 127 on channel 1. The setup
+# instructions and the MIDI map resource are rendered from this table.
+TRANSPORT_COMMANDS = {
+    'play': TransportCommand(91, "Transport: Play", "Playback started", "start playback"),
+    'stop': TransportCommand(92, "Transport: Stop", "Playback stopped", "stop playback"),
+    'record': TransportCommand(93, "Transport: Record", "Recording started", "start recording"),
+    'rewind': TransportCommand(94, "Transport: Return to Zero", "Rewound to beginning", "rewind"),
+    'forward': TransportCommand(95, "Transport: Forward", "Fast forwarded", "fast forward"),
+}
+
+
+def send_transport(name: str) -> str:
+    """Send one of TRANSPORT_COMMANDS and describe the result."""
+    command = TRANSPORT_COMMANDS[name]
+    if send_midi_cc(cc_number=command.cc, value=127):
+        return f"✓ {command.done}"
+    return f"✗ Failed to {command.action}"
+
+
+@mcp_tool()
 def transport_play() -> str:
     """Start playback in Cubase."""
-    # MIDI Machine Control (MMC) Play command
-    # Or use CC that you'll map in Generic Remote
-    if send_midi_cc(cc_number=91, value=127):  # CC 91 mapped to Play
-        return "✓ Playback started"
-    return "✗ Failed to start playback"
+    return send_transport('play')
 
 
-@mcp.tool()
+@mcp_tool()
 def transport_stop() -> str:
     """Stop playback in Cubase."""
-    if send_midi_cc(cc_number=92, value=127):  # CC 92 mapped to Stop
-        return "✓ Playback stopped"
-    return "✗ Failed to stop playback"
+    return send_transport('stop')
 
 
-@mcp.tool()
+@mcp_tool()
 def transport_record() -> str:
     """Start recording in Cubase."""
-    if send_midi_cc(cc_number=93, value=127):  # CC 93 mapped to Record
-        return "✓ Recording started"
-    return "✗ Failed to start recording"
+    return send_transport('record')
 
 
-@mcp.tool()
+@mcp_tool()
 def transport_rewind() -> str:
     """Rewind to beginning in Cubase."""
-    if send_midi_cc(cc_number=94, value=127):  # CC 94 mapped to Rewind
-        return "✓ Rewound to beginning"
-    return "✗ Failed to rewind"
+    return send_transport('rewind')
 
 
-@mcp.tool()
+@mcp_tool()
 def transport_forward() -> str:
     """Fast forward in Cubase."""
-    if send_midi_cc(cc_number=95, value=127):  # CC 95 mapped to Forward
-        return "✓ Fast forwarded"
-    return "✗ Failed to fast forward"
+    return send_transport('forward')
 
 
 # ============================================================================
 # MIXER CONTROLS
 # ============================================================================
 
-@mcp.tool()
+MIXER_PARAMETERS = ('volume', 'pan', 'mute', 'solo')
+
+# Seconds mixer_apply_snapshot waits for room in a full MIDI output queue
+SNAPSHOT_QUEUE_TIMEOUT = 2.0
+
+# Default address map: volume (CC 7) and pan (CC 10) on one channel per
+# track, mute and solo on CC 21-28 and CC 31-38 of channel 1. Override any
+# part of it with a JSON file in the same format (CUBASE_MCP_MIXER_MAP):
+#   {"tracks": 64,
+#    "parameters": {"volume": {"nrpn": 0, "channel": 0, "tracks_per_channel": 64},
+#                   "mute": {"cc": 21, "channel": 0, "tracks_per_channel": 8}}}
+# Within a channel, consecutive tracks use consecutive controllers (or NRPN
+# numbers); after `tracks_per_channel` tracks the bank moves to the next channel.
+DEFAULT_MIXER_MAP = {
+    'tracks': 8,
+    'parameters': {
+        'volume': {'cc': 7, 'channel': 0, 'tracks_per_channel': 1},
+        'pan': {'cc': 10, 'channel': 0, 'tracks_per_channel': 1},
+        'mute': {'cc': 21, 'channel': 0, 'tracks_per_channel': 8},
+        'solo': {'cc': 31, 'channel': 0, 'tracks_per_channel': 8},
+    },
+}
+
+
+class MixerAddress(NamedTuple):
+    """Where one (track, parameter) is sent, with its fixed bytes precomputed."""
+    kind: str  # 'cc' or 'nrpn'
+    channel: int
+    number: int  # Controller number, or NRPN parameter number
+    head: Tuple[bytes, ...]  # Messages sent before the value (NRPN select)
+    status: int
+    control: int
+
+    def messages(self, value: int) -> List[bytes]:
+        """The raw messages that set this parameter to `value` (0-127)."""
+        return [*self.head, bytes((self.status, self.control, value))]
+
+
+def compile_mixer_map(mixer_map: Dict[str, Any]) -> Tuple[int, Dict[tuple, MixerAddress]]:
+    """
+    Compile an address map to a {(track, parameter): MixerAddress} table.
+
+    Returns (track count, table). Raises ValueError if the map is
+    malformed, a parameter is unknown, an address is out of MIDI range, or
+    two parameters (or a parameter and a transport command) share an
+    address.
+    """
+    def is_int(value) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    if not isinstance(mixer_map, dict) or not isinstance(mixer_map.get('parameters', {}), dict):
+        raise ValueError("the map must be an object with a 'parameters' object")
+    tracks = mixer_map.get('tracks', DEFAULT_MIXER_MAP['tracks'])
+    if not is_int(tracks) or not (1 <= tracks <= 2048):
+        raise ValueError(f"tracks must be between 1 and 2048: {tracks!r}")
+    parameters = dict(DEFAULT_MIXER_MAP['parameters'])
+    for parameter, spec in mixer_map.get('parameters', {}).items():
+        if parameter not in MIXER_PARAMETERS:
+            raise ValueError(f"unknown mixer parameter: {parameter}")
+        if not isinstance(spec, dict):
+            raise ValueError(f"{parameter}: expected an object, got {spec!r}")
+        parameters[parameter] = spec
+
+    table: Dict[tuple, MixerAddress] = {}
+    # Transport commands are fixed CCs on channel 1 that no parameter may reuse
+    owners: Dict[tuple, str] = {
+        ('cc', 0, command.cc): f"transport {name}" for name, command in TRANSPORT_COMMANDS.items()
+    }
+    for parameter in MIXER_PARAMETERS:
+        spec = parameters[parameter]
+        kinds = [kind for kind in ('cc', 'nrpn') if kind in spec]
+        if len(kinds) != 1:
+            raise ValueError(f"{parameter}: give exactly one of 'cc' or 'nrpn'")
+        kind = kinds[0]
+        base, first_channel = spec[kind], spec.get('channel', 0)
+        per_channel = spec.get('tracks_per_channel', 1)
+        if not is_int(base) or not is_int(first_channel):
+            raise ValueError(f"{parameter}: '{kind}' and 'channel' must be integers")
+        if not is_int(per_channel) or per_channel < 1:
+            raise ValueError(f"{parameter}: tracks_per_channel must be a positive integer")
+        limit = 119 if kind == 'cc' else 16383
+
+        for track in range(1, tracks + 1):
+            index = track - 1
+            channel = first_channel + index // per_channel
+            number = base + index % per_channel
+            if not (0 <= channel <= 15):
+                raise ValueError(f"{parameter}: track {track} would need MIDI channel {channel + 1}")
+            if not (0 <= number <= limit):
+                raise ValueError(f"{parameter}: track {track} would need {kind.upper()} {number} (max {limit})")
+            label = f"{parameter} track {track}"
+            owner = owners.setdefault((kind, channel, number), label)
+            if owner != label:
+                raise ValueError(
+                    f"{label} and {owner} both use {kind.upper()} {number} on channel {channel + 1}"
+                )
+            status = CC_STATUS[channel]
+            if kind == 'cc':
+                table[(track, parameter)] = MixerAddress(kind, channel, number, (), status, number)
+            else:
+                # NRPN select (CC 99/98), then the value as Data Entry MSB (CC 6)
+                head = (bytes((status, 99, number >> 7)), bytes((status, 98, number & 0x7F)))
+                table[(track, parameter)] = MixerAddress(kind, channel, number, head, status, 6)
+    # CC 6/38/98/99 carry NRPN traffic on channels that use NRPN
+    nrpn_channels = {channel for kind, channel, _ in owners if kind == 'nrpn'}
+    for kind, channel, number in owners:
+        if kind == 'cc' and channel in nrpn_channels and number in (6, 38, 98, 99):
+            raise ValueError(f"CC {number} on channel {channel + 1} clashes with NRPN addressing")
+    return tracks, table
+
+
+def load_mixer_map(path: Optional[str]) -> Dict[str, Any]:
+    """Read the address map file, or return the default map if none is set."""
+    if not path:
+        return DEFAULT_MIXER_MAP
+    with open(Path(path).expanduser()) as f:
+        return json.load(f)
+
+
+# Loaded and compiled once; every mixer tool looks addresses up here
+MIXER_TRACKS, MIXER_ADDRESSES = compile_mixer_map(load_mixer_map(MIXER_MAP_FILE))
+
+
+def mixer_map_runs(parameter: str) -> List[Dict[str, Any]]:
+    """
+    Group one parameter's addresses into runs of tracks.
+
+    A run is a block of consecutive tracks whose controller (or NRPN) number
+    or channel goes up by one per track, e.g. {"tracks": [1, 8], "kind":
+    "cc", "numbers": [21, 28], "channels": [1, 1]}. Channels are 1-16.
+    """
+    runs = []
+    start = MIXER_ADDRESSES[(1, parameter)]
+    first = previous_track = 1
+    step = None
+    for track in range(2, MIXER_TRACKS + 2):
+        address = MIXER_ADDRESSES.get((track, parameter))
+        previous = MIXER_ADDRESSES[(previous_track, parameter)]
+        if address is not None:
+            delta = (address.number - previous.number, address.channel - previous.channel)
+            if step is None and delta in ((1, 0), (0, 1)):
+                step = delta
+            if delta == step:
+                previous_track = track
+                continue
+        runs.append({
+            'tracks': [first, previous_track],
+            'kind': start.kind,
+            'numbers': [start.number, previous.number],
+            'channels': [start.channel + 1, previous.channel + 1],
+        })
+        if address is not None:
+            start, first, previous_track, step = address, track, track, None
+    return runs
+
+
+def describe_mixer_map(parameter: str) -> List[tuple]:
+    """
+    Summarize one parameter's addresses as (tracks, address) label pairs,
+    such as ("Tracks 1-8", "CC 21-28, ch 1") or ("Tracks 1-8", "CC 7, ch 1-8").
+    """
+    def span(bounds: List[int]) -> str:
+        return str(bounds[0]) if bounds[0] == bounds[1] else f"{bounds[0]}-{bounds[1]}"
+
+    return [
+        (
+            f"{'Track' if run['tracks'][0] == run['tracks'][1] else 'Tracks'} {span(run['tracks'])}",
+            f"{run['kind'].upper()} {span(run['numbers'])}, ch {span(run['channels'])}",
+        )
+        for run in mixer_map_runs(parameter)
+    ]
+
+
+def mixer_snapshot_values(tracks: List[Dict[str, Any]]) -> List[tuple]:
+    """
+    Validate a mixer snapshot and flatten it to (track, parameter, value).
+
+    Each entry needs a "track" number and any of "volume", "pan" (0-127),
+    "mute" and "solo" (booleans, sent as 127/0). Raises ValueError on the
+    first bad entry, before anything is sent.
+    """
+    values = []
+    for entry in tracks:
+        if not isinstance(entry, dict) or 'track' not in entry:
+            raise ValueError(f"each entry needs a track number: {entry!r}")
+        track = entry['track']
+        if isinstance(track, bool) or not isinstance(track, int) or not (1 <= track <= MIXER_TRACKS):
+            raise ValueError(f"track number must be between 1 and {MIXER_TRACKS}: {track!r}")
+        unknown = set(entry) - {'track', *MIXER_PARAMETERS}
+        if unknown:
+            raise ValueError(f"unknown parameters for track {track}: {', '.join(sorted(unknown))}")
+
+        for parameter in MIXER_PARAMETERS:
+            if parameter not in entry:
+                continue
+            value = entry[parameter]
+            if parameter in ('volume', 'pan'):
+                if isinstance(value, bool) or not isinstance(value, int) or not (0 <= value <= 127):
+                    raise ValueError(f"track {track} {parameter} must be between 0 and 127")
+            else:
+                if not isinstance(value, bool):
+                    raise ValueError(f"track {track} {parameter} must be true or false")
+                value = 127 if value else 0
+            values.append((track, parameter, value))
+    return values
+
+
+# Held around read-modify-write of the snapshot file
+snapshot_lock = threading.Lock()
+
+
+def load_snapshots() -> Dict[str, List[Dict[str, Any]]]:
+    """Load the saved mixer snapshots (empty if none have been saved)."""
+    if not SNAPSHOT_FILE.exists():
+        return {}
+    with open(SNAPSHOT_FILE) as f:
+        return json.load(f)
+
+
+def save_snapshots(snapshots: Dict[str, List[Dict[str, Any]]]):
+    """Write the mixer snapshots back to disk."""
+    SNAPSHOT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = SNAPSHOT_FILE.with_suffix('.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(snapshots, f, indent=2)
+    os.replace(tmp_file, SNAPSHOT_FILE)
+
+
+@mcp_tool()
 def mixer_set_volume(track: int, volume: int) -> str:
     """
     Set the volume of a track.
 
     Args:
-        track: Track number (1-8)
+        track: Track number (1-8 with the default address map)
         volume: Volume level (0-127)
     """
-    if not (1 <= track <= 8):
-        return "✗ Track number must be between 1 and 8"
+    if not (1 <= track <= MIXER_TRACKS):
+        return f"✗ Track number must be between 1 and {MIXER_TRACKS}"
     if not (0 <= volume <= 127):
         return "✗ Volume must be between 0 and 127"
 
-    # CC 7 is standard MIDI volume, channel = track-1
-    channel = track - 1
-    if send_midi_cc(cc_number=7, value=volume, channel=channel):
-        return f"✓ Set track {track} volume to {volume}"
-    return f"✗ Failed to set track {track} volume"
+    result = send_mixer_value(track, 'volume', volume)
+    if result is None:
+        return f"✓ Track {track} volume is already {volume}"
+    if result:
+        return f"✓ Set track {track} volume to {volume}"
+    return f"✗ Failed to set track {track} volume"
+
+
+@mcp_tool()
+def mixer_set_pan(track: int, pan: int) -> str:
+    """
+    Set the pan of a track.
+
+    Args:
+        track: Track number (1-8 with the default address map)
+        pan: Pan position (0=left, 64=center, 127=right)
+    """
+    if not (1 <= track <= MIXER_TRACKS):
+        return f"✗ Track number must be between 1 and {MIXER_TRACKS}"
+    if not (0 <= pan <= 127):
+        return "✗ Pan must be between 0 and 127"
+
+    result = send_mixer_value(track, 'pan', pan)
+    if result is None:
+        return f"✓ Track {track} pan is already {pan}"
+    if result:
+        return f"✓ Set track {track} pan to {pan}"
+    return f"✗ Failed to set track {track} pan"
+
+
+@mcp_tool()
+def mixer_mute_track(track: int, mute: bool = True) -> str:
+    """
+    Mute or unmute a track.
+
+    Args:
+        track: Track number (1-8 with the default address map)
+        mute: True to mute, False to unmute
+    """
+    if not (1 <= track <= MIXER_TRACKS):
+        return f"✗ Track number must be between 1 and {MIXER_TRACKS}"
+
+    value = 127 if mute else 0
+    result = send_mixer_value(track, 'mute', value)
+    status = "muted" if mute else "unmuted"
+    if result is None:
+        return f"✓ Track {track} is already {status}"
+    if result:
+        return f"✓ Track {track} {status}"
+    return f"✗ Failed to mute/unmute track {track}"
+
+
+@mcp_tool()
+def mixer_solo_track(track: int, solo: bool = True) -> str:
+    """
+    Solo or unsolo a track.
+
+    Args:
+        track: Track number (1-8 with the default address map)
+        solo: True to solo, False to unsolo
+    """
+    if not (1 <= track <= MIXER_TRACKS):
+        return f"✗ Track number must be between 1 and {MIXER_TRACKS}"
+
+    value = 127 if solo else 0
+    result = send_mixer_value(track, 'solo', value)
+    status = "soloed" if solo else "unsoloed"
+    if result is None:
+        return f"✓ Track {track} is already {status}"
+    if result:
+        return f"✓ Track {track} {status}"
+    return f"✗ Failed to solo/unsolo track {track}"
+
+
+@mcp_tool()
+def mixer_apply_snapshot(tracks: List[Dict[str, Any]]) -> str:
+    """
+    Apply a whole mix in one call.
+
+    The snapshot is validated first, then sent in bursts that wait for room
+    in the MIDI output queue instead of being dropped. If the queue stays
+    full for SNAPSHOT_QUEUE_TIMEOUT seconds the remaining changes are not
+    sent; the mixer state records exactly the changes that were.
+
+    Args:
+        tracks: One entry per track, e.g.
+            [{"track": 1, "volume": 100, "pan": 64, "mute": false, "solo": false}]
+            Only "track" is required; omitted parameters are left unchanged.
+    """
+    try:
+        values = mixer_snapshot_values(tracks)
+    except ValueError as e:
+        return f"✗ Invalid snapshot: {e}"
+
+    changes = [
+        (track, parameter, value) for track, parameter, value in values
+        if not mixer_state.is_current(track, parameter, value)
+    ]
+    if changes:
+        try:
+            get_midi_port()
+        except Exception as e:
+            return f"✗ Failed to apply snapshot: {e}"
+        # Bursts of at most half the queue always fit once the queue drains
+        limit = max(1, midi_output.max_size // 2)
+        sent = 0
+        while sent < len(changes):
+            burst, messages = [], []
+            for track, parameter, value in changes[sent:]:
+                change_messages = MIXER_ADDRESSES[(track, parameter)].messages(value)
+                if messages and len(messages) + len(change_messages) > limit:
+                    break
+                burst.append((track, parameter, value))
+                messages.extend(change_messages)
+            if not midi_output.send_all(messages, SNAPSHOT_QUEUE_TIMEOUT):
+                return f"✗ MIDI output queue stayed full; sent {sent} of {len(changes)} changes"
+            for track, parameter, value in burst:
+                mixer_state.update(track, parameter, value)
+            sent += len(burst)
+
+    unchanged = len(values) - len(changes)
+    skipped = f", {unchanged} already set" if unchanged else ""
+    return f"✓ Applied snapshot to {len(tracks)} tracks ({len(changes)} changes{skipped})"
+
+
+@mcp_tool()
+def mixer_save_snapshot(name: str, tracks: List[Dict[str, Any]]) -> str:
+    """
+    Save a named mixer snapshot for later recall.
+
+    Args:
+        name: Snapshot name (e.g., "verse", "chorus")
+        tracks: Snapshot entries, in the same format as mixer_apply_snapshot
+    """
+    try:
+        mixer_snapshot_values(tracks)
+    except ValueError as e:
+        return f"✗ Invalid snapshot: {e}"
+
+    try:
+        with snapshot_lock:
+            snapshots = load_snapshots()
+            snapshots[name] = tracks
+            save_snapshots(snapshots)
+    except Exception as e:
+        return f"✗ Failed to save snapshot: {e}"
+    return f"✓ Saved snapshot '{name}' ({len(tracks)} tracks)"
+
+
+@mcp_tool()
+def mixer_recall_snapshot(name: str) -> str:
+    """
+    Apply a previously saved mixer snapshot.
+
+    Args:
+        name: Snapshot name
+    """
+    try:
+        snapshots = load_snapshots()
+    except Exception as e:
+        return f"✗ Failed to load snapshots: {e}"
+    if name not in snapshots:
+        available = ', '.join(sorted(snapshots)) or 'none'
+        return f"✗ Unknown snapshot: {name}. Available: {available}"
+    return mixer_apply_snapshot(snapshots[name])
+
+
+@mcp_tool()
+def mixer_list_snapshots() -> str:
+    """List the saved mixer snapshots."""
+    try:
+        snapshots = load_snapshots()
+    except Exception as e:
+        return f"✗ Failed to load snapshots: {e}"
+    if not snapshots:
+        return "No saved snapshots"
+    lines = [f"  - {name} ({len(tracks)} tracks)" for name, tracks in sorted(snapshots.items())]
+    return "Saved snapshots:\n" + "\n".join(lines)
+
+
+# ============================================================================
+# MIXER STATE & FEEDBACK
+# ============================================================================
+
+FEEDBACK_PORT_DEFAULT = "Cubase MCP Feedback"
+
+
+class MixerState:
+    """
+    Last known value of every mixer parameter, keyed by (track, parameter).
+
+    The table is fed from two places: values the tools send, and the Control
+    Changes Cubase echoes back when a Generic Remote's MIDI output is pointed
+    at the feedback port. Reads never leave the process. While feedback is
+    being received the table follows the real mix, so a send that would not
+    change anything is skipped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, tuple] = {}  # (track, parameter) -> (value, source, monotonic time)
+        # (channel, 'cc' or 'nrpn', number) -> (track, parameter)
+        self._addresses: Dict[tuple, tuple] = {
+            (address.channel, address.kind, address.number): key
+            for key, address in MIXER_ADDRESSES.items()
+        }
+        self._nrpn = [[0, 0] for _ in range(16)]  # Last selected NRPN (MSB, LSB) per channel
+        self.feedback_port = None
+        self.stats = {
+            'feedback_messages': 0,
+            'suppressed': 0,
+        }
+
+    @property
+    def listening(self) -> bool:
+        return self.feedback_port is not None
+
+    def update(self, track: int, parameter: str, value: int, source: str = 'sent'):
+        """Record a parameter value ('sent' by a tool or from 'feedback')."""
+        with self._lock:
+            self._values[(track, parameter)] = (value, source, time.monotonic())
+
+    def is_current(self, track: int, parameter: str, value: int) -> bool:
+        """
+        True if sending `value` would not change the mix.
+
+        Only answers True while feedback is being received; without it the
+        table cannot see changes made in Cubase itself.
+        """
+        if self.feedback_port is None:
+            return False
+        with self._lock:
+            entry = self._values.get((track, parameter))
+            if entry is None or entry[0] != value:
+                return False
+            self.stats['suppressed'] += 1
+            return True
+
+    def get(self, track: int, parameter: str) -> Optional[tuple]:
+        """(value, source, seconds since update) for one parameter, or None."""
+        with self._lock:
+            entry = self._values.get((track, parameter))
+        if entry is None:
+            return None
+        value, source, updated = entry
+        return value, source, time.monotonic() - updated
+
+    def tracks(self) -> List[int]:
+        """Tracks with at least one known value, in order."""
+        with self._lock:
+            return sorted({track for track, _ in self._values})
+
+    def listen(self, port_name: str):
+        """Open a virtual MIDI input that Cubase can echo mixer changes to."""
+        import mido
+
+        self.stop()
+        self.feedback_port = mido.open_input(port_name, virtual=True, callback=self._on_message)
+        print(f"✓ Listening for mixer feedback on: {port_name}", file=sys.stderr)
+
+    def stop(self):
+        """Close the feedback port, if open. Known values are kept."""
+        port, self.feedback_port = self.feedback_port, None
+        if port is not None:
+            port.close()
+
+    def _on_message(self, message):
+        # Runs on the MIDI backend's input thread
+        if message.type != 'control_change':
+            return
+        channel, control = message.channel, message.control
+        if control == 99 or control == 98:
+            self._nrpn[channel][control == 98] = message.value
+            return
+        if control == 6:
+            msb, lsb = self._nrpn[channel]
+            address = self._addresses.get((channel, 'nrpn', msb << 7 | lsb))
+        else:
+            address = self._addresses.get((channel, 'cc', control))
+        if address is None:
+            return
+        with self._lock:
+            self._values[address] = (message.value, 'feedback', time.monotonic())
+            self.stats['feedback_messages'] += 1
+
+
+mixer_state = MixerState()
+
+
+def send_mixer_value(track: int, parameter: str, value: int) -> Optional[bool]:
+    """
+    Send one mixer parameter and record it in the state table.
+
+    Returns True if sent, False if sending failed, and None if the state
+    table shows the parameter already has this value.
+    """
+    if mixer_state.is_current(track, parameter, value):
+        return None
+    if not send_midi_messages(MIXER_ADDRESSES[(track, parameter)].messages(value)):
+        return False
+    mixer_state.update(track, parameter, value)
+    return True
+
+
+def format_mixer_value(parameter: str, value: int) -> str:
+    """Human-readable mixer value: 0-127 for faders, on/off for switches."""
+    if parameter in ('mute', 'solo'):
+        return "on" if value >= 64 else "off"
+    return str(value)
+
+
+@mcp_tool()
+def mixer_get_state(track: Optional[int] = None) -> str:
+    """
+    Show the last known mixer values, answered from the server's state table.
+
+    Values come from what this server sent and, if mixer_listen_feedback is
+    on, from what Cubase reports back. Nothing is sent to Cubase.
+
+    Args:
+        track: Only show this track (default: every track with known values)
+    """
+    if track is not None and not (1 <= track <= MIXER_TRACKS):
+        return f"✗ Track number must be between 1 and {MIXER_TRACKS}"
+
+    tracks = [track] if track is not None else mixer_state.tracks()
+    if mixer_state.listening:
+        header = f"Mixer state (feedback on, {mixer_state.stats['feedback_messages']} updates received):"
+    else:
+        header = "Mixer state (feedback off: values are what this server last sent):"
+    if not tracks:
+        return header + "\n  No values known yet"
+
+    lines = [header]
+    for number in tracks:
+        parts = []
+        for parameter in MIXER_PARAMETERS:
+            entry = mixer_state.get(number, parameter)
+            if entry is None:
+                parts.append(f"{parameter} ?")
+                continue
+            value, source, age = entry
+            parts.append(f"{parameter} {format_mixer_value(parameter, value)} ({source} {age:.0f}s ago)")
+        lines.append(f"  Track {number}: " + ", ".join(parts))
+    return "\n".join(lines)
+
+
+@mcp_tool()
+def mixer_listen_feedback(enabled: bool = True, port_name: str = FEEDBACK_PORT_DEFAULT) -> str:
+    """
+    Start or stop listening for mixer changes echoed back by Cubase.
+
+    Point the MIDI Output of the Generic Remote at this port. While listening,
+    the state table follows changes made in Cubase and mixer sends that
+    would not change anything are skipped.
+
+    Args:
+        enabled: True to open the feedback port, False to close it
+        port_name: Name of the virtual MIDI input to open
+    """
+    if not enabled:
+        mixer_state.stop()
+        return "✓ Mixer feedback off"
+    try:
+        mixer_state.listen(port_name)
+    except Exception as e:
+        return f"✗ Failed to open feedback port: {e}"
+    return f"✓ Listening for mixer feedback on: {port_name}"
+
+
+# ============================================================================
+# MIXER AUTOMATION RAMPS
+# ============================================================================
+
+RAMP_CURVES = {
+    'linear': lambda x: x,
+    'exponential': lambda x: (math.exp(4 * x) - 1) / (math.exp(4) - 1),
+    's-curve': lambda x: x * x * (3 - 2 * x),
+}
+DEFAULT_RAMP_RATE = 50  # CC steps per second
+
+
+def ramp_values(start: int, end: int, duration: float, curve: str, rate: float) -> List[tuple]:
+    """
+    Precompute a ramp as (offset_seconds, value) steps.
+
+    Steps that would repeat the previous 7-bit value are dropped, so slow
+    ramps over a small range send far fewer messages than duration * rate.
+    """
+    shape = RAMP_CURVES[curve]
+    step_count = max(1, int(round(duration * rate)))
+    steps = []
+    last_value = None
+    for i in range(step_count + 1):
+        x = i / step_count
+        value = int(round(start + (end - start) * shape(x)))
+        if value != last_value:
+            steps.append((duration * x, value))
+            last_value = value
+    return steps
+
+
+class MixerRamp:
+    """A running ramp streamed by its own timer thread until done or cancelled."""
+
+    def __init__(self, ramp_id: int, track: int, parameter: str, steps: List[tuple]):
+        self.ramp_id = ramp_id
+        self.track = track
+        self.parameter = parameter
+        self.steps = steps
+        self.sent = 0
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"mixer-ramp-{ramp_id}", daemon=True)
+
+    def _run(self):
+        address = MIXER_ADDRESSES[(self.track, self.parameter)]
+        started = time.monotonic()
+        for offset, value in self.steps:
+            # Wait against the ramp start so timing errors do not accumulate
+            delay = started + offset - time.monotonic()
+            if delay > 0 and self.cancelled.wait(delay):
+                break
+            if self.cancelled.is_set():
+                break
+            if not send_midi_messages(address.messages(value)):
+                break
+            mixer_state.update(self.track, self.parameter, value)
+            self.sent += 1
+        with active_ramps_lock:
+            if active_ramps.get(self.ramp_id) is self:
+                del active_ramps[self.ramp_id]
+
+
+active_ramps: Dict[int, MixerRamp] = {}
+active_ramps_lock = threading.Lock()
+ramp_ids = itertools.count(1)
+
+
+@mcp_tool()
+def mixer_ramp(
+    track: int,
+    start: int,
+    end: int,
+    duration: float,
+    parameter: str = "volume",
+    curve: str = "linear",
+    rate: float = DEFAULT_RAMP_RATE
+) -> str:
+    """
+    Fade volume or sweep pan on the server, without one call per step.
+
+    The ramp runs in the background and the tool returns immediately. A new
+    ramp on the same track and parameter replaces the one already running.
+
+    Args:
+        track: Track number (1-8 with the default address map)
+        start: Start value (0-127)
+        end: End value (0-127)
+        duration: Ramp length in seconds
+        parameter: "volume" or "pan" (default "volume")
+        curve: "linear", "exponential" or "s-curve" (default "linear")
+        rate: Control rate in steps per second (1-200, default 50)
+    """
+    if not (1 <= track <= MIXER_TRACKS):
+        return f"✗ Track number must be between 1 and {MIXER_TRACKS}"
+    if parameter not in ('volume', 'pan'):
+        return "✗ Parameter must be 'volume' or 'pan'"
+    if not (0 <= start <= 127) or not (0 <= end <= 127):
+        return "✗ Start and end must be between 0 and 127"
+    if duration <= 0:
+        return "✗ Duration must be positive"
+    if curve not in RAMP_CURVES:
+        return f"✗ Unknown curve: {curve}. Available: {', '.join(RAMP_CURVES)}"
+    if not (1 <= rate <= 200):
+        return "✗ Rate must be between 1 and 200 steps per second"
+
+    try:
+        get_midi_port()
+    except Exception as e:
+        return f"✗ Failed to start ramp: {e}"
+
+    steps = ramp_values(start, end, duration, curve, rate)
+    with active_ramps_lock:
+        for ramp in list(active_ramps.values()):
+            if ramp.track == track and ramp.parameter == parameter:
+                ramp.cancelled.set()
+                del active_ramps[ramp.ramp_id]
+        ramp = MixerRamp(next(ramp_ids), track, parameter, steps)
+        active_ramps[ramp.ramp_id] = ramp
+    ramp.thread.start()
+
+    return (f"✓ Ramp {ramp.ramp_id}: track {track} {parameter} {start} → {end} "
+            f"over {duration}s ({curve}, {len(steps)} steps)")
+
+
+@mcp_tool()
+def mixer_cancel_ramp(ramp_id: Optional[int] = None, track: Optional[int] = None) -> str:
+    """
+    Cancel running mixer ramps. The parameter keeps its last sent value.
+
+    Args:
+        ramp_id: Ramp to cancel (as returned by mixer_ramp)
+        track: Cancel every ramp on this track
+        With neither argument, all ramps are cancelled.
+    """
+    with active_ramps_lock:
+        cancelled = [
+            ramp for ramp in active_ramps.values()
+            if (ramp_id is None or ramp.ramp_id == ramp_id)
+            and (track is None or ramp.track == track)
+        ]
+        for ramp in cancelled:
+            ramp.cancelled.set()
+            del active_ramps[ramp.ramp_id]
+
+    if not cancelled:
+        return "No matching ramps running"
+    return f"✓ Cancelled {len(cancelled)} ramp(s): {', '.join(str(r.ramp_id) for r in cancelled)}"
+
+
+@mcp_tool()
+def mixer_list_ramps() -> str:
+    """List the mixer ramps that are currently running."""
+    with active_ramps_lock:
+        ramps = list(active_ramps.values())
+    if not ramps:
+        return "No ramps running"
+    lines = [
+        f"  - Ramp {r.ramp_id}: track {r.track} {r.parameter} ({r.sent}/{len(r.steps)} steps sent)"
+        for r in ramps
+    ]
+    return "Running ramps:\n" + "\n".join(lines)
+
+
+# ============================================================================
+# LIVE NOTE PLAYBACK
+# ============================================================================
+
+@mcp_tool()
+def play_notes(
+    notes: str,
+    velocity: int = 64,
+    duration: float = 0.5,
+    channel: int = 0
+) -> str:
+    """
+    Play notes and chords through the virtual MIDI port without blocking.
+
+    All note on/off messages are queued on the background scheduler and the
+    tool returns immediately, so notes may overlap freely.
+
+    Args:
+        notes: Comma-separated events. Join notes with '+' for a chord and add
+            '@start' and ':duration' in seconds, e.g. "60+64+67@0:1, 72@0.5"
+        velocity: Note velocity (1-127, default 64)
+        duration: Default note duration in seconds (default 0.5)
+        channel: MIDI channel (0-15, default 0)
+    """
+    if not (1 <= velocity <= 127):
+        return "✗ Velocity must be between 1 and 127"
+    if not (0 <= channel <= 15):
+        return "✗ Channel must be between 0 and 15"
+    try:
+        events = parse_note_events(notes, duration)
+    except ValueError as e:
+        return f"✗ Invalid notes: {e}"
+
+    try:
+        get_midi_port()
+    except Exception as e:
+        return f"✗ Failed to play notes: {e}"
+
+    now = time.monotonic()
+    note_count = 0
+    for start, event_duration, chord in events:
+        for note in chord:
+            note_scheduler.schedule(now + start, note_on_bytes(note, velocity, channel))
+            note_scheduler.schedule(now + start + event_duration, note_off_bytes(note, channel))
+            note_count += 1
+
+    length = max(start + event_duration for start, event_duration, _ in events)
+    return f"✓ Scheduled {note_count} notes in {len(events)} events ({length:.2f}s)"
+
+
+# ============================================================================
+# NOTE EVENT STORE & SMF ENCODING
+# ============================================================================
+
+TICKS_PER_BEAT = 480
+
+
+def tempo_to_microseconds(bpm: float) -> int:
+    """Convert BPM to microseconds per quarter note (same as mido.bpm2tempo)."""
+    return int(round(60 * 1e6 / bpm))
+
+
+def write_vlq(out: bytearray, value: int):
+    """Append a MIDI variable-length quantity to `out`."""
+    if value < 0x80:
+        out.append(value)
+    elif value < 0x4000:
+        out.append(0x80 | (value >> 7))
+        out.append(value & 0x7F)
+    else:
+        groups = [value & 0x7F]
+        value >>= 7
+        while value:
+            groups.append(0x80 | (value & 0x7F))
+            value >>= 7
+        out.extend(reversed(groups))
+
+
+def tempo_event(bpm: float) -> bytes:
+    """Set-tempo meta event body (without delta time)."""
+    return b'\xff\x51\x03' + tempo_to_microseconds(bpm).to_bytes(3, 'big')
+
+
+def track_name_event(name: str) -> bytes:
+    """Track name meta event body (without delta time)."""
+    data = name.encode('latin-1', 'replace')
+    out = bytearray(b'\xff\x03')
+    write_vlq(out, len(data))
+    return bytes(out + data)
+
+
+END_OF_TRACK = b'\xff\x2f\x00'
+
+
+class NoteEvents:
+    """
+    Notes stored as parallel arrays (tick, channel, note, velocity, duration).
+
+    Generators append notes here instead of building one mido.Message per
+    event, and encode_track() turns the whole store into an MTrk chunk in
+    one pass. Notes may be added in any order.
+    """
+
+    def __init__(self):
+        self.tick = array('L')
+        self.channel = array('B')
+        self.note = array('B')
+        self.velocity = array('B')
+        self.duration = array('L')
+
+    def __len__(self) -> int:
+        return len(self.tick)
+
+    def add(self, tick: int, note: int, velocity: int, duration: int, channel: int = 0):
+        """Add one note starting at absolute `tick`."""
+        self.tick.append(tick)
+        self.channel.append(channel)
+        self.note.append(note)
+        self.velocity.append(velocity)
+        self.duration.append(duration)
+
+    def extend(self, notes: Iterable[tuple]):
+        """Add (tick, note, velocity, duration, channel) tuples from any iterable."""
+        for tick, note, velocity, duration, channel in notes:
+            self.add(tick, note, velocity, duration, channel)
+
+    def encode_track(self, tempo: Optional[float] = None, name: Optional[str] = None) -> bytes:
+        """
+        Encode the notes as a complete MTrk chunk, optionally with a tempo
+        and a track name event at tick 0.
+        """
+        body = bytearray()
+        if name is not None:
+            body.append(0)
+            body += track_name_event(name)
+        if tempo is not None:
+            body.append(0)
+            body += tempo_event(tempo)
+        self.encode_events(body)
+        body.append(0)
+        body += END_OF_TRACK
+        return b'MTrk' + struct.pack('>I', len(body)) + bytes(body)
+
+    def encode_events(self, body: bytearray, last_time: int = 0) -> int:
+        """
+        Append the note events to `body`, with delta times measured from
+        `last_time`, and return the time of the last event written.
+
+        Note ons and offs are sorted by absolute time (offs first when they
+        coincide), converted to delta times and written with their
+        variable-length quantities in a single loop.
+        """
+        count = len(self.tick)
+        # Sort key: time * 2, +1 for note on so offs at the same tick go first.
+        # Entries 0..count-1 are note ons, count..2*count-1 note offs.
+        keys = [t * 2 + 1 for t in self.tick]
+        keys.extend((t + d) * 2 for t, d in zip(self.tick, self.duration))
+        order = sorted(range(2 * count), key=keys.__getitem__)
+
+        channel, note, velocity = self.channel, self.note, self.velocity
+        for i in order:
+            time_ = keys[i] >> 1
+            write_vlq(body, time_ - last_time)
+            last_time = time_
+            if i < count:
+                body.append(NOTE_ON_STATUS[channel[i]])
+                body.append(note[i])
+                body.append(velocity[i])
+            else:
+                i -= count
+                body.append(NOTE_OFF_STATUS[channel[i]])
+                body.append(note[i])
+                body.append(0)
+        return last_time
+
+
+class SmfWriter:
+    """
+    Incremental Standard MIDI File writer with bounded memory.
+
+    Each track chunk is streamed to disk as notes arrive and its length is
+    patched in when the track ends, as is the track count on close. Notes must
+    be added in start-time order; pending note offs are held in a small heap
+    whose size depends only on how many notes overlap, so memory stays flat
+    however long the file gets.
+
+    Example:
+        with SmfWriter(path) as smf:
+            smf.begin_track(tempo=120)
+            smf.add_notes(sequence_notes([60, 64, 67], 64, 480))
+            smf.end_track()
+    """
+
+    FLUSH_SIZE = 1 << 16
+
+    def __init__(self, output_path: str, ticks_per_beat: int = TICKS_PER_BEAT):
+        # Written under a temporary name and moved into place on close, so a
+        # failed write never leaves a truncated file
+        self.output_path = output_path
+        self._tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(b'MThd' + struct.pack('>IHHH', 6, 1, 0, ticks_per_beat))
+        self.track_count = 0
+        self.bytes_written = 14
+        self._track_start: Optional[int] = None
+        self._buffer = bytearray()
+        self._offs: List[tuple] = []  # (tick, seq, note, channel)
+        self._seq = itertools.count()
+        self._last_time = 0
+        self._last_start = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+    def begin_track(self, tempo: Optional[float] = None):
+        """Start a new track chunk, optionally with a tempo event at tick 0."""
+        if self._track_start is not None:
+            raise RuntimeError("previous track was not ended")
+        self._track_start = self._file.tell()
+        self._file.write(b'MTrk\x00\x00\x00\x00')
+        self._track_length = 0
+        self._last_time = 0
+        self._last_start = 0
+        if tempo is not None:
+            self._buffer.append(0)
+            self._buffer += tempo_event(tempo)
+
+    def add_note(self, tick: int, note: int, velocity: int, duration: int, channel: int = 0):
+        """Add a note starting at absolute `tick` (not before the previous note)."""
+        if tick < self._last_start:
+            raise ValueError(f"notes must be added in time order (tick {tick} < {self._last_start})")
+        self._last_start = tick
+        self._flush_offs(tick)
+        self._event(tick, NOTE_ON_STATUS[channel], note, velocity)
+        heapq.heappush(self._offs, (tick + duration, next(self._seq), note, channel))
+
+    def add_notes(self, notes: Iterable[tuple]):
+        """Add (tick, note, velocity, duration, channel) tuples from any iterable."""
+        for tick, note, velocity, duration, channel in notes:
+            self.add_note(tick, note, velocity, duration, channel)
+
+    def end_track(self):
+        """Release the remaining notes, end the chunk and patch its length."""
+        self._flush_offs(None)
+        self._buffer.append(0)
+        self._buffer += END_OF_TRACK
+        self._flush()
+        self._file.seek(self._track_start + 4)
+        self._file.write(struct.pack('>I', self._track_length))
+        self._file.seek(0, os.SEEK_END)
+        self.bytes_written += 8 + self._track_length
+        self.track_count += 1
+        self._track_start = None
+
+    def write_track(self, chunk: bytes):
+        """Append an already encoded MTrk chunk (e.g. from NoteEvents.encode_track)."""
+        if self._track_start is not None:
+            raise RuntimeError("previous track was not ended")
+        self._file.write(chunk)
+        self.bytes_written += len(chunk)
+        self.track_count += 1
+
+    def close(self):
+        """Patch the track count into the header and move the file into place."""
+        if self._track_start is not None:
+            self.end_track()
+        self._file.seek(10)
+        self._file.write(struct.pack('>H', self.track_count))
+        self._file.close()
+        os.replace(self._tmp_path, self.output_path)
+        metrics.count('files_generated')
+        metrics.count('generator_bytes_written', self.bytes_written)
+
+    def _flush_offs(self, until: Optional[int]):
+        offs = self._offs
+        while offs and (until is None or offs[0][0] <= until):
+            tick, _, note, channel = heapq.heappop(offs)
+            self._event(tick, NOTE_OFF_STATUS[channel], note, 0)
+
+    def _event(self, tick: int, status: int, data1: int, data2: int):
+        buffer = self._buffer
+        write_vlq(buffer, tick - self._last_time)
+        self._last_time = tick
+        buffer.append(status)
+        buffer.append(data1)
+        buffer.append(data2)
+        if len(buffer) >= self.FLUSH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        self._file.write(self._buffer)
+        self._track_length += len(self._buffer)
+        self._buffer.clear()
+
+
+def write_midi_file(output_path: str, tracks: List[bytes], ticks_per_beat: int = TICKS_PER_BEAT) -> int:
+    """
+    Write encoded MTrk chunks as a type 1 Standard MIDI File.
+
+    Returns the number of bytes written.
+    """
+    with SmfWriter(output_path, ticks_per_beat) as smf:
+        for chunk in tracks:
+            smf.write_track(chunk)
+    return smf.bytes_written
+
+
+def write_notes_file(output_path: str, notes: Iterable[tuple], tempo: float) -> int:
+    """
+    Stream notes from a generator into a single-track MIDI file.
+
+    Returns the number of bytes written.
+    """
+    with SmfWriter(output_path) as smf:
+        smf.begin_track(tempo=tempo)
+        smf.add_notes(notes)
+        smf.end_track()
+    return smf.bytes_written
+
+
+def sequence_notes(
+    note_list: List[int],
+    velocity: int,
+    duration: int,
+    repeat: int = 1,
+    channel: int = 0
+) -> Iterator[tuple]:
+    """Yield notes played one after another, `repeat` times over."""
+    tick = 0
+    for _ in range(repeat):
+        for note in note_list:
+            yield tick, note, velocity, duration, channel
+            tick += duration
+
+
+def chord_notes(
+    chord_list: List[List[int]],
+    velocity: int,
+    duration: int,
+    repeat: int = 1,
+    channel: int = 0
+) -> Iterator[tuple]:
+    """Yield the notes of each chord together, chords one after another."""
+    tick = 0
+    for _ in range(repeat):
+        for chord in chord_list:
+            for note in chord:
+                yield tick, note, velocity, duration, channel
+            tick += duration
+
+
+# ============================================================================
+# SMF READING
+# ============================================================================
+
+# Data bytes after each channel message status (by high nibble)
+CHANNEL_DATA_LENGTH = {0x80: 2, 0x90: 2, 0xA0: 2, 0xB0: 2, 0xC0: 1, 0xD0: 1, 0xE0: 2}
+
+
+class SmfHeader(NamedTuple):
+    format: int
+    ticks_per_beat: int
+    tracks: List[Tuple[int, int]]  # (start, end) offsets of each MTrk body
+
+
+def read_vlq(data, pos: int) -> Tuple[int, int]:
+    """Read a variable-length quantity at `pos`. Returns (value, next position)."""
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+def read_smf_header(data) -> SmfHeader:
+    """
+    Parse the header of a Standard MIDI File and locate its track chunks.
+
+    `data` is anything indexable as bytes, typically an mmap of the file, so
+    no event data is read here. Raises ValueError for anything that is not a
+    readable SMF (including SMPTE time division, which is not supported).
+    """
+    if len(data) < 14 or data[0:4] != b'MThd':
+        raise ValueError("not a Standard MIDI File")
+    length, smf_format, track_count, division = struct.unpack_from('>IHHH', data, 4)
+    if division & 0x8000:
+        raise ValueError("SMPTE time division is not supported")
+    if division == 0:
+        raise ValueError("invalid time division 0")
+
+    tracks = []
+    offset = 8 + length
+    size = len(data)
+    while offset + 8 <= size and len(tracks) < track_count:
+        chunk_type = data[offset:offset + 4]
+        chunk_length = struct.unpack_from('>I', data, offset + 4)[0]
+        body = offset + 8
+        if body + chunk_length > size:
+            raise ValueError(f"track chunk at byte {offset} is truncated")
+        # Unknown chunk types are skipped, as the SMF spec requires
+        if chunk_type == b'MTrk':
+            tracks.append((body, body + chunk_length))
+        offset = body + chunk_length
+    return SmfHeader(smf_format, division, tracks)
+
+
+def iter_track_events(data, start: int, end: int) -> Iterator[tuple]:
+    """
+    Yield (tick, status, message) for each event in one track chunk.
+
+    Channel messages come back as complete raw messages with running status
+    expanded. Meta events have status 0xFF and message = type byte + data;
+    sysex has status 0xF0/0xF7 and message = its data. The chunk is walked
+    in place, so memory use does not depend on the length of the track.
+    """
+    tick = 0
+    running = 0
+    pos = start
+    try:
+        while pos < end:
+            delta, pos = read_vlq(data, pos)
+            tick += delta
+            status = data[pos]
+            if status < 0x80:
+                if not running:
+                    raise ValueError(f"data byte without a status at byte {pos}")
+                status = running
+            else:
+                pos += 1
+
+            if status < 0xF0:
+                running = status
+                length = CHANNEL_DATA_LENGTH[status & 0xF0]
+                message = bytes((status,)) + data[pos:pos + length]
+            elif status == 0xFF:
+                running = 0
+                meta_type = data[pos]
+                length, pos = read_vlq(data, pos + 1)
+                message = bytes((meta_type,)) + data[pos:pos + length]
+            elif status in (0xF0, 0xF7):
+                running = 0
+                length, pos = read_vlq(data, pos)
+                message = data[pos:pos + length]
+            else:
+                raise ValueError(f"unexpected status 0x{status:02X} at byte {pos - 1}")
+            pos += length
+            if pos > end:
+                raise ValueError(f"event at tick {tick} runs past the end of its track")
+            yield tick, status, message
+            if status == 0xFF and meta_type == 0x2F:
+                return
+    except IndexError:
+        raise ValueError("track ends in the middle of an event") from None
+
+
+def iter_smf_events(data, header: SmfHeader) -> Iterator[tuple]:
+    """
+    Yield (tick, track, status, message) from every track, merged in time order.
+
+    Events at the same tick keep file order within a track and come in track
+    order across tracks. Only one pending event per track is held at a time.
+    """
+    def track_events(index: int, start: int, end: int):
+        for tick, status, message in iter_track_events(data, start, end):
+            yield tick, index, status, message
+
+    return heapq.merge(
+        *(track_events(index, start, end) for index, (start, end) in enumerate(header.tracks)),
+        key=lambda event: event[0],
+    )
+
+
+def open_smf(path: str):
+    """Memory-map a MIDI file read-only. Returns (mmap, SmfHeader); close the mmap when done."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("file is empty")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return data, read_smf_header(data)
+    except Exception:
+        data.close()
+        raise
+
+
+# ============================================================================
+# MIDI FILE PLAYBACK
+# ============================================================================
+
+DEFAULT_TEMPO = 500000  # Microseconds per beat (120 BPM) until a tempo event
+
+# Upper bounds (milliseconds) of the playback lateness histogram buckets
+JITTER_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100)
+
+
+class MidiFilePlayer:
+    """
+    Streams one MIDI file to the virtual port on its own thread.
+
+    Events are read from a memory map and merged across tracks as playback
+    goes, so memory stays flat however long the file is. Every event is due
+    at the playback start plus its position in the file (with the tempo map
+    applied), and the thread waits for that absolute time instead of sleeping
+    for each gap, so timing errors never accumulate. It sleeps until just
+    before an event and yields the last stretch, then records how late the
+    event was handed to the output thread.
+    """
+
+    SPIN_SECONDS = 0.001
+    COALESCE = True  # Let a newer CC value replace one still queued
+
+    def __init__(self, playback_id: int, path: str, loop: bool, speed: float):
+        self.playback_id = playback_id
+        self.path = path
+        self.loop = loop
+        self.speed = speed
+        self.position = 0.0  # Seconds into the current pass
+        self.loops = 0
+        self.sent = 0
+        self.error: Optional[str] = None
+        self.started = self.ended = 0.0  # Monotonic start and end of the thread
+        self.finished = False
+        self.stopped = threading.Event()
+        self._sounding = set()  # (channel, note) pairs with a note on outstanding
+        self._jitter = [0] * (len(JITTER_BUCKETS_MS) + 1)
+        self._jitter_total = 0.0
+        self._jitter_max = 0.0
+        self.thread = threading.Thread(target=self._run, name=f"midi-playback-{playback_id}", daemon=True)
+
+    def jitter(self) -> Dict[str, float]:
+        """Lateness of sent events in milliseconds: mean, p50, p99 and max."""
+        count = sum(self._jitter)
+        return {
+            'mean_ms': round(self._jitter_total / count, 3) if count else 0.0,
+            'p50_ms': histogram_percentile(self._jitter, 0.50, self._jitter_max, JITTER_BUCKETS_MS),
+            'p99_ms': histogram_percentile(self._jitter, 0.99, self._jitter_max, JITTER_BUCKETS_MS),
+            'max_ms': round(self._jitter_max, 3),
+        }
+
+    def _open(self):
+        data, self.header = open_smf(self.path)
+        return data
+
+    def _run(self):
+        self.started = time.monotonic()
+        try:
+            data = self._open()
+            try:
+                while not self.stopped.is_set():
+                    self._play_once(data)
+                    self._release_notes()
+                    if not self.loop or self.stopped.is_set():
+                        break
+                    self.loops += 1
+            finally:
+                data.close()
+        except Exception as e:
+            self.error = str(e)
+            print(f"Error playing {self.path}: {e}", file=sys.stderr)
+        finally:
+            self._release_notes()
+            self.ended = time.monotonic()
+            self.finished = True
+            with active_playbacks_lock:
+                if active_playbacks.get(self.playback_id) is self:
+                    del active_playbacks[self.playback_id]
+                finished_playbacks.append(self)
+
+    def _play_once(self, data):
+        header = self.header
+        seconds_per_tick = DEFAULT_TEMPO / (header.ticks_per_beat * 1e6 * self.speed)
+        position = 0.0
+        last_tick = 0
+        started = time.monotonic()
+        for tick, _, status, message in iter_smf_events(data, header):
+            if tick != last_tick:
+                position += (tick - last_tick) * seconds_per_tick
+                last_tick = tick
+            if status >= 0xF0:
+                # Tempo changes apply from here on; other meta events and
+                # sysex are not forwarded
+                if status == 0xFF and message[0] == 0x51 and len(message) == 4:
+                    tempo = int.from_bytes(message[1:4], 'big')
+                    seconds_per_tick = tempo / (header.ticks_per_beat * 1e6 * self.speed)
+                continue
+
+            if not self._send_at(started + position, position, message):
+                return
+
+    def _send_at(self, due: float, position: float, message: bytes) -> bool:
+        """Send `message` at monotonic time `due`. Returns False if stopped first."""
+        delay = due - time.monotonic()
+        if delay > self.SPIN_SECONDS and self.stopped.wait(delay - self.SPIN_SECONDS):
+            return False
+        if self.stopped.is_set():
+            return False
+        now = time.monotonic()
+        while now < due:
+            time.sleep(0)  # Yield the GIL so the output thread keeps sending
+            now = time.monotonic()
+
+        midi_output.send_many((message,), coalesce=self.COALESCE)
+        self.sent += 1
+        self.position = position
+        self._track_note(message)
+        late_ms = (now - due) * 1000
+        self._jitter[bisect.bisect_left(JITTER_BUCKETS_MS, late_ms)] += 1
+        self._jitter_total += late_ms
+        if late_ms > self._jitter_max:
+            self._jitter_max = late_ms
+        return True
+
+    def _track_note(self, message: bytes):
+        kind = message[0] & 0xF0
+        if kind == 0x90 and message[2]:
+            self._sounding.add((message[0] & 0x0F, message[1]))
+        elif kind == 0x80 or kind == 0x90:
+            self._sounding.discard((message[0] & 0x0F, message[1]))
+
+    def _release_notes(self):
+        # Stopping or looping mid-note must not leave notes hanging in Cubase
+        if self._sounding:
+            midi_output.send_many([note_off_bytes(note, channel) for channel, note in self._sounding])
+            self._sounding.clear()
+
+
+active_playbacks: Dict[int, MidiFilePlayer] = {}
+active_playbacks_lock = threading.Lock()
+finished_playbacks: deque = deque(maxlen=8)  # Kept so their stats can still be read
+playback_ids = itertools.count(1)
+
+
+@mcp_tool()
+def play_midi_file(file_path: str, loop: bool = False, speed: float = 1.0) -> str:
+    """
+    Stream a MIDI file into Cubase through the virtual MIDI port.
+
+    Playback runs in the background and the tool returns immediately. All
+    tracks play together, following the file's tempo map. Use
+    stop_midi_playback to stop and get_midi_playback_status for position
+    and timing stats.
+
+    Args:
+        file_path: MIDI file to play (e.g. from create_song_structure)
+        loop: Start again from the top when the file ends (default: False)
+        speed: Playback speed multiplier (0.25-4, default 1.0)
+    """
+    if not (0.25 <= speed <= 4):
+        return "✗ Speed must be between 0.25 and 4"
+    path = str(Path(file_path).expanduser())
+    try:
+        data, header = open_smf(path)
+        data.close()
+    except (OSError, ValueError) as e:
+        return f"✗ Cannot play {file_path}: {e}"
+    if not header.tracks:
+        return f"✗ Cannot play {file_path}: no tracks"
+
+    try:
+        get_midi_port()
+    except Exception as e:
+        return f"✗ Failed to start playback: {e}"
+
+    with active_playbacks_lock:
+        player = MidiFilePlayer(next(playback_ids), path, loop, speed)
+        active_playbacks[player.playback_id] = player
+    player.thread.start()
+
+    looping = ", looping" if loop else ""
+    return (f"✓ Playback {player.playback_id}: {os.path.basename(path)} "
+            f"({len(header.tracks)} tracks, speed {speed:g}x{looping})")
+
+
+@mcp_tool()
+def stop_midi_playback(playback_id: Optional[int] = None) -> str:
+    """
+    Stop MIDI file playback. Notes still sounding get their note off.
+
+    Args:
+        playback_id: Playback to stop (as returned by play_midi_file); all if omitted
+    """
+    with active_playbacks_lock:
+        players = [
+            player for player in active_playbacks.values()
+            if playback_id is None or player.playback_id == playback_id
+        ]
+    for player in players:
+        player.stopped.set()
+
+    if not players:
+        return "No matching playback running"
+    return f"✓ Stopped {len(players)} playback(s): {', '.join(str(p.playback_id) for p in players)}"
+
+
+@mcp_tool()
+def get_midi_playback_status() -> str:
+    """Show running and recently finished playbacks with timing jitter."""
+    with active_playbacks_lock:
+        players = list(active_playbacks.values()) + [
+            player for player in finished_playbacks if player not in active_playbacks.values()
+        ]
+    if not players:
+        return "No playbacks"
+
+    lines = []
+    for player in sorted(players, key=lambda p: p.playback_id):
+        if player.error:
+            state = f"failed: {player.error}"
+        elif player.finished:
+            state = "stopped" if player.stopped.is_set() else "finished"
+        else:
+            state = f"playing at {player.position:.1f}s" + (f", loop {player.loops + 1}" if player.loop else "")
+        if player.speed:
+            jitter = player.jitter()
+            timing = (f"lateness mean {jitter['mean_ms']} ms, p50 {jitter['p50_ms']} ms, "
+                      f"p99 {jitter['p99_ms']} ms, max {jitter['max_ms']} ms")
+        else:
+            elapsed = (player.ended if player.finished else time.monotonic()) - player.started
+            timing = f"{player.sent / elapsed if elapsed > 0 else 0:,.0f} events/s"
+        lines.append(
+            f"  - Playback {player.playback_id}: {os.path.basename(player.path)} ({state})\n"
+            f"    {player.sent} events sent, {timing}"
+        )
+    return "MIDI playback:\n" + "\n".join(lines)
+
+
+# ============================================================================
+# MIDI JOURNAL
+# ============================================================================
+
+# Journal file layout: a header, then per message a record with the
+# microseconds since the previous message and the message length, followed
+# by the raw message bytes (9 bytes in total for a Control Change)
+JOURNAL_MAGIC = b'CMJ1'
+JOURNAL_HEADER = struct.Struct('<4sd')  # Magic, wall-clock start time
+JOURNAL_RECORD = struct.Struct('<IH')  # Microseconds since previous, length
+JOURNAL_DIR = Path("~/.cubase-mcp/journals").expanduser()
+
+
+class MidiJournal:
+    """
+    Binary log of every message the output thread sends to the port.
+
+    Sending only appends (timestamp, bytes) to an in-memory batch under a
+    short lock; a writer thread swaps the batch out, packs it and writes it
+    in one call, so the send path never waits on the disk. Timestamps come
+    from the monotonic clock at the moment of sending, after coalescing and
+    rate limiting, so a journal is exactly what Cubase received.
+    """
+
+    FLUSH_INTERVAL = 0.25  # Seconds between writes
+    MAX_PENDING = 1 << 20  # Messages buffered before new ones are dropped
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.recording = False
+        self.started_at = 0.0  # Wall-clock time of the first possible message
+        self.stats = {'messages': 0, 'bytes': 0, 'writes': 0, 'dropped': 0, 'errors': 0}
+        self._batch: List[tuple] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._start_ns = 0
+        self._last_us = 0
+
+    def start(self, path: str):
+        """Start journaling to `path`, replacing it. A running journal is closed first."""
+        self.stop()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'wb')
+        self.started_at = time.time()
+        self._start_ns = time.monotonic_ns()
+        self._last_us = 0
+        self._file.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, self.started_at))
+        self.stats = dict.fromkeys(self.stats, 0)
+        self.stats['bytes'] = JOURNAL_HEADER.size
+        self.path = path
+        with self._cond:
+            self.recording = True
+        self._thread = threading.Thread(target=self._run, name="midi-journal", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write out what is buffered and close the journal."""
+        with self._cond:
+            self.recording = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, data: bytes):
+        """Add one sent message to the current batch."""
+        now = time.monotonic_ns()
+        with self._cond:
+            if not self.recording:
+                return
+            if len(self._batch) >= self.MAX_PENDING:
+                self.stats['dropped'] += 1
+                return
+            self._batch.append((now, data))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: not self.recording, self.FLUSH_INTERVAL)
+                batch, self._batch = self._batch, []
+                done = not self.recording
+            if batch:
+                self._write(batch)
+            if done:
+                return
+
+    def _write(self, batch: List[tuple]):
+        out = bytearray()
+        pack = JOURNAL_RECORD.pack
+        start_ns = self._start_ns
+        last_us = self._last_us
+        for now, data in batch:
+            us = (now - start_ns) // 1000
+            # A gap over ~71 minutes is shortened rather than overflowing
+            out += pack(min(us - last_us, 0xFFFFFFFF), len(data))
+            out += data
+            last_us = us
+        self._last_us = last_us
+        try:
+            self._file.write(out)
+            self._file.flush()
+        except OSError as e:
+            self.stats['errors'] += 1
+            print(f"Error writing MIDI journal: {e}", file=sys.stderr)
+            return
+        self.stats['messages'] += len(batch)
+        self.stats['bytes'] += len(out)
+        self.stats['writes'] += 1
+
+
+midi_journal = MidiJournal()
+
+
+def open_journal(path: str):
+    """Memory-map a journal read-only. Returns (mmap, wall-clock start time)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < JOURNAL_HEADER.size:
+            raise ValueError("not a MIDI journal")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, started_at = JOURNAL_HEADER.unpack_from(data)
+    if magic != JOURNAL_MAGIC:
+        data.close()
+        raise ValueError("not a MIDI journal")
+    return data, started_at
+
+
+def iter_journal(data) -> Iterator[Tuple[float, bytes]]:
+    """
+    Yield (seconds since the journal started, raw message) from journal bytes.
+
+    A record cut short at the end (the server stopped mid-write) ends the
+    iteration instead of raising.
+    """
+    unpack_from = JOURNAL_RECORD.unpack_from
+    record_size = JOURNAL_RECORD.size
+    size = len(data)
+    pos = JOURNAL_HEADER.size
+    us = 0
+    while pos + record_size <= size:
+        delta, length = unpack_from(data, pos)
+        pos += record_size
+        if pos + length > size:
+            return
+        us += delta
+        yield us / 1e6, data[pos:pos + length]
+        pos += length
+
+
+class JournalPlayer(MidiFilePlayer):
+    """
+    Replays a MIDI journal through the output thread.
+
+    With a speed, every message is due at its recorded time scaled by the
+    speed, just like MIDI file playback. With speed 0 messages are queued
+    in batches as fast as the output thread takes them, which makes a
+    captured session a realistic load test for the output path. Either
+    way CCs are never coalesced, so the port sees every journaled message,
+    and with speed 0 `sent` counts messages once the output thread has
+    handed them to the port.
+    """
+
+    BATCH_SIZE = 256
+    COALESCE = False
+
+    def _open(self):
+        data, self.recorded_at = open_journal(self.path)
+        return data
+
+    def _play_once(self, data):
+        if not self.speed:
+            self._flood(data)
+            return
+        started = time.monotonic()
+        for seconds, message in iter_journal(data):
+            position = seconds / self.speed
+            if not self._send_at(started + position, position, message):
+                return
+
+    def _flood(self, data):
+        batch_size = max(1, min(self.BATCH_SIZE, midi_output.max_size // 2))
+        batch = []
+        position = 0.0
+        self._queued = self.sent
+        for position, message in iter_journal(data):
+            batch.append(message)
+            if len(batch) == batch_size:
+                if not self._send_batch(batch, position):
+                    return
+                batch = []
+        if batch:
+            self._send_batch(batch, position)
+        # Finish once the output thread has sent the last batch, so the
+        # throughput covers delivery rather than queueing
+        while self.sent < self._queued and not self.stopped.wait(0.001):
+            pass
+
+    def _send_batch(self, batch: List[bytes], position: float) -> bool:
+        # Wait for room rather than let the queue drop messages
+        while not midi_output.wait_for_room(len(batch), 0.1):
+            if self.stopped.is_set():
+                return False
+        if self.stopped.is_set():
+            return False
+        count = len(batch)
+
+        def delivered():
+            self.sent += count
+            self.position = position
+
+        midi_output.send_many(batch, coalesce=False, on_sent=delivered)
+        self._queued += count
+        for message in batch:
+            self._track_note(message)
+        return True
+
+
+@mcp_tool()
+def journal_midi_output(enabled: bool = True, file_path: str = "") -> str:
+    """
+    Start or stop journaling every MIDI message sent to Cubase.
+
+    The journal is a compact binary log (timestamp and raw bytes per
+    message) written in the background. Replay it with replay_journal to
+    reproduce a session or to load test the MIDI output.
+
+    Args:
+        enabled: Start (True) or stop (False) journaling
+        file_path: Journal file to write (default: a new file in ~/.cubase-mcp/journals)
+    """
+    if not enabled:
+        if not midi_journal.recording:
+            return "MIDI journal is not running"
+        path = midi_journal.path
+        midi_journal.stop()
+        stats = midi_journal.stats
+        return f"✓ MIDI journal stopped: {path} ({stats['messages']} messages, {stats['bytes']} bytes)"
+
+    if midi_journal.recording and not file_path:
+        return f"MIDI journal already running: {midi_journal.path}"
+    path = str(Path(file_path).expanduser()) if file_path else str(
+        JOURNAL_DIR / time.strftime("session-%Y%m%d-%H%M%S.midj")
+    )
+    try:
+        midi_journal.start(path)
+    except OSError as e:
+        return f"✗ Failed to start MIDI journal: {e}"
+    return f"✓ Journaling MIDI output to {path}"
+
+
+@mcp_tool()
+def replay_journal(file_path: str, speed: float = 1.0, loop: bool = False) -> str:
+    """
+    Send a journaled session back to Cubase.
+
+    Replay runs in the background like play_midi_file; stop it with
+    stop_midi_playback and follow it with get_midi_playback_status.
+
+    Args:
+        file_path: Journal written by journal_midi_output
+        speed: 1.0 replays with the original timing, 0.25-4 scales it, and
+            0 sends everything as fast as the MIDI output accepts it
+        loop: Start again from the top when the journal ends (default: False)
+    """
+    if speed and not (0.25 <= speed <= 4):
+        return "✗ Speed must be 0 (as fast as possible) or between 0.25 and 4"
+    path = str(Path(file_path).expanduser())
+    try:
+        data, recorded_at = open_journal(path)
+        size = len(data)
+        data.close()
+    except (OSError, ValueError) as e:
+        return f"✗ Cannot replay {file_path}: {e}"
+
+    try:
+        get_midi_port()
+    except Exception as e:
+        return f"✗ Failed to start replay: {e}"
+
+    with active_playbacks_lock:
+        player = JournalPlayer(next(playback_ids), path, loop, speed)
+        active_playbacks[player.playback_id] = player
+    player.thread.start()
+
+    pace = f"speed {speed:g}x" if speed else "as fast as possible"
+    looping = ", looping" if loop else ""
+    recorded = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(recorded_at))
+    return (f"✓ Playback {player.playback_id}: replaying {os.path.basename(path)} "
+            f"(recorded {recorded}, {size} bytes, {pace}{looping})")
+
+
+# ============================================================================
+# MIDI FILE TRANSFORMS
+# ============================================================================
+
+class TrackArrays:
+    """
+    One track of a MIDI file as parallel typed arrays, one slot per event.
+
+    Channel messages live entirely in `ticks`, `status`, `data1` and `data2`.
+    Meta and sysex events keep their payload in `extras`, keyed by event
+    index. `partner[i]` is the index of the note off that ends the note on at
+    `i` (-1 otherwise), so timing transforms move whole notes. A status of 0
+    marks an event removed by a transform. End of track is not stored; it is
+    written after the last event. Transforms are plain Python loops over the
+    arrays; the gain over mido is not building an object per event.
+    """
+
+    def __init__(self):
+        self.ticks = array('q')
+        self.status = array('B')
+        self.data1 = array('B')
+        self.data2 = array('B')
+        self.partner = array('l')
+        self.extras: Dict[int, bytes] = {}
+        self.end_tick = 0
+
+    def note_ons(self, skip_channels: Iterable[int] = ()) -> List[int]:
+        """Indices of sounding note ons, optionally skipping some channels."""
+        skip = set(skip_channels)
+        status, data2 = self.status, self.data2
+        return [
+            i for i in range(len(status))
+            if status[i] & 0xF0 == 0x90 and data2[i] and status[i] & 0x0F not in skip
+        ]
+
+    def encode(self) -> bytes:
+        """
+        Encode the track as an MTrk chunk, events sorted by (new) tick.
+
+        At equal ticks, note ons go after everything else, so a note that now
+        starts where the previous one of the same pitch ends is not cut off.
+        """
+        ticks, status, data1, data2, extras = self.ticks, self.status, self.data1, self.data2, self.extras
+        body = bytearray()
+        last = 0
+        keys = [
+            ticks[i] << 1 | (status[i] & 0xF0 == 0x90 and data2[i] > 0)
+            for i in range(len(ticks))
+        ]
+        for i in sorted(range(len(ticks)), key=keys.__getitem__):
+            kind = status[i]
+            if not kind:
+                continue
+            tick = ticks[i]
+            write_vlq(body, tick - last)
+            last = tick
+            if kind < 0xF0:
+                body.append(kind)
+                body.append(data1[i])
+                if CHANNEL_DATA_LENGTH[kind & 0xF0] == 2:
+                    body.append(data2[i])
+            elif kind == 0xFF:
+                payload = extras[i]
+                body.append(0xFF)
+                body.append(payload[0])
+                write_vlq(body, len(payload) - 1)
+                body += payload[1:]
+            else:
+                payload = extras[i]
+                body.append(kind)
+                write_vlq(body, len(payload))
+                body += payload
+        write_vlq(body, max(self.end_tick - last, 0))
+        body += END_OF_TRACK
+        return b'MTrk' + struct.pack('>I', len(body)) + body
+
+
+def load_track_arrays(path: str) -> Tuple[SmfHeader, List[TrackArrays]]:
+    """Read every track of a MIDI file into TrackArrays, one pass per track."""
+    data, header = open_smf(path)
+    try:
+        return header, [read_track_arrays(data, start, end) for start, end in header.tracks]
+    finally:
+        data.close()
+
+
+def read_track_arrays(data, start: int, end: int) -> TrackArrays:
+    """
+    Decode one track chunk straight into TrackArrays.
+
+    This is iter_track_events unrolled for the common case: channel messages
+    go into the arrays without building a message object per event, and note
+    offs are paired with their note ons on the way.
+    """
+    track = TrackArrays()
+    ticks, statuses, data1s, data2s, partner = track.ticks, track.status, track.data1, track.data2, track.partner
+    sounding: Dict[int, deque] = {}  # channel << 7 | note -> indices of sounding note ons
+    tick = running = 0
+    pos = start
+    index = 0
+    try:
+        while pos < end:
+            byte = data[pos]
+            pos += 1
+            delta = byte & 0x7F
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                delta = (delta << 7) | (byte & 0x7F)
+            tick += delta
+
+            status = data[pos]
+            if status < 0x80:
+                if not running:
+                    raise ValueError(f"data byte without a status at byte {pos}")
+                status = running
+            else:
+                pos += 1
+
+            if status < 0xF0:
+                running = status
+                kind = status & 0xF0
+                first = data[pos]
+                if kind == 0xC0 or kind == 0xD0:
+                    second = 0
+                    pos += 1
+                else:
+                    second = data[pos + 1]
+                    pos += 2
+                ticks.append(tick)
+                statuses.append(status)
+                data1s.append(first)
+                data2s.append(second)
+                partner.append(-1)
+                if kind == 0x90 and second:
+                    key = (status & 0x0F) << 7 | first
+                    waiting = sounding.get(key)
+                    if waiting is None:
+                        waiting = sounding[key] = deque()
+                    waiting.append(index)
+                elif kind == 0x80 or kind == 0x90:
+                    # A note off ends the earliest sounding note of its pitch
+                    waiting = sounding.get((status & 0x0F) << 7 | first)
+                    if waiting:
+                        partner[waiting.popleft()] = index
+            else:
+                running = 0
+                if status == 0xFF:
+                    meta_type = data[pos]
+                    length, pos = read_vlq(data, pos + 1)
+                    if meta_type == 0x2F:
+                        track.end_tick = tick
+                        break
+                    payload = bytes((meta_type,)) + data[pos:pos + length]
+                elif status in (0xF0, 0xF7):
+                    length, pos = read_vlq(data, pos)
+                    payload = data[pos:pos + length]
+                else:
+                    raise ValueError(f"unexpected status 0x{status:02X} at byte {pos - 1}")
+                pos += length
+                ticks.append(tick)
+                statuses.append(status)
+                data1s.append(0)
+                data2s.append(0)
+                partner.append(-1)
+                track.extras[index] = bytes(payload)
+            index += 1
+        if pos > end:
+            raise ValueError("last event runs past the end of its track")
+    except IndexError:
+        raise ValueError("track ends in the middle of an event") from None
+    if ticks:
+        track.end_tick = max(track.end_tick, ticks[-1])
+    return track
+
+
+def transpose_track(track: TrackArrays, semitones: int) -> int:
+    """
+    Shift every note (and poly aftertouch) by `semitones`, except on the drum
+    channel. Notes pushed out of 0-127 are removed. Returns how many were.
+    """
+    status, data1, partner = track.status, track.data1, track.partner
+    dropped = 0
+    for i in range(len(status)):
+        kind = status[i] & 0xF0
+        if not (0x80 <= kind <= 0xA0) or status[i] & 0x0F == DRUM_CHANNEL:
+            continue
+        note = data1[i] + semitones
+        if 0 <= note <= 127:
+            data1[i] = note
+            continue
+        status[i] = 0
+        if partner[i] >= 0:
+            status[partner[i]] = 0
+            dropped += 1
+    return dropped
+
+
+def shift_notes(track: TrackArrays, starts: List[int], new_ticks: Iterable[int]):
+    """Move the note ons at `starts` to `new_ticks`, carrying their note offs along."""
+    ticks, partner = track.ticks, track.partner
+    for i, tick in zip(starts, new_ticks):
+        tick = max(tick, 0)
+        end = partner[i]
+        if end >= 0:
+            ticks[end] += tick - ticks[i]
+        ticks[i] = tick
+
+
+def quantize_track(track: TrackArrays, starts: List[int], grid: int, strength: float):
+    """Pull note starts toward the nearest multiple of `grid` ticks, keeping note lengths."""
+    ticks = track.ticks
+    shift_notes(track, starts, [
+        ticks[i] + int(round((round(ticks[i] / grid) * grid - ticks[i]) * strength)) for i in starts
+    ])
+
+
+def humanize_track(track: TrackArrays, starts: List[int], timing: int, velocity: int, rng: random.Random):
+    """Randomly offset note starts by up to `timing` ticks and velocities by up to `velocity`."""
+    uniform = rng.random
+    if timing:
+        ticks = track.ticks
+        span = 2 * timing + 1
+        shift_notes(track, starts, [ticks[i] + int(uniform() * span) - timing for i in starts])
+    if velocity:
+        data2 = track.data2
+        span = 2 * velocity + 1
+        for i in starts:
+            data2[i] = min(127, max(1, data2[i] + int(uniform() * span) - velocity))
+
+
+def scale_velocities(track: TrackArrays, starts: List[int], factor: float):
+    """Multiply note on velocities by `factor` through a 128-entry lookup table."""
+    table = bytes(min(127, max(1, int(round(v * factor)))) for v in range(128))
+    data2 = track.data2
+    for i in starts:
+        data2[i] = table[data2[i]]
+
+
+@mcp_tool()
+def transform_midi_file(
+    file_path: str,
+    output_path: str,
+    transpose: int = 0,
+    quantize: float = 0.0,
+    quantize_strength: float = 1.0,
+    humanize_timing: float = 0.0,
+    humanize_velocity: int = 0,
+    velocity_scale: float = 1.0,
+    tracks: Optional[List[int]] = None,
+    seed: Optional[int] = None
+) -> str:
+    """
+    Transpose, quantize, humanize or rescale the velocities of an existing MIDI file.
+
+    Works on multi-track files (e.g. from create_song_structure). Transforms
+    run in the order listed below. Tempo, names and other events are kept.
+
+    Args:
+        file_path: MIDI file to read
+        output_path: Where to write the result (may be the same file)
+        transpose: Semitones to shift notes by; the drum channel is left alone
+        quantize: Grid in beats to snap note starts to, e.g. 0.25 for 16ths (0 = off)
+        quantize_strength: How far to move toward the grid, 0-1 (default 1)
+        humanize_timing: Maximum random shift of note starts, in beats (e.g. 0.02)
+        humanize_velocity: Maximum random velocity change (0-64)
+        velocity_scale: Multiply note velocities by this (e.g. 0.8 = softer)
+        tracks: Track numbers to change, counting from 1 (default: all)
+        seed: Random seed, to make humanizing repeatable
+    """
+    if not (-48 <= transpose <= 48):
+        return "✗ Transpose must be between -48 and 48 semitones"
+    if quantize < 0 or not (0 <= quantize_strength <= 1):
+        return "✗ Quantize grid must not be negative and strength must be between 0 and 1"
+    if not (0 <= humanize_timing <= 1) or not (0 <= humanize_velocity <= 64):
+        return "✗ Humanize timing must be 0-1 beats and velocity 0-64"
+    if not (0 < velocity_scale <= 4):
+        return "✗ Velocity scale must be greater than 0 and at most 4"
+    if not (transpose or quantize or humanize_timing or humanize_velocity or velocity_scale != 1):
+        return "✗ No transform given"
+
+    try:
+        header, track_arrays = load_track_arrays(str(Path(file_path).expanduser()))
+    except (OSError, ValueError) as e:
+        return f"✗ Cannot read {file_path}: {e}"
+    # Each track is transformed once, however often it is listed
+    selected = range(1, len(track_arrays) + 1) if tracks is None else sorted(set(tracks))
+    if not selected:
+        return "✗ No tracks selected"
+    if any(not (1 <= number <= len(track_arrays)) for number in selected):
+        return f"✗ Track numbers must be between 1 and {len(track_arrays)}"
+
+    tpb = header.ticks_per_beat
+    rng = random.Random(seed)
+    dropped = notes = 0
+    for number in selected:
+        track = track_arrays[number - 1]
+        if transpose:
+            dropped += transpose_track(track, transpose)
+        starts = track.note_ons()
+        if quantize:
+            quantize_track(track, starts, max(1, int(round(quantize * tpb))), quantize_strength)
+        if humanize_timing or humanize_velocity:
+            humanize_track(track, starts, int(round(humanize_timing * tpb)), humanize_velocity, rng)
+        if velocity_scale != 1:
+            scale_velocities(track, starts, velocity_scale)
+        notes += len(starts)
+
+    try:
+        output = str(Path(output_path).expanduser())
+        write_midi_file(output, [track.encode() for track in track_arrays], tpb)
+    except Exception as e:
+        return f"✗ Error writing MIDI file: {e}"
+
+    applied = []
+    if transpose:
+        applied.append(f"transpose {transpose:+d}")
+    if quantize:
+        applied.append(f"quantize {quantize:g} beat ({quantize_strength:.0%})")
+    if humanize_timing or humanize_velocity:
+        applied.append(f"humanize ±{humanize_timing:g} beat, ±{humanize_velocity} velocity")
+    if velocity_scale != 1:
+        applied.append(f"velocity x{velocity_scale:g}")
+    result = f"""✓ Transformed MIDI file: {output_path}
+  Source: {file_path}
+  Tracks changed: {len(selected)} of {len(track_arrays)}, {notes} notes
+  Applied: {', '.join(applied)}"""
+    if dropped:
+        result += f"\n  Removed {dropped} notes transposed out of range"
+    return result
+
+
+# ============================================================================
+# GENERATED MIDI CACHE
+# ============================================================================
+
+# Bump when generator output changes, so stale cache entries are not served
+GENERATOR_VERSION = 1
+
+
+class MidiCache:
+    """
+    Content-addressed cache of generated MIDI files.
+
+    Keys are a hash of the tool name and its normalized arguments. Encoded
+    files live in an in-memory LRU backed by an on-disk store with a size
+    cap; the least recently used files are evicted first. A hit copies the cached
+    bytes to the requested output path, so later edits to that file never
+    reach the cache.
+    """
+
+    def __init__(self, directory: Path, max_disk_bytes: int, max_memory_bytes: int):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: OrderedDict = OrderedDict()  # key -> bytes
+        self._memory_bytes = 0
+        self._disk: Optional[OrderedDict] = None  # key -> size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(tool: str, **args) -> str:
+        """Hash a tool name and its normalized arguments."""
+        payload = json.dumps([GENERATOR_VERSION, tool, args], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Write the cached file for `key` to `output_path`. Returns False on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            else:
+                self._load_disk_index()
+                if key not in self._disk:
+                    self.stats['misses'] += 1
+                    return False
+                self._disk.move_to_end(key)
+            self.stats['hits'] += 1
+
+        if data is not None:
+            with open(output_path, 'wb') as f:
+                f.write(data)
+            return True
+
+        cached_file = self.directory / key
+        try:
+            os.utime(cached_file)  # Keeps LRU order across restarts
+            shutil.copyfile(cached_file, output_path)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget_disk(key)
+                self.stats['hits'] -= 1
+                self.stats['misses'] += 1
+            return False
+        return True
+
+    def store(self, key: str, output_path: str):
+        """Add a freshly generated file to the cache."""
+        size = os.path.getsize(output_path)
+        if size > self.max_disk_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.directory / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(output_path, tmp_file)
+        os.replace(tmp_file, self.directory / key)
+
+        data = None
+        if size <= self.max_memory_bytes // 8:
+            with open(output_path, 'rb') as f:
+                data = f.read()
+
+        with self._lock:
+            self._load_disk_index()
+            self._forget_disk(key)
+            self._disk[key] = size
+            self._disk_bytes += size
+            while self._disk_bytes > self.max_disk_bytes:
+                old_key, old_size = self._disk.popitem(last=False)
+                self._disk_bytes -= old_size
+                self.stats['evictions'] += 1
+                try:
+                    os.remove(self.directory / old_key)
+                except FileNotFoundError:
+                    pass
+
+            if data is not None:
+                if key in self._memory:
+                    self._memory_bytes -= len(self._memory.pop(key))
+                self._memory[key] = data
+                self._memory_bytes += len(data)
+                while self._memory_bytes > self.max_memory_bytes:
+                    _, old_data = self._memory.popitem(last=False)
+                    self._memory_bytes -= len(old_data)
+
+    def clear(self):
+        """Remove every cached file."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._load_disk_index()
+            for key in self._disk:
+                try:
+                    os.remove(self.directory / key)
+                except FileNotFoundError:
+                    pass
+            self._disk.clear()
+            self._disk_bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        """Entry counts, sizes and hit/miss counters."""
+        with self._lock:
+            self._load_disk_index()
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                **self.stats,
+            }
+
+    def _load_disk_index(self):
+        # Called with the lock held; scans the store once per process
+        if self._disk is not None:
+            return
+        entries = []
+        if self.directory.is_dir():
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and len(entry.name) == 64:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort()
+        self._disk = OrderedDict((name, size) for _, name, size in entries)
+        self._disk_bytes = sum(self._disk.values())
+
+    def _forget_disk(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+
+midi_cache = MidiCache(MIDI_CACHE_DIR, MIDI_CACHE_DISK_BYTES, MIDI_CACHE_MEMORY_BYTES)
+
+
+def write_cached(output_path: str, write, tool: str, **args) -> bool:
+    """
+    Produce `output_path` from the cache, or by calling `write(output_path)`.
+
+    `args` must be the normalized inputs that fully determine the file.
+    Returns True if the file came from the cache.
+    """
+    if not MIDI_CACHE_ENABLED:
+        write(output_path)
+        return False
+    key = MidiCache.key(tool, **args)
+    if midi_cache.fetch(key, output_path):
+        return True
+    write(output_path)
+    try:
+        midi_cache.store(key, output_path)
+    except OSError as e:
+        print(f"Warning: could not cache {output_path}: {e}", file=sys.stderr)
+    return False
+
+
+# ============================================================================
+# CHORDS
+# ============================================================================
+
+# Pitch class of every root spelling: naturals plus sharp/flat (and double)
+# accidentals, e.g. "F#", "Gb", "B#", "Cb", "Ebb"
+NATURAL_PITCH = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+ACCIDENTALS = {'': 0, '#': 1, '♯': 1, '##': 2, 'x': 2, 'b': -1, '♭': -1, 'bb': -2}
+ROOT_PITCH = {
+    letter + accidental: (pitch + offset) % 12
+    for letter, pitch in NATURAL_PITCH.items()
+    for accidental, offset in ACCIDENTALS.items()
+}
+
+# Chord quality suffix -> intervals above the root, with common aliases
+CHORD_QUALITIES = {
+    ('', 'maj', 'M'): (0, 4, 7),
+    ('m', 'min', '-'): (0, 3, 7),
+    ('dim', '°', 'o'): (0, 3, 6),
+    ('aug', '+', '#5'): (0, 4, 8),
+    ('5',): (0, 7),
+    ('sus2',): (0, 2, 7),
+    ('sus4', 'sus'): (0, 5, 7),
+    ('6', 'maj6', 'M6'): (0, 4, 7, 9),
+    ('m6', 'min6', '-6'): (0, 3, 7, 9),
+    ('6/9', '69', '6add9'): (0, 4, 7, 9, 14),
+    ('add9', 'add2'): (0, 4, 7, 14),
+    ('madd9', 'm(add9)'): (0, 3, 7, 14),
+    ('7', 'dom7'): (0, 4, 7, 10),
+    ('maj7', 'M7', 'Δ', 'Δ7', 'ma7'): (0, 4, 7, 11),
+    ('m7', 'min7', '-7', 'mi7'): (0, 3, 7, 10),
+    ('mMaj7', 'm(maj7)', 'mM7', 'minMaj7', '-Δ7'): (0, 3, 7, 11),
+    ('dim7', '°7', 'o7'): (0, 3, 6, 9),
+    ('m7b5', 'ø', 'ø7', 'min7b5', '-7b5'): (0, 3, 6, 10),
+    ('aug7', '+7', '7#5', '7+5'): (0, 4, 8, 10),
+    ('maj7#5', 'augMaj7', '+M7'): (0, 4, 8, 11),
+    ('7b5',): (0, 4, 6, 10),
+    ('7sus4', '7sus'): (0, 5, 7, 10),
+    ('7sus2',): (0, 2, 7, 10),
+    ('9', 'dom9'): (0, 4, 7, 10, 14),
+    ('maj9', 'M9', 'Δ9'): (0, 4, 7, 11, 14),
+    ('m9', 'min9', '-9'): (0, 3, 7, 10, 14),
+    ('9sus4', '9sus'): (0, 5, 7, 10, 14),
+    ('7b9',): (0, 4, 7, 10, 13),
+    ('7#9',): (0, 4, 7, 10, 15),
+    ('7#11',): (0, 4, 7, 10, 18),
+    ('maj7#11', 'M7#11'): (0, 4, 7, 11, 18),
+    ('11', 'dom11'): (0, 4, 7, 10, 14, 17),
+    ('m11', 'min11', '-11'): (0, 3, 7, 10, 14, 17),
+    ('13', 'dom13'): (0, 4, 7, 10, 14, 21),
+    ('maj13', 'M13', 'Δ13'): (0, 4, 7, 11, 14, 21),
+    ('m13', 'min13', '-13'): (0, 3, 7, 10, 14, 21),
+}
+
+# Every chord symbol without a slash bass -> (root pitch class, intervals),
+# built once so parsing is a single dict lookup
+CHORD_TABLE = {
+    root + suffix: (pitch, intervals)
+    for root, pitch in ROOT_PITCH.items()
+    for suffixes, intervals in CHORD_QUALITIES.items()
+    for suffix in suffixes
+}
+
+CHORD_BASE_NOTE = 60  # Roots are voiced from middle C up to B4
+
+
+class ParsedChord(NamedTuple):
+    """A chord symbol broken into root, intervals and optional slash bass."""
+    root: int
+    intervals: Tuple[int, ...]
+    bass: Optional[int] = None
+
+
+@lru_cache(maxsize=4096)
+def parse_chord(symbol: str) -> ParsedChord:
+    """
+    Parse a chord symbol such as "F#m7", "Bb", "Csus4" or "G/B".
+
+    Raises ValueError for symbols that are not in the chord table.
+    """
+    name, _, bass_name = symbol.strip().partition('/')
+    # "C6/9" is a quality, not a slash chord
+    if bass_name == '9' and name + '/9' in CHORD_TABLE:
+        name, bass_name = name + '/9', ''
+    if name not in CHORD_TABLE:
+        raise ValueError(f"Unknown chord: {symbol}")
+    root, intervals = CHORD_TABLE[name]
+    bass = None
+    if bass_name:
+        if bass_name not in ROOT_PITCH:
+            raise ValueError(f"Unknown bass note in chord: {symbol}")
+        bass = ROOT_PITCH[bass_name]
+    return ParsedChord(root, intervals, bass)
+
+
+@lru_cache(maxsize=4096)
+def chord_voicing(chord: ParsedChord) -> Tuple[int, ...]:
+    """
+    Close voicing with the root from middle C up.
+
+    A slash bass that is a chord tone gives that inversion; any other slash
+    bass is added below the chord.
+    """
+    root = CHORD_BASE_NOTE + chord.root
+    notes = [root + interval for interval in chord.intervals]
+    if chord.bass is None:
+        return tuple(notes)
+    tones = [note % 12 for note in notes]
+    if chord.bass in tones:
+        # Raise the tones below the bass tone by an octave
+        bass_note = notes[tones.index(chord.bass)]
+        return tuple(sorted(note + 12 if note < bass_note else note for note in notes))
+    bass_note = notes[0] - ((notes[0] - chord.bass) % 12 or 12)
+    return (bass_note,) + tuple(notes)
+
+
+def voice_lead(previous: Tuple[int, ...], chord: ParsedChord) -> Tuple[int, ...]:
+    """
+    Voice `chord` to move as little as possible from the `previous` voicing.
+
+    Every inversion of the chord is tried in the octaves around the previous
+    chord, and the one with the smallest total movement between nearest
+    notes wins. A slash bass stays the lowest note.
+    """
+    base = chord_voicing(chord._replace(bass=None))
+    size = len(base)
+    center = sum(previous) / len(previous)
+    best, best_cost = base, None
+    for inversion in range(size):
+        voiced = [base[(inversion + i) % size] + 12 * ((inversion + i) // size) for i in range(size)]
+        for shift in (-24, -12, 0, 12):
+            candidate = [note + shift for note in voiced]
+            if candidate[0] < 24 or candidate[-1] > 108:
+                continue
+            cost = sum(min(abs(note - p) for p in previous) for note in candidate)
+            cost += sum(min(abs(p - note) for note in candidate) for p in previous)
+            cost += abs(sum(candidate) / size - center) / 4  # Avoid drifting away
+            if best_cost is None or cost < best_cost:
+                best, best_cost = tuple(candidate), cost
+    if chord.bass is not None:
+        bass_note = best[0] - ((best[0] - chord.bass) % 12 or 12)
+        best = (bass_note,) + tuple(note for note in best if note % 12 != chord.bass or note == bass_note)
+    return best
+
+
+def chord_voicings(chord_list: List[str], voice_leading: bool = False) -> List[List[int]]:
+    """
+    Parse chord symbols and voice them. Raises ValueError on unknown chords.
+
+    With voice_leading, each chord after the first is voiced close to the one
+    before it instead of in root position.
+    """
+    voicings = []
+    previous = None
+    for symbol in chord_list:
+        chord = parse_chord(symbol)
+        if voice_leading and previous is not None:
+            notes = voice_lead(previous, chord)
+        else:
+            notes = chord_voicing(chord)
+        voicings.append(list(notes))
+        previous = notes
+    return voicings
+
+
+# ============================================================================
+# KEYS & SCALES
+# ============================================================================
+
+# Scale steps in semitones from the tonic
+SCALE_MODES = {
+    'major': (0, 2, 4, 5, 7, 9, 11),
+    'minor': (0, 2, 3, 5, 7, 8, 10),
+    'dorian': (0, 2, 3, 5, 7, 9, 10),
+    'phrygian': (0, 1, 3, 5, 7, 8, 10),
+    'lydian': (0, 2, 4, 6, 7, 9, 11),
+    'mixolydian': (0, 2, 4, 5, 7, 9, 10),
+    'locrian': (0, 1, 3, 5, 6, 8, 10),
+    'harmonic minor': (0, 2, 3, 5, 7, 8, 11),
+    'melodic minor': (0, 2, 3, 5, 7, 9, 11),
+    'major pentatonic': (0, 2, 4, 7, 9),
+    'minor pentatonic': (0, 3, 5, 7, 10),
+    'blues': (0, 3, 5, 6, 7, 10),
+}
+
+MODE_ALIASES = {
+    '': 'major', 'maj': 'major', 'ionian': 'major',
+    'm': 'minor', 'min': 'minor', '-': 'minor', 'aeolian': 'minor', 'natural minor': 'minor',
+    'harmonic': 'harmonic minor', 'melodic': 'melodic minor',
+    'pentatonic': 'major pentatonic', 'm pentatonic': 'minor pentatonic',
+    **{mode: mode for mode in SCALE_MODES},
+}
+
+# Modes used to harmonize songs: pentatonic and blues borrow the major or
+# minor chords they sit in
+HARMONY_MODE = {
+    'major pentatonic': 'major',
+    'minor pentatonic': 'minor',
+    'blues': 'minor',
+}
+
+# Where each church mode starts in its parent major scale, for key signatures
+MODE_OFFSET = {'major': 0, 'dorian': 2, 'phrygian': 4, 'lydian': 5, 'mixolydian': 7, 'minor': 9, 'locrian': 11}
+FLAT_MAJOR_KEYS = {5, 10, 3, 8, 1, 6}  # F, Bb, Eb, Ab, Db, Gb
+SHARP_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+FLAT_NAMES = ('C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B')
+
+TONIC_BASE_NOTE = 60  # Tonics are placed from middle C up to B4
+
+# (tonic pitch class, mode) -> scale notes over two octaves plus the top
+# tonic, starting at the tonic, e.g. (9, 'minor') -> 69, 71, 72, ...
+SCALE_TABLE = {
+    (root, mode): tuple(
+        TONIC_BASE_NOTE + root + 12 * octave + step
+        for octave in range(2)
+        for step in steps
+    ) + (TONIC_BASE_NOTE + root + 24,)
+    for root in range(12)
+    for mode, steps in SCALE_MODES.items()
+}
+
+KEY_PATTERN = re.compile(r'^([A-Ga-g])(##|bb|[#♯b♭x])?\s*(.*)$')
+
+
+class MusicalKey(NamedTuple):
+    """A parsed key: tonic pitch class, mode and display name."""
+    root: int
+    mode: str
+    name: str
+
+
+@lru_cache(maxsize=1024)
+def parse_key(key: str) -> MusicalKey:
+    """
+    Parse a key such as "C", "Am", "F# minor", "Bb dorian" or "E blues".
+
+    Raises ValueError for keys that cannot be parsed.
+    """
+    match = KEY_PATTERN.match(key.strip())
+    if not match:
+        raise ValueError(f"Unknown key: {key}")
+    letter, accidental, mode_text = match.groups()
+    root_name = letter.upper() + (accidental or '')
+    mode = MODE_ALIASES.get(' '.join(mode_text.lower().split()))
+    if mode is None:
+        raise ValueError(f"Unknown key: {key}. Modes: {', '.join(SCALE_MODES)}")
+    return MusicalKey(ROOT_PITCH[root_name], mode, f"{root_name} {mode}")
+
+
+def key_note_names(key: MusicalKey) -> Tuple[str, ...]:
+    """Note names spelled with flats or sharps to suit the key signature."""
+    harmony = HARMONY_MODE.get(key.mode, key.mode)
+    if harmony not in MODE_OFFSET:
+        harmony = 'minor' if SCALE_MODES[harmony][2] == 3 else 'major'
+    parent = (key.root - MODE_OFFSET[harmony]) % 12
+    return FLAT_NAMES if parent in FLAT_MAJOR_KEYS else SHARP_NAMES
+
+
+def diatonic_chord(key: MusicalKey, degree: int) -> str:
+    """Chord symbol for the triad on a scale degree (0 = tonic) of the key."""
+    steps = SCALE_MODES[HARMONY_MODE.get(key.mode, key.mode)]
+    root = steps[degree % 7]
+    third = (steps[(degree + 2) % 7] - root) % 12
+    fifth = (steps[(degree + 4) % 7] - root) % 12
+    quality = {(4, 7): '', (3, 7): 'm', (3, 6): 'dim', (4, 8): 'aug'}.get((third, fifth), '')
+    return key_note_names(key)[(key.root + root) % 12] + quality
+
+
+# Scale degrees (0 = tonic) of the four-chord song progression per mode
+MODE_PROGRESSIONS = {
+    'major': (0, 5, 3, 4),           # I-vi-IV-V
+    'minor': (0, 5, 2, 6),           # i-VI-III-VII
+    'dorian': (0, 3, 2, 6),          # i-IV-III-VII
+    'phrygian': (0, 1, 6, 5),        # i-II-vii-VI
+    'lydian': (0, 1, 5, 4),          # I-II-vi-V
+    'mixolydian': (0, 5, 3, 4),      # I-vi-IV-v
+    'locrian': (0, 1, 5, 6),         # i°-II-VI-vii
+    'harmonic minor': (0, 5, 3, 4),  # i-VI-iv-V
+    'melodic minor': (0, 1, 3, 4),   # i-ii-IV-V
+}
+
+
+def key_progression(key: MusicalKey) -> List[str]:
+    """Four-chord progression for a key, e.g. C-Am-F-G in C major."""
+    harmony = HARMONY_MODE.get(key.mode, key.mode)
+    return [diatonic_chord(key, degree) for degree in MODE_PROGRESSIONS[harmony]]
+
+
+# ============================================================================
+# DRUM PATTERNS
+# ============================================================================
+
+DRUM_CHANNEL = 9  # MIDI channel 10
+TICKS_PER_BAR = TICKS_PER_BEAT * 4
+
+# General MIDI drum notes
+DRUM_NOTES = {
+    'kick': 36, 'rim': 37, 'snare': 38, 'clap': 39,
+    'hihat': 42, 'pedal': 44, 'openhat': 46,
+    'lowtom': 45, 'midtom': 47, 'hightom': 50,
+    'crash': 49, 'ride': 51,
+}
+
+# Step characters: accent, normal hit, ghost note; anything else is a rest
+STEP_VELOCITY = {'X': 120, 'x': 100, 'o': 60}
+
+DRUM_PATTERNS = {
+    'basic': "kick: x.......x......., snare: ....x.......x..., hihat: x.x.x.x.x.x.x.x.",
+    'rock': "kick: x.....x.x......., snare: ....X.......X..., hihat: x.x.x.x.x.x.x.x.",
+    'four-on-the-floor': "kick: x...x...x...x..., clap: ....x.......x..., hihat: ..x...x...x...x., openhat: ..............x.",
+    'half-time': "kick: x.........x....., snare: ........X......., hihat: x.x.x.x.x.x.x.x.",
+    'funk': "kick: x..x..x...x..x.., snare: ....X..o.o..X..o, hihat: xxxxxxxxxxxxxxxx",
+    'shuffle': "kick: x.....x.x..., snare: ...X.....X.., hihat: x.xx.xx.xx.x",
+}
+
+DRUM_FILLS = {
+    'snare-roll': "kick: x..............., snare: ....x.x.xxxxXXXX",
+    'toms': "kick: x..............., snare: ....xxxx........, hightom: ........xx......, midtom: ..........xx...., lowtom: ............xxxx",
+    'build': "kick: x...x...x.x.xxxx, snare: ..x...x.x.x.xxxX",
+}
+
+
+class DrumPattern:
+    """
+    One bar of a step-sequenced drum pattern.
+
+    Each instrument is a lane with a bitmask of active steps and a velocity
+    per step. The bar is compiled to encoded MIDI events once; tile_track()
+    then repeats those bytes for as many bars as needed, so encoding costs
+    the same for 4 bars or 400.
+    """
+
+    def __init__(self, steps: int = 16):
+        if TICKS_PER_BAR % steps:
+            raise ValueError(f"{steps} steps do not divide a bar evenly")
+        self.steps = steps
+        self.lanes: Dict[int, tuple] = {}  # note -> (step bitmask, velocities)
+
+    @classmethod
+    def parse(cls, text: str) -> 'DrumPattern':
+        """
+        Parse lanes such as "kick: x...x..., snare: ....X..." (comma,
+        semicolon or newline separated). Instrument names come from
+        DRUM_NOTES, or a MIDI note number can be given instead.
+        """
+        lanes = [lane.strip() for lane in re.split(r'[,;\n]', text) if lane.strip()]
+        if not lanes:
+            raise ValueError("empty drum pattern")
+        pattern = None
+        for lane in lanes:
+            name, sep, steps = lane.partition(':')
+            name, steps = name.strip().lower(), steps.strip()
+            if not sep or not steps:
+                raise ValueError(f"drum lane must look like 'kick: x...x...': {lane!r}")
+            if name in DRUM_NOTES:
+                note = DRUM_NOTES[name]
+            elif name.isdigit() and int(name) <= 127:
+                note = int(name)
+            else:
+                raise ValueError(f"unknown drum: {name}. Available: {', '.join(DRUM_NOTES)}")
+            if pattern is None:
+                pattern = cls(len(steps))
+            elif len(steps) != pattern.steps:
+                raise ValueError(f"all lanes need {pattern.steps} steps: {lane!r}")
+            for step, char in enumerate(steps):
+                if char in STEP_VELOCITY:
+                    pattern.hit(note, step, STEP_VELOCITY[char])
+        return pattern
+
+    def hit(self, note: int, step: int, velocity: int):
+        """Turn on one step of an instrument lane."""
+        mask, velocities = self.lanes.get(note, (0, bytearray(self.steps)))
+        velocities[step] = velocity
+        self.lanes[note] = (mask | (1 << step), velocities)
+
+    def signature(self) -> list:
+        """Plain-data description of the pattern, for cache keys."""
+        return [self.steps] + [[note, mask, list(vel)] for note, (mask, vel) in sorted(self.lanes.items())]
+
+    def compile(self, swing: float = 0.0) -> 'CompiledBar':
+        """
+        Render the bar to note events.
+
+        Swing (0-0.5) delays every off-beat step by that fraction of a step;
+        1/3 gives a triplet feel.
+        """
+        step_ticks = TICKS_PER_BAR // self.steps
+        offset = int(round(swing * step_ticks))
+        length = max(1, step_ticks // 2)
+        events = NoteEvents()
+        for note, (mask, velocities) in sorted(self.lanes.items()):
+            for step in range(self.steps):
+                if mask >> step & 1:
+                    tick = step * step_ticks + (offset if step % 2 else 0)
+                    events.add(tick, note, velocities[step], min(length, TICKS_PER_BAR - tick), DRUM_CHANNEL)
+        return CompiledBar(events)
+
 
+class CompiledBar:
+    """A drum bar compiled to encoded events, memoized per lead-in gap."""
 
-@mcp.tool()
-def mixer_set_pan(track: int, pan: int) -> str:
+    def __init__(self, events: NoteEvents):
+        self.events = events
+        self.empty = len(events) == 0
+        self.last_tick = max((t + d for t, d in zip(events.tick, events.duration)), default=0)
+        self._encoded: Dict[int, bytes] = {}
+
+    def encode(self, gap: int) -> bytes:
+        """
+        Encoded events for this bar, when the previous event came `gap`
+        ticks before the bar starts.
+        """
+        data = self._encoded.get(gap)
+        if data is None:
+            body = bytearray()
+            self.events.encode_events(body, last_time=-gap)
+            data = self._encoded[gap] = bytes(body)
+        return data
+
+
+def tile_track(
+    bar: CompiledBar,
+    bars: int,
+    fill: Optional[CompiledBar] = None,
+    fill_every: int = 4,
+    tempo: Optional[float] = None,
+    name: Optional[str] = None
+) -> bytes:
     """
-    Set the pan of a track.
+    Build an MTrk chunk by repeating a compiled bar `bars` times.
 
-    Args:
-        track: Track number (1-8)
-        pan: Pan position (0=left, 64=center, 127=right)
+    When `fill` is given it replaces every `fill_every`-th bar (the last bar
+    of each section). Each distinct bar transition is encoded only once and
+    the rest is byte copying.
     """
-    if not (1 <= track <= 8):
-        return "✗ Track number must be between 1 and 8"
-    if not (0 <= pan <= 127):
-        return "✗ Pan must be between 0 and 127"
+    head = bytearray()
+    if name is not None:
+        head.append(0)
+        head += track_name_event(name)
+    if tempo is not None:
+        head.append(0)
+        head += tempo_event(tempo)
 
-    # CC 10 is standard MIDI pan
-    channel = track - 1
-    if send_midi_cc(cc_number=10, value=pan, channel=channel):
-        return f"✓ Set track {track} pan to {pan}"
-    return f"✗ Failed to set track {track} pan"
+    parts = [bytes(head)]
+    gap = 0  # Ticks from the last event written to the start of the current bar
+    for index in range(bars):
+        current = fill if fill is not None and (index + 1) % fill_every == 0 else bar
+        if current.empty:
+            gap += TICKS_PER_BAR
+            continue
+        parts.append(current.encode(gap))
+        gap = TICKS_PER_BAR - current.last_tick
 
+    tail = bytearray()
+    write_vlq(tail, gap)
+    tail += END_OF_TRACK
+    parts.append(bytes(tail))
+    body = b''.join(parts)
+    return b'MTrk' + struct.pack('>I', len(body)) + body
 
-@mcp.tool()
-def mixer_mute_track(track: int, mute: bool = True) -> str:
-    """
-    Mute or unmute a track.
 
-    Args:
-        track: Track number (1-8)
-        mute: True to mute, False to unmute
-    """
-    if not (1 <= track <= 8):
-        return "✗ Track number must be between 1 and 8"
+def resolve_drum_pattern(pattern: str) -> DrumPattern:
+    """A named pattern from DRUM_PATTERNS/DRUM_FILLS, or a lane string to parse."""
+    text = DRUM_PATTERNS.get(pattern) or DRUM_FILLS.get(pattern) or pattern
+    return DrumPattern.parse(text)
 
-    channel = track - 1
-    value = 127 if mute else 0
-    # CC 120 or custom CC you map in Generic Remote
-    if send_midi_cc(cc_number=20 + track, value=value, channel=0):
-        status = "muted" if mute else "unmuted"
-        return f"✓ Track {track} {status}"
-    return f"✗ Failed to mute/unmute track {track}"
 
+# ============================================================================
+# MIDI FILE CREATION
+# ============================================================================
 
-@mcp.tool()
-def mixer_solo_track(track: int, solo: bool = True) -> str:
+def melody_notes(melody_description: str, key: str) -> tuple:
     """
-    Solo or unsolo a track.
+    Pick melody notes for a description in the given key.
 
-    Args:
-        track: Track number (1-8)
-        solo: True to solo, False to unsolo
+    Returns (notes, key_name). Raises ValueError for keys that cannot be parsed.
     """
-    if not (1 <= track <= 8):
-        return "✗ Track number must be between 1 and 8"
+    parsed = parse_key(key)
+    scale = SCALE_TABLE[parsed.root, parsed.mode]
 
-    channel = track - 1
-    value = 127 if solo else 0
-    # Custom CC you map in Generic Remote for Solo
-    if send_midi_cc(cc_number=30 + track, value=value, channel=0):
-        status = "soloed" if solo else "unsoloed"
-        return f"✓ Track {track} {status}"
-    return f"✗ Failed to solo/unsolo track {track}"
+    # Simple melody patterns based on description
+    if 'happy' in melody_description.lower() or 'upbeat' in melody_description.lower():
+        # Ascending pattern
+        pattern = [0, 2, 4, 2, 0, 2, 4, 7]
+    elif 'sad' in melody_description.lower() or 'melancholic' in melody_description.lower():
+        # Descending pattern
+        pattern = [7, 5, 4, 2, 0, 2, 4, 0]
+    else:
+        # Default pattern
+        pattern = [0, 2, 4, 5, 4, 2, 0, 0]
 
+    # Create notes from pattern
+    notes = [scale[i % len(scale)] for i in pattern]
+    return notes, parsed.name
 
-# ============================================================================
-# MIDI FILE CREATION
-# ============================================================================
 
-@mcp.tool()
+@mcp_tool()
 def create_midi_note_sequence(
     notes: str,
     output_path: str,
     tempo: int = 120,
     velocity: int = 64,
-    duration: int = 480
+    duration: int = 480,
+    repeat: int = 1
 ) -> str:
     """
     Create a MIDI file with a sequence of notes.
@@ -224,108 +3664,86 @@ def create_midi_note_sequence(
         tempo: Tempo in BPM (default 120)
         velocity: Note velocity (0-127, default 64)
         duration: Note duration in ticks (default 480 = quarter note)
+        repeat: Number of times to play the sequence (default 1)
     """
     try:
         # Parse notes
         note_list = [int(n.strip()) for n in notes.split(',')]
-
-        # Create MIDI file
-        mid = MidiFile()
-        track = MidiTrack()
-        mid.tracks.append(track)
-
-        # Set tempo
-        track.append(MetaMessage('set_tempo', tempo=mido.bpm2tempo(tempo)))
-
-        # Add notes
-        current_time = 0
         for note in note_list:
-            track.append(Message('note_on', note=note, velocity=velocity, time=current_time))
-            track.append(Message('note_off', note=note, velocity=0, time=duration))
-            current_time = 0  # Next note starts immediately after
+            if not (0 <= note <= 127):
+                return f"✗ Note {note} must be between 0 and 127"
+        if not (0 <= velocity <= 127):
+            return "✗ Velocity must be between 0 and 127"
+        if repeat < 1:
+            return "✗ Repeat must be at least 1"
 
-        # Save file
+        # Stream notes to disk, each starting when the previous one ends
         output_path = os.path.expanduser(output_path)
-        mid.save(output_path)
+        write_cached(
+            output_path,
+            lambda path: write_notes_file(path, sequence_notes(note_list, velocity, duration, repeat), tempo),
+            'create_midi_note_sequence',
+            notes=note_list, tempo=tempo, velocity=velocity, duration=duration, repeat=repeat
+        )
 
         return f"✓ Created MIDI file: {output_path}\n  Notes: {note_list}\n  Tempo: {tempo} BPM"
     except Exception as e:
         return f"✗ Failed to create MIDI file: {e}"
 
 
-@mcp.tool()
+@mcp_tool()
 def create_midi_chord_progression(
     chords: str,
     output_path: str,
     tempo: int = 120,
     velocity: int = 64,
-    duration: int = 1920
+    duration: int = 1920,
+    repeat: int = 1,
+    voice_leading: bool = False
 ) -> str:
     """
     Create a MIDI file with a chord progression.
 
     Args:
-        chords: Chord names separated by commas (e.g., "C,Am,F,G")
+        chords: Chord symbols separated by commas (e.g., "C,Am,F,G" or
+            "F#m7,B7,Emaj7,C#m7b5,G/B"). Any root with # or b, common
+            qualities (m, dim, aug, sus2/4, 6, 7, maj7, m7b5, 9, 11, 13, ...)
+            and slash chords are supported.
         output_path: Path to save the MIDI file
         tempo: Tempo in BPM (default 120)
         velocity: Note velocity (0-127, default 64)
         duration: Chord duration in ticks (default 1920 = whole note)
+        repeat: Number of times to play the progression (default 1)
+        voice_leading: Voice each chord close to the previous one instead of
+            in root position (default False)
     """
     try:
-        # Chord dictionary (root note + intervals)
-        chord_patterns = {
-            'C': [60, 64, 67],    # C major
-            'Cm': [60, 63, 67],   # C minor
-            'D': [62, 66, 69],    # D major
-            'Dm': [62, 65, 69],   # D minor
-            'E': [64, 68, 71],    # E major
-            'Em': [64, 67, 71],   # E minor
-            'F': [65, 69, 72],    # F major
-            'Fm': [65, 68, 72],   # F minor
-            'G': [67, 71, 74],    # G major
-            'Gm': [67, 70, 74],   # G minor
-            'A': [69, 73, 76],    # A major
-            'Am': [69, 72, 76],   # A minor
-            'B': [71, 75, 78],    # B major
-            'Bm': [71, 74, 78],   # B minor
-        }
-
         # Parse chords
         chord_list = [c.strip() for c in chords.split(',')]
+        if not (0 <= velocity <= 127):
+            return "✗ Velocity must be between 0 and 127"
+        if repeat < 1:
+            return "✗ Repeat must be at least 1"
+        try:
+            voicings = chord_voicings(chord_list, voice_leading)
+        except ValueError as e:
+            return f"✗ {e}"
 
-        # Create MIDI file
-        mid = MidiFile()
-        track = MidiTrack()
-        mid.tracks.append(track)
-
-        # Set tempo
-        track.append(MetaMessage('set_tempo', tempo=mido.bpm2tempo(tempo)))
-
-        # Add chords
-        for chord_name in chord_list:
-            if chord_name not in chord_patterns:
-                return f"✗ Unknown chord: {chord_name}. Available: {', '.join(chord_patterns.keys())}"
-
-            chord_notes = chord_patterns[chord_name]
-
-            # All notes on at the same time
-            for i, note in enumerate(chord_notes):
-                track.append(Message('note_on', note=note, velocity=velocity, time=0 if i > 0 else 0))
-
-            # All notes off after duration (only set time on first note off)
-            for i, note in enumerate(chord_notes):
-                track.append(Message('note_off', note=note, velocity=0, time=duration if i == 0 else 0))
-
-        # Save file
+        # Stream chords to disk, all notes of a chord on and off together
         output_path = os.path.expanduser(output_path)
-        mid.save(output_path)
+        write_cached(
+            output_path,
+            lambda path: write_notes_file(path, chord_notes(voicings, velocity, duration, repeat), tempo),
+            'create_midi_chord_progression',
+            chords=voicings, tempo=tempo, velocity=velocity, duration=duration, repeat=repeat
+        )
 
         return f"✓ Created MIDI chord progression: {output_path}\n  Chords: {chord_list}\n  Tempo: {tempo} BPM"
     except Exception as e:
         return f"✗ Failed to create MIDI file: {e}"
 
 
-@mcp.tool()
+@mcp_tool()
 def create_midi_melody(
     melody_description: str,
     output_path: str,
@@ -340,67 +3758,154 @@ def create_midi_melody(
         melody_description: Description of the melody (e.g., "happy upbeat melody")
         output_path: Path to save the MIDI file
         tempo: Tempo in BPM (default 120)
-        key: Musical key (default "C")
+        key: Musical key, e.g. "C", "Am", "F# minor", "D dorian", "E blues" (default "C")
     """
     try:
-        # Scale patterns
-        scales = {
-            'C': [60, 62, 64, 65, 67, 69, 71, 72],  # C major scale
-            'Am': [69, 71, 72, 74, 76, 77, 79, 81], # A minor scale
-            'G': [67, 69, 71, 72, 74, 76, 78, 79],  # G major scale
-        }
+        notes, key = melody_notes(melody_description, key)
 
-        if key not in scales:
-            key = 'C'
-
-        scale = scales[key]
-
-        # Simple melody patterns based on description
-        if 'happy' in melody_description.lower() or 'upbeat' in melody_description.lower():
-            # Ascending pattern
-            pattern = [0, 2, 4, 2, 0, 2, 4, 7]
-        elif 'sad' in melody_description.lower() or 'melancholic' in melody_description.lower():
-            # Descending pattern
-            pattern = [7, 5, 4, 2, 0, 2, 4, 0]
-        else:
-            # Default pattern
-            pattern = [0, 2, 4, 5, 4, 2, 0, 0]
+        # Stream notes to disk as quarter notes. The file depends only on
+        # the resolved notes, so every description with the same mood hits
+        output_path = os.path.expanduser(output_path)
+        write_cached(
+            output_path,
+            lambda path: write_notes_file(path, sequence_notes(notes, 64, 480), tempo),
+            'create_midi_melody',
+            notes=notes, tempo=tempo
+        )
 
-        # Create notes from pattern
-        notes = [scale[i % len(scale)] for i in pattern]
+        return f"✓ Created melody: {output_path}\n  Description: {melody_description}\n  Key: {key}\n  Tempo: {tempo} BPM"
+    except Exception as e:
+        return f"✗ Failed to create melody: {e}"
 
-        # Create MIDI file
-        mid = MidiFile()
-        track = MidiTrack()
-        mid.tracks.append(track)
 
-        # Set tempo
-        track.append(MetaMessage('set_tempo', tempo=mido.bpm2tempo(tempo)))
+@mcp_tool()
+def create_drum_pattern(
+    output_path: str,
+    pattern: str = "basic",
+    bars: int = 4,
+    tempo: int = 120,
+    swing: float = 0.0,
+    fill: str = "",
+    fill_every: int = 4
+) -> str:
+    """
+    Create a drum track from a step-sequencer pattern.
 
-        # Add notes
-        for note in notes:
-            track.append(Message('note_on', note=note, velocity=64, time=0))
-            track.append(Message('note_off', note=note, velocity=0, time=480))  # Quarter note
+    Args:
+        output_path: Path to save the MIDI file
+        pattern: A named pattern (basic, rock, four-on-the-floor, half-time,
+            funk, shuffle) or lanes like
+            "kick: x...x...x...x..., snare: ....X.......X..., hihat: x.x.x.x.x.x.x.x."
+            (X = accent, x = hit, o = ghost, . = rest; one character per step)
+        bars: Number of bars (default 4)
+        tempo: Tempo in BPM (default 120)
+        swing: Delay of off-beat steps as a fraction of a step, 0-0.5 (default 0)
+        fill: Optional fill (snare-roll, toms, build, or lanes) played on the
+            last bar of each section
+        fill_every: Section length in bars (default 4)
+    """
+    try:
+        if bars < 1:
+            return "✗ Bars must be at least 1"
+        if not (0 <= swing <= 0.5):
+            return "✗ Swing must be between 0 and 0.5"
+        if fill_every < 1:
+            return "✗ Fill interval must be at least 1"
+        try:
+            main = resolve_drum_pattern(pattern)
+            fill_pattern = resolve_drum_pattern(fill) if fill else None
+        except ValueError as e:
+            return f"✗ Invalid drum pattern: {e}"
 
-        # Save file
         output_path = os.path.expanduser(output_path)
-        mid.save(output_path)
+        write_cached(
+            output_path,
+            lambda path: write_midi_file(path, [tile_track(
+                main.compile(swing), bars,
+                fill_pattern.compile(swing) if fill_pattern else None, fill_every, tempo=tempo
+            )]),
+            'create_drum_pattern',
+            pattern=main.signature(), fill=fill_pattern.signature() if fill_pattern else None,
+            bars=bars, tempo=tempo, swing=swing, fill_every=fill_every
+        )
 
-        return f"✓ Created melody: {output_path}\n  Description: {melody_description}\n  Key: {key}\n  Tempo: {tempo} BPM"
+        fill_text = f", fill '{fill}' every {fill_every} bars" if fill else ""
+        return f"✓ Created drum pattern: {output_path}\n  Pattern: {pattern}\n  Bars: {bars}{fill_text}\n  Tempo: {tempo} BPM"
     except Exception as e:
-        return f"✗ Failed to create melody: {e}"
+        return f"✗ Failed to create drum pattern: {e}"
 
 
 # ============================================================================
 # SONG CREATION (High-level)
 # ============================================================================
 
-@mcp.tool()
+SONG_PARTS = ('chords', 'bass', 'melody', 'drums')
+
+
+def song_parts(song_description: str, key: str) -> Dict[str, tuple]:
+    """
+    Describe each part of a song as (encode, cache_args).
+
+    encode(tempo, name) returns the part as an encoded MTrk chunk, and
+    cache_args are the normalized inputs that fully determine the part.
+    """
+    parsed_key = parse_key(key)
+
+    # 1. Chord progression in the key
+    chord_list = key_progression(parsed_key)
+    voicings = chord_voicings(chord_list)
+
+    # 2. Bass line (root notes of chords, octave 2)
+    bass_notes = [48 + parse_chord(chord).root for chord in chord_list]
+
+    # 3. Melody
+    melody, _ = melody_notes(song_description, key)
+
+    # 4. Drums: 4 bars of the basic beat with a snare roll into the next section
+    drums = resolve_drum_pattern('basic')
+    drum_fill = resolve_drum_pattern('snare-roll')
+
+    return {
+        'chords': (
+            lambda tempo, name: encode_notes_track(chord_notes(voicings, 64, 1920), tempo, name),
+            {'chords': voicings},
+        ),
+        'bass': (
+            lambda tempo, name: encode_notes_track(sequence_notes(bass_notes, 80, 1920), tempo, name),
+            {'notes': bass_notes},
+        ),
+        'melody': (
+            lambda tempo, name: encode_notes_track(sequence_notes(melody, 64, 480), tempo, name),
+            {'notes': melody},
+        ),
+        'drums': (
+            lambda tempo, name: tile_track(drums.compile(), 4, drum_fill.compile(), 4, tempo=tempo, name=name),
+            {'pattern': drums.signature(), 'fill': drum_fill.signature()},
+        ),
+    }
+
+
+def timed(fn, *args, **kwargs) -> tuple:
+    """Call fn(*args, **kwargs) and return (result, elapsed_seconds)."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def encode_notes_track(notes: Iterable[tuple], tempo: Optional[float], name: Optional[str]) -> bytes:
+    """Encode a stream of notes as one named MTrk chunk."""
+    events = NoteEvents()
+    events.extend(notes)
+    return events.encode_track(tempo=tempo, name=name)
+
+
+@mcp_tool()
 def create_song_structure(
     song_description: str,
     output_directory: str,
     tempo: int = 120,
-    key: str = "C"
+    key: str = "C",
+    single_file: bool = False
 ) -> str:
     """
     Create a complete song structure with multiple MIDI files.
@@ -410,87 +3915,732 @@ def create_song_structure(
         song_description: Description of the song (e.g., "upbeat pop song")
         output_directory: Directory to save MIDI files
         tempo: Tempo in BPM (default 120)
-        key: Musical key (default "C")
+        key: Musical key, e.g. "C", "Am", "F# minor", "D dorian", "E blues" (default "C")
+        single_file: Write one multi-track song.mid (one track per part)
+            instead of four separate files (default False)
     """
     try:
         # Create output directory
         output_dir = Path(os.path.expanduser(output_directory))
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        parts = song_parts(song_description, key)
         results = []
 
-        # 1. Create chord progression
-        chords = "C,Am,F,G" if 'major' in key else "Am,F,C,G"
-        chord_file = output_dir / "chords.mid"
-        create_midi_chord_progression(chords, str(chord_file), tempo=tempo, duration=1920)
-        results.append(f"  - Chords: {chord_file}")
-
-        # 2. Create bass line (root notes of chords)
-        bass_notes = "48,57,53,55"  # C2, A2, F2, G2
-        bass_file = output_dir / "bass.mid"
-        create_midi_note_sequence(bass_notes, str(bass_file), tempo=tempo, duration=1920, velocity=80)
-        results.append(f"  - Bass: {bass_file}")
-
-        # 3. Create melody
-        melody_file = output_dir / "melody.mid"
-        create_midi_melody(song_description, str(melody_file), tempo=tempo, key=key)
-        results.append(f"  - Melody: {melody_file}")
-
-        # 4. Create drum pattern (using MIDI channel 10 convention)
-        drum_file = output_dir / "drums.mid"
-        mid = MidiFile()
-        track = MidiTrack()
-        mid.tracks.append(track)
-        track.append(MetaMessage('set_tempo', tempo=mido.bpm2tempo(tempo)))
-
-        # Simple 4/4 beat (kick, snare, hi-hat)
-        kick = 36
-        snare = 38
-        hihat = 42
-
-        for bar in range(4):  # 4 bars
-            # Kick on 1 and 3
-            track.append(Message('note_on', note=kick, velocity=100, time=0, channel=9))
-            track.append(Message('note_off', note=kick, velocity=0, time=480, channel=9))
-
-            # Snare on 2 and 4
-            track.append(Message('note_on', note=snare, velocity=90, time=0, channel=9))
-            track.append(Message('note_off', note=snare, velocity=0, time=480, channel=9))
-
-            # Hi-hat on every beat
-            for _ in range(4):
-                track.append(Message('note_on', note=hihat, velocity=70, time=0, channel=9))
-                track.append(Message('note_off', note=hihat, velocity=0, time=240, channel=9))
-
-        mid.save(str(drum_file))
-        results.append(f"  - Drums: {drum_file}")
+        if single_file:
+            song_file = output_dir / "song.mid"
+            timings = {}
+
+            def write_song(path):
+                # Encode every part, then write them as one type 1 file
+                chunks = []
+                for i, part in enumerate(SONG_PARTS):
+                    chunk, timings[part] = timed(parts[part][0], tempo if i == 0 else None, part.capitalize())
+                    chunks.append(chunk)
+                write_midi_file(path, chunks)
+
+            cached = write_cached(
+                str(song_file), write_song, 'create_song_structure',
+                tempo=tempo, **{part: parts[part][1] for part in SONG_PARTS}
+            )
+            results.append(f"  - Song: {song_file}")
+            for part in SONG_PARTS:
+                note = "cached" if cached else f"{timings[part] * 1000:.1f} ms"
+                results.append(f"      track {part.capitalize()} ({note})")
+        else:
+            for part in SONG_PARTS:
+                encode, cache_args = parts[part]
+                path = output_dir / f"{part}.mid"
+                cached, seconds = timed(
+                    write_cached, str(path),
+                    lambda p, encode=encode: write_midi_file(p, [encode(tempo, None)]),
+                    f'create_song_structure.{part}',
+                    tempo=tempo, **cache_args
+                )
+                note = "cached" if cached else f"{seconds * 1000:.1f} ms"
+                results.append(f"  - {part.capitalize()}: {path} ({note})")
 
         result_text = "\n".join(results)
+        import_step = "Import song.mid (one track per part)" if single_file else "Import these MIDI files to separate tracks"
 
         return f"""✓ Created song structure in: {output_dir}
 {result_text}
 
 Description: {song_description}
-Key: {key}, Tempo: {tempo} BPM
+Key: {parse_key(key).name}, Tempo: {tempo} BPM
 
 Next steps:
 1. Open Cubase
 2. Create a new project
-3. Import these MIDI files to separate tracks
+3. {import_step}
 4. Assign instruments (e.g., piano for chords, bass synth, drums)
 5. Adjust and refine!"""
     except Exception as e:
         return f"✗ Failed to create song structure: {e}"
 
 
+# ============================================================================
+# BATCH GENERATION
+# ============================================================================
+
+# Tools generate_batch can fan out, and the file name prefix for each
+BATCH_TOOLS = {
+    'create_midi_note_sequence': 'notes',
+    'create_midi_chord_progression': 'chords',
+    'create_midi_melody': 'melody',
+    'transform_midi_file': 'transformed',
+}
+MAX_BATCH_JOBS = 10000
+# Up to this many jobs run in the calling process: a typical job takes under
+# a millisecond, while each worker process re-imports the server (~1-2s)
+BATCH_INLINE_JOBS = 256
+
+
+def run_batch_jobs(tool: str, jobs: List[tuple]) -> List[Dict[str, Any]]:
+    """
+    Run a chunk of generation jobs in a worker process.
+
+    Each job is (index, output_path, kwargs). Returns one manifest entry per
+    job; a job that raises is recorded as failed like one that returns ✗.
+    """
+    fn = globals()[tool]
+    entries = []
+    for index, output_path, kwargs in jobs:
+        started = time.perf_counter()
+        try:
+            message = fn(output_path=output_path, **kwargs)
+        except Exception as e:
+            message = f"✗ {type(e).__name__}: {e}"
+        entry = {
+            'index': index,
+            'file': os.path.basename(output_path),
+            'params': kwargs,
+            'ok': message.startswith('✓'),
+            'ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+        if not entry['ok']:
+            entry['error'] = message.lstrip('✗ ')
+        entries.append(entry)
+    return entries
+
+
+async def report_progress(ctx: Optional[Context], progress: float, total: float):
+    """Report progress to the client, if the call came in as an MCP request."""
+    if ctx is None:
+        return
+    try:
+        await ctx.report_progress(progress, total)
+    except ValueError:
+        # Called outside of a request (e.g. directly from Python)
+        pass
+
+
+async def map_in_thread(fn, items: List[Any], ctx: Optional[Context], *args) -> List[Any]:
+    """
+    Run fn(*args, chunk) over chunks of `items` on a worker thread, in order.
+
+    The in-process counterpart of map_in_processes for work too small to
+    pay for starting processes; progress is reported after every chunk.
+    """
+    # About 20 progress updates, without a thread hop per item
+    chunk_size = max(1, len(items) // 20)
+    results = []
+    for i in range(0, len(items), chunk_size):
+        results.extend(await asyncio.to_thread(fn, *args, items[i:i + chunk_size]))
+        await report_progress(ctx, len(results), len(items))
+    return results
+
+
+async def map_in_processes(fn, items: List[Any], workers: int, ctx: Optional[Context], *args) -> List[Any]:
+    """
+    Run fn(*args, chunk) over chunks of `items` on a pool of worker processes.
+
+    `fn` must be a module-level function that returns a list per chunk; the
+    lists are concatenated in completion order. Progress is reported to the
+    client as chunks finish.
+    """
+    # Several chunks per worker keep cores busy without paying IPC per item
+    chunk_size = max(1, len(items) // (workers * 4))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    results = []
+    loop = asyncio.get_running_loop()
+    # spawn: the server has live threads and locks that must not be forked
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [loop.run_in_executor(pool, fn, *args, chunk) for chunk in chunks]
+        for future in asyncio.as_completed(futures):
+            results.extend(await future)
+            await report_progress(ctx, len(results), len(items))
+    return results
+
+
+@mcp_tool()
+async def generate_batch(
+    tool: str,
+    grid: Dict[str, List[Any]],
+    output_directory: str,
+    fixed: Optional[Dict[str, Any]] = None,
+    workers: Optional[int] = None,
+    ctx: Context = None
+) -> str:
+    """
+    Generate many MIDI files in one call, one per combination of parameters.
+
+    Large batches are spread over a pool of worker processes; small ones
+    run in the server process. All files are written to one directory
+    together with a manifest.json describing them.
+
+    Args:
+        tool: "create_midi_chord_progression", "create_midi_melody",
+            "create_midi_note_sequence" or "transform_midi_file"
+        grid: Parameter name -> list of values; every combination is generated,
+            e.g. {"chords": ["C,Am,F,G", "D,Bm,G,A"], "tempo": [90, 120, 140]}
+        output_directory: Directory to write the files and manifest.json into
+        fixed: Parameters shared by every job (e.g. {"velocity": 90})
+        workers: Number of worker processes (default: one per CPU core)
+    """
+    if tool not in BATCH_TOOLS:
+        return f"✗ Unknown tool: {tool}. Available: {', '.join(BATCH_TOOLS)}"
+    if workers is not None and workers < 1:
+        return "✗ Workers must be at least 1"
+    fixed = fixed or {}
+    signature = inspect.signature(globals()[tool]).parameters
+    parameters = set(signature) - {'output_path'}
+    given = set(grid) | set(fixed)
+    unknown = given - parameters
+    if unknown:
+        return f"✗ Unknown parameters for {tool}: {', '.join(sorted(unknown))}"
+    missing = {
+        name for name in parameters
+        if signature[name].default is inspect.Parameter.empty and name not in given
+    }
+    if missing:
+        return f"✗ Missing parameters for {tool}: {', '.join(sorted(missing))}"
+    if not grid or any(not isinstance(values, list) or not values for values in grid.values()):
+        return "✗ Grid must map each parameter to a non-empty list of values"
+
+    names = list(grid)
+    combinations = list(itertools.islice(itertools.product(*grid.values()), MAX_BATCH_JOBS + 1))
+    if len(combinations) > MAX_BATCH_JOBS:
+        return f"✗ Grid has more than {MAX_BATCH_JOBS} combinations"
+
+    output_dir = Path(os.path.expanduser(output_directory))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    prefix = BATCH_TOOLS[tool]
+    width = len(str(len(combinations) - 1))
+    jobs = [
+        (i, str(output_dir / f"{prefix}_{i:0{width}d}.mid"), {**fixed, **dict(zip(names, values))})
+        for i, values in enumerate(combinations)
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1 or len(jobs) <= BATCH_INLINE_JOBS:
+        entries = await map_in_thread(run_batch_jobs, jobs, ctx, tool)
+        mode = "in process"
+    else:
+        entries = await map_in_processes(run_batch_jobs, jobs, workers, ctx, tool)
+        mode = f"{workers} workers"
+    elapsed = time.perf_counter() - started
+
+    entries.sort(key=lambda entry: entry['index'])
+    manifest_file = output_dir / "manifest.json"
+    with open(manifest_file, 'w') as f:
+        json.dump({'tool': tool, 'fixed': fixed, 'grid': grid, 'files': entries}, f, indent=1)
+
+    failed = [entry for entry in entries if not entry['ok']]
+    lines = [
+        f"✓ Generated {len(entries) - len(failed)}/{len(entries)} files in {elapsed:.2f}s "
+        f"({mode})",
+        f"  Directory: {output_dir}",
+        f"  Manifest: {manifest_file}",
+    ]
+    for entry in failed[:5]:
+        lines.append(f"  ✗ {entry['file']}: {entry['error']}")
+    if len(failed) > 5:
+        lines.append(f"  ... and {len(failed) - 5} more failures (see manifest)")
+    return "\n".join(lines)
+
+
+# ============================================================================
+# MIDI FILE ANALYSIS
+# ============================================================================
+
+# Event count names by status high nibble (meta and sysex counted separately)
+EVENT_KINDS = {
+    0x80: 'note_off', 0x90: 'note_on', 0xA0: 'poly_aftertouch', 0xB0: 'control_change',
+    0xC0: 'program_change', 0xD0: 'channel_aftertouch', 0xE0: 'pitch_bend',
+}
+# Below this many bytes in total, parsing inline beats starting worker
+# processes (each one re-imports the server, ~1-2s)
+ANALYZE_INLINE_BYTES = 8 * 1024 * 1024
+
+
+def note_name(note: int) -> str:
+    """Scientific pitch name of a MIDI note, e.g. 60 -> "C4"."""
+    return f"{SHARP_NAMES[note % 12]}{note // 12 - 1}"
+
+
+def analyze_track(data, start: int, end: int) -> Dict[str, Any]:
+    """
+    Summarize one track chunk in a single walk over its bytes.
+
+    No message objects are built: deltas and statuses are decoded in place
+    and only counters are kept. Overlaps are note ons for a pitch that is
+    already sounding on that channel; stuck notes are still sounding when
+    the track ends.
+    """
+    counts = [0] * 16  # By status high nibble
+    sounding = bytearray(2048)  # channel << 7 | note -> notes currently on
+    channels = 0  # Bit mask of channels used
+    low, high = 128, -1
+    overlaps = orphan_offs = meta = sysex = 0
+    tempos: List[tuple] = []
+    name = ""
+    tick = running = 0
+    pos = start
+    try:
+        while pos < end:
+            byte = data[pos]
+            pos += 1
+            delta = byte & 0x7F
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                delta = (delta << 7) | (byte & 0x7F)
+            tick += delta
+
+            status = data[pos]
+            if status < 0x80:
+                if not running:
+                    raise ValueError(f"data byte without a status at byte {pos}")
+                status = running
+            else:
+                pos += 1
+
+            if status < 0xF0:
+                running = status
+                kind = status >> 4
+                channels |= 1 << (status & 0x0F)
+                if kind == 0xC or kind == 0xD:
+                    pos += 1
+                    counts[kind] += 1
+                    continue
+                note, value = data[pos], data[pos + 1]
+                pos += 2
+                if kind == 0x9 and value:
+                    counts[9] += 1
+                    key = (status & 0x0F) << 7 | note
+                    if sounding[key]:
+                        overlaps += 1
+                    if sounding[key] < 255:
+                        sounding[key] += 1
+                    if note < low:
+                        low = note
+                    if note > high:
+                        high = note
+                elif kind == 0x8 or kind == 0x9:
+                    counts[8] += 1
+                    key = (status & 0x0F) << 7 | note
+                    if sounding[key]:
+                        sounding[key] -= 1
+                    else:
+                        orphan_offs += 1
+                else:
+                    counts[kind] += 1
+                continue
+
+            running = 0
+            if status == 0xFF:
+                meta_type = data[pos]
+                length, pos = read_vlq(data, pos + 1)
+                meta += 1
+                if meta_type == 0x51 and length == 3:
+                    tempos.append((tick, int.from_bytes(data[pos:pos + 3], 'big')))
+                elif meta_type == 0x03 and not name:
+                    name = bytes(data[pos:pos + length]).decode('latin-1')
+                elif meta_type == 0x2F:
+                    pos += length
+                    break
+            elif status in (0xF0, 0xF7):
+                length, pos = read_vlq(data, pos)
+                sysex += 1
+            else:
+                raise ValueError(f"unexpected status 0x{status:02X} at byte {pos - 1}")
+            pos += length
+        if pos > end:
+            raise ValueError("last event runs past the end of its track")
+    except IndexError:
+        raise ValueError("track ends in the middle of an event") from None
+
+    events = {EVENT_KINDS[kind << 4]: counts[kind] for kind in range(8, 15) if counts[kind]}
+    if meta:
+        events['meta'] = meta
+    if sysex:
+        events['sysex'] = sysex
+    return {
+        'name': name,
+        'end_tick': tick,
+        'events': events,
+        'notes': counts[9],
+        'note_range': [low, high] if high >= 0 else None,
+        'channels': [channel + 1 for channel in range(16) if channels >> channel & 1],
+        'overlapping_notes': overlaps,
+        'stuck_notes': sum(1 for count in sounding if count),
+        'orphan_note_offs': orphan_offs,
+        'tempos': tempos,
+    }
+
+
+def ticks_to_seconds(tick: int, tempo_map: List[tuple], ticks_per_beat: int) -> float:
+    """Convert a tick position to seconds using a sorted [(tick, tempo)] map."""
+    seconds = 0.0
+    last_tick, tempo = 0, DEFAULT_TEMPO
+    for change_tick, change_tempo in tempo_map:
+        if change_tick >= tick:
+            break
+        seconds += (change_tick - last_tick) * tempo / (ticks_per_beat * 1e6)
+        last_tick, tempo = change_tick, change_tempo
+    return seconds + (tick - last_tick) * tempo / (ticks_per_beat * 1e6)
+
+
+def analyze_smf(path: str) -> Dict[str, Any]:
+    """
+    Analyze one MIDI file: one pass over each track of a memory map.
+
+    Returns a JSON-serializable summary. Unreadable files are reported with
+    an 'error' entry instead of raising, so directory runs keep going.
+    """
+    try:
+        data, header = open_smf(path)
+    except (OSError, ValueError) as e:
+        return {'file': path, 'error': str(e)}
+    try:
+        tracks = [analyze_track(data, start, end) for start, end in header.tracks]
+    except ValueError as e:
+        return {'file': path, 'error': str(e)}
+    finally:
+        data.close()
+
+    tpb = header.ticks_per_beat
+    tempo_map = sorted(change for track in tracks for change in track.pop('tempos'))
+    for track in tracks:
+        track['seconds'] = round(ticks_to_seconds(track['end_tick'], tempo_map, tpb), 3)
+    ranges = [track['note_range'] for track in tracks if track['note_range']]
+    events: Dict[str, int] = {}
+    for track in tracks:
+        for kind, count in track['events'].items():
+            events[kind] = events.get(kind, 0) + count
+    end_tick = max((track['end_tick'] for track in tracks), default=0)
+    return {
+        'file': path,
+        'format': header.format,
+        'ticks_per_beat': tpb,
+        'track_count': len(tracks),
+        'beats': round(end_tick / tpb, 3),
+        'seconds': round(ticks_to_seconds(end_tick, tempo_map, tpb), 3),
+        'notes': sum(track['notes'] for track in tracks),
+        'note_range': [min(r[0] for r in ranges), max(r[1] for r in ranges)] if ranges else None,
+        'events': events,
+        'tempo_map': [
+            {'beat': round(tick / tpb, 3), 'bpm': round(60e6 / tempo, 2)} for tick, tempo in tempo_map
+        ],
+        'overlapping_notes': sum(track['overlapping_notes'] for track in tracks),
+        'stuck_notes': sum(track['stuck_notes'] for track in tracks),
+        'orphan_note_offs': sum(track['orphan_note_offs'] for track in tracks),
+        'tracks': tracks,
+    }
+
+
+def analyze_smf_files(paths: List[str]) -> List[Dict[str, Any]]:
+    """Analyze a chunk of files in a worker process."""
+    return [analyze_smf(path) for path in paths]
+
+
+def format_analysis(result: Dict[str, Any]) -> str:
+    """Readable multi-line summary of one analyze_smf result."""
+    name = os.path.basename(result['file'])
+    if 'error' in result:
+        return f"✗ {name}: {result['error']}"
+    note_range = result['note_range']
+    notes = f"{result['notes']} notes"
+    if note_range:
+        notes += f", {note_name(note_range[0])}-{note_name(note_range[1])} ({note_range[0]}-{note_range[1]})"
+    tempos = ", ".join(f"{t['bpm']:g} BPM at beat {t['beat']:g}" for t in result['tempo_map']) or "none (120 BPM)"
+    events = ", ".join(f"{kind} {count}" for kind, count in sorted(result['events'].items()))
+    lines = [
+        f"{name}: format {result['format']}, {result['track_count']} tracks, "
+        f"{result['ticks_per_beat']} ticks/beat, {result['seconds']:.2f}s ({result['beats']:g} beats)",
+        f"  Notes: {notes}",
+        f"  Events: {events or 'none'}",
+        f"  Tempo map: {tempos}",
+    ]
+    for number, track in enumerate(result['tracks'], 1):
+        label = f' "{track["name"]}"' if track['name'] else ""
+        channels = ",".join(str(c) for c in track['channels']) or "-"
+        lines.append(
+            f"  Track {number}{label}: {track['notes']} notes, {track['seconds']:.2f}s, channels {channels}"
+        )
+    issues = [
+        f"{result[key]} {label}" for key, label in (
+            ('overlapping_notes', "overlapping notes"),
+            ('stuck_notes', "stuck notes"),
+            ('orphan_note_offs', "note offs without a note on"),
+        ) if result[key]
+    ]
+    lines.append(f"  Issues: {', '.join(issues)}" if issues else "  Issues: none")
+    return "\n".join(lines)
+
+
+@mcp_tool()
+async def analyze_midi_file(
+    path: str,
+    format: str = "text",
+    workers: Optional[int] = None,
+    ctx: Context = None
+) -> str:
+    """
+    Inspect MIDI files before importing them: note range, event counts,
+    tempo map, length per track, and overlapping or stuck notes.
+
+    Args:
+        path: A MIDI file, or a directory whose .mid/.midi files (including
+            subdirectories) are all analyzed
+        format: "text" for a readable summary or "json" for full results
+        workers: Worker processes for directories (default: one per CPU core)
+    """
+    if format not in ("text", "json"):
+        return "✗ Format must be 'text' or 'json'"
+    if workers is not None and workers < 1:
+        return "✗ Workers must be at least 1"
+    root = Path(path).expanduser()
+    if root.is_dir():
+        files = sorted(
+            str(p) for p in root.rglob('*') if p.suffix.lower() in ('.mid', '.midi') and p.is_file()
+        )
+        if not files:
+            return f"✗ No MIDI files in {path}"
+    elif root.exists():
+        files = [str(root)]
+    else:
+        return f"✗ File not found: {path}"
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or sum(os.path.getsize(f) for f in files) < ANALYZE_INLINE_BYTES:
+        results = await asyncio.to_thread(analyze_smf_files, files)
+    else:
+        results = await map_in_processes(analyze_smf_files, files, workers, ctx)
+        results.sort(key=lambda result: result['file'])
+    elapsed = time.perf_counter() - started
+
+    if format == "json":
+        return json.dumps(results if root.is_dir() else results[0], indent=1)
+    if not root.is_dir():
+        return format_analysis(results[0])
+
+    failed = [result for result in results if 'error' in result]
+    flagged = [
+        result for result in results
+        if 'error' not in result and (result['overlapping_notes'] or result['stuck_notes'])
+    ]
+    lines = [
+        f"✓ Analyzed {len(results)} MIDI files in {elapsed:.2f}s",
+        f"  Notes: {sum(r.get('notes', 0) for r in results)}, "
+        f"length: {sum(r.get('seconds', 0) for r in results):.1f}s in total",
+        f"  Unreadable: {len(failed)}, with overlapping or stuck notes: {len(flagged)}",
+    ]
+    for result in failed[:10]:
+        lines.append(f"  ✗ {os.path.relpath(result['file'], root)}: {result['error']}")
+    for result in flagged[:10]:
+        lines.append(
+            f"  ! {os.path.relpath(result['file'], root)}: {result['overlapping_notes']} overlapping, "
+            f"{result['stuck_notes']} stuck"
+        )
+    if len(failed) + len(flagged) > 20:
+        lines.append("  ... (use format=\"json\" for every file)")
+    return "\n".join(lines)
+
+
 # ============================================================================
 # INFO & SETUP
 # ============================================================================
 
-@mcp.tool()
-def get_setup_instructions() -> str:
-    """Get instructions for setting up the Cubase MCP server."""
-    return """
+@mcp_tool()
+def get_midi_output_stats() -> str:
+    """Show the MIDI output queue depth and send, coalesce and drop counts."""
+    stats = dict(midi_output.stats)
+    rate = f"{midi_output.max_rate:g} msg/s" if midi_output.max_rate > 0 else "unlimited"
+    return f"""MIDI output:
+  Queue depth: {midi_output.depth()} / {midi_output.max_size} (max seen {stats['max_depth']})
+  Rate limit: {rate}
+  Queued: {stats['queued']}
+  Sent: {stats['sent']}
+  Coalesced: {stats['coalesced']}
+  Dropped: {stats['dropped']}
+  Errors: {stats['errors']}"""
+
+
+@mcp_tool()
+def set_midi_rate_limit(messages_per_second: float) -> str:
+    """
+    Set the ceiling on MIDI messages sent per second.
+
+    Args:
+        messages_per_second: Maximum send rate (0 = unlimited)
+    """
+    if messages_per_second < 0:
+        return "✗ Rate must not be negative"
+    midi_output.max_rate = messages_per_second
+    if messages_per_second == 0:
+        return "✓ MIDI rate limit removed"
+    return f"✓ MIDI rate limit set to {messages_per_second:g} messages per second"
+
+
+@mcp_tool()
+def get_midi_cache_stats() -> str:
+    """Show how many generated MIDI files are cached and the hit rate."""
+    info = midi_cache.info()
+    lookups = info['hits'] + info['misses']
+    hit_rate = f"{100 * info['hits'] / lookups:.0f}%" if lookups else "n/a"
+    status = "enabled" if MIDI_CACHE_ENABLED else "disabled"
+    return f"""MIDI cache ({status}, {midi_cache.directory}):
+  Memory: {info['memory_entries']} files, {info['memory_bytes'] / 1024:.1f} KB
+  Disk: {info['disk_entries']} files, {info['disk_bytes'] / 1024:.1f} KB (cap {midi_cache.max_disk_bytes / 1024 / 1024:.0f} MB)
+  Hits: {info['hits']}, Misses: {info['misses']} (hit rate {hit_rate})
+  Evictions: {info['evictions']}"""
+
+
+@mcp_tool()
+def clear_midi_cache() -> str:
+    """Delete every cached generated MIDI file."""
+    try:
+        midi_cache.clear()
+    except Exception as e:
+        return f"✗ Failed to clear MIDI cache: {e}"
+    return "✓ MIDI cache cleared"
+
+
+@mcp_tool()
+def get_server_metrics(format: str = "text") -> str:
+    """
+    Show per-tool call latency and error counts plus MIDI and file counters.
+
+    Args:
+        format: "text" for a readable summary or "json" for the raw metrics
+    """
+    if format not in ("text", "json"):
+        return "✗ Format must be 'text' or 'json'"
+    snapshot = metrics.snapshot()
+    if format == "json":
+        return json.dumps(snapshot, indent=2)
+
+    counters = snapshot['counters']
+    lines = [
+        f"Server metrics (uptime {snapshot['uptime_seconds']:.0f}s, "
+        f"timing {'on' if metrics.enabled else 'off'}, "
+        f"profiling {'on' if metrics.profiling else 'off'}):",
+        f"  MIDI messages sent: {counters['midi_messages_sent']}",
+        f"  MIDI messages dropped: {counters['midi_messages_dropped']}",
+        f"  Send failures: {counters['send_failures']}",
+        f"  Port opens: {counters['port_opens']}, reconnects: {counters['port_reconnects']}, "
+        f"failures: {counters['port_failures']}",
+        f"  Mixer feedback updates: {counters['mixer_feedback_messages']}, "
+        f"redundant sends skipped: {counters['mixer_sends_suppressed']}",
+        f"  Files generated: {counters['files_generated']} "
+        f"({counters['generator_bytes_written'] / 1024:.1f} KB)",
+    ]
+    if metrics.dump_file:
+        lines.append(f"  Dumping to {metrics.dump_file} every {metrics.dump_interval:g}s")
+    if snapshot['tools']:
+        lines.append("")
+        lines.append(f"  {'Tool':<32} {'calls':>7} {'errors':>7} {'mean ms':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for name, entry in sorted(snapshot['tools'].items()):
+            lines.append(
+                f"  {name:<32} {entry['calls']:>7} {entry['errors']:>7} {entry['mean_ms']:>9.3f} "
+                f"{entry['p50_ms']:>9.3f} {entry['p95_ms']:>9.3f} {entry['p99_ms']:>9.3f} {entry['max_ms']:>9.3f}"
+            )
+    return "\n".join(lines)
+
+
+@mcp_tool()
+def configure_metrics(
+    timing: Optional[bool] = None,
+    profiling: Optional[bool] = None,
+    dump_file: Optional[str] = None,
+    dump_interval: float = 60,
+    reset: bool = False,
+) -> str:
+    """
+    Turn tool timing and profiling on or off, and set up periodic metric dumps.
+
+    Args:
+        timing: Record per-tool latency and error counts (unchanged if omitted)
+        profiling: Run tool calls under cProfile (unchanged if omitted)
+        dump_file: Write metrics as JSON to this file periodically ("" stops dumping)
+        dump_interval: Seconds between dumps (default: 60)
+        reset: Zero all metrics and the accumulated profile first
+    """
+    if dump_file and dump_interval <= 0:
+        return "✗ Dump interval must be positive"
+    if reset:
+        metrics.reset()
+    if timing is not None:
+        metrics.enabled = timing
+    if profiling is not None:
+        metrics.profiling = profiling
+    if dump_file is not None:
+        if dump_file:
+            path = str(Path(dump_file).expanduser())
+            try:
+                metrics.dump(path)
+            except Exception as e:
+                return f"✗ Cannot write metrics to {path}: {e}"
+            metrics.start_dumping(path, dump_interval)
+        else:
+            metrics.stop_dumping()
+
+    dumping = f"every {metrics.dump_interval:g}s to {metrics.dump_file}" if metrics.dump_file else "off"
+    return (
+        f"✓ Metrics: timing {'on' if metrics.enabled else 'off'}, "
+        f"profiling {'on' if metrics.profiling else 'off'}, dump {dumping}"
+    )
+
+
+@mcp_tool()
+def get_profile_report(limit: int = 20, sort: str = "cumulative") -> str:
+    """
+    Show the most expensive functions recorded while profiling was on.
+
+    Args:
+        limit: Number of functions to list (default: 20)
+        sort: pstats sort key, e.g. "cumulative", "tottime" or "calls"
+    """
+    if limit < 1:
+        return "✗ Limit must be at least 1"
+    try:
+        report = metrics.profile_report(limit, sort)
+    except KeyError:
+        return f"✗ Unknown sort key: {sort}"
+    if not report:
+        return "No profile data yet. Enable it with configure_metrics(profiling=True)."
+    return report
+
+
+def render_setup_instructions() -> str:
+    """The setup guide for the current transport commands and mixer map."""
+    transport_lines = "\n".join(
+        f"   • CC {command.cc} → {command.remote_command}" for command in TRANSPORT_COMMANDS.values()
+    )
+    mixer_lines = "\n".join(
+        f"   • {address} → {tracks} {parameter.capitalize()}"
+        for parameter in MIXER_PARAMETERS
+        for tracks, address in describe_mixer_map(parameter)
+    )
+    if any(address.kind == 'nrpn' for address in MIXER_ADDRESSES.values()):
+        mixer_lines += "\n   NRPN addresses are sent as CC 99/98 (parameter) + CC 6 (value)."
+    mixer_map_source = f", from {MIXER_MAP_FILE}" if MIXER_MAP_FILE else ""
+    return f"""
 ╔═══════════════════════════════════════════════════════════════════════╗
 ║              CUBASE MCP SERVER - SETUP INSTRUCTIONS                   ║
 ╚═══════════════════════════════════════════════════════════════════════╝
@@ -512,18 +4662,11 @@ def get_setup_instructions() -> str:
 
    Map the following CCs to commands:
 
-   TRANSPORT CONTROLS:
-   • CC 91 → Transport: Play
-   • CC 92 → Transport: Stop
-   • CC 93 → Transport: Record
-   • CC 94 → Transport: Return to Zero
-   • CC 95 → Transport: Forward
+   TRANSPORT CONTROLS (value 127, ch 1):
+{transport_lines}
 
-   MIXER CONTROLS (per channel):
-   • CC 7  → Volume (standard MIDI)
-   • CC 10 → Pan (standard MIDI)
-   • CC 20-28 → Track 1-8 Mute
-   • CC 30-38 → Track 1-8 Solo
+   MIXER CONTROLS ({MIXER_TRACKS} tracks{mixer_map_source}):
+{mixer_lines}
 
 3. TEST THE CONNECTION
    ─────────────────────────────────────────────────────────────────────
@@ -550,52 +4693,88 @@ def get_setup_instructions() -> str:
    3. Use Claude to control playback and adjust mixer
    4. Iterate and refine!
 
+This guide, the tool catalog and the MIDI map (JSON) are also published as
+MCP resources: {SETUP_RESOURCE}, {TOOLS_RESOURCE} and {MIDI_MAP_RESOURCE}.
+
 For more help: https://steinberg.help/cubase/
 """
 
 
-@mcp.tool()
-def list_available_tools() -> str:
-    """List all available tools in this MCP server."""
-    return """
+# Tool catalog sections in display order. A registered tool missing here is
+# listed under OTHER, so the catalog cannot fall behind the code.
+TOOL_SECTIONS = (
+    ("🎵 TRANSPORT CONTROLS", (
+        'transport_play', 'transport_stop', 'transport_record', 'transport_rewind', 'transport_forward',
+    )),
+    ("🎚️ MIXER CONTROLS", (
+        'mixer_set_volume', 'mixer_set_pan', 'mixer_mute_track', 'mixer_solo_track',
+        'mixer_apply_snapshot', 'mixer_save_snapshot', 'mixer_recall_snapshot', 'mixer_list_snapshots',
+        'mixer_ramp', 'mixer_cancel_ramp', 'mixer_list_ramps', 'mixer_get_state', 'mixer_listen_feedback',
+    )),
+    ("🎶 LIVE NOTES", (
+        'play_notes', 'play_midi_file', 'stop_midi_playback', 'get_midi_playback_status',
+        'journal_midi_output', 'replay_journal',
+    )),
+    ("🎹 MIDI FILE CREATION", (
+        'create_midi_note_sequence', 'create_midi_chord_progression', 'create_midi_melody',
+        'create_drum_pattern', 'transform_midi_file', 'generate_batch', 'analyze_midi_file',
+    )),
+    ("🎼 SONG CREATION", ('create_song_structure',)),
+    ("ℹ️ INFORMATION", (
+        'get_midi_output_stats', 'set_midi_rate_limit', 'get_midi_cache_stats', 'clear_midi_cache',
+        'get_server_metrics', 'configure_metrics', 'get_profile_report',
+        'get_setup_instructions', 'list_available_tools',
+    )),
+)
+
+TOOL_USAGE_WIDTH = 36
+
+# URIs of the resources rendered once at startup
+SETUP_RESOURCE = "cubase://setup"
+TOOLS_RESOURCE = "cubase://tools"
+MIDI_MAP_RESOURCE = "cubase://midi-map"
+
+
+def tool_usage(fn) -> str:
+    """Catalog form of a tool's signature: required parameters, then "..." for optional ones."""
+    parameters = [p for p in inspect.signature(fn).parameters.values() if p.name != 'ctx']
+    shown = [p.name for p in parameters if p.default is inspect.Parameter.empty]
+    if len(shown) < len(parameters):
+        shown.append("...")
+    return f"{fn.__name__}({', '.join(shown)})"
+
+
+def tool_summary(fn) -> str:
+    """First sentence of a tool's docstring."""
+    paragraph = " ".join((inspect.getdoc(fn) or "").split("\n\n")[0].split())
+    return re.split(r"(?<=\.)\s", paragraph)[0].rstrip(".")
+
+
+def render_tool_catalog() -> str:
+    """The tool list, from TOOL_SECTIONS and the registered tools' signatures and docstrings."""
+    listed = {name for _, names in TOOL_SECTIONS for name in names}
+    others = tuple(sorted(set(registered_tools) - listed))
+    sections = [
+        (title, [registered_tools[name] for name in names if name in registered_tools])
+        for title, names in TOOL_SECTIONS + ((("OTHER", others),) if others else ())
+    ]
+    def entry(fn) -> str:
+        usage = tool_usage(fn)
+        if len(usage) > TOOL_USAGE_WIDTH:
+            # Long signatures get the summary on a line of its own
+            usage += "\n" + " " * (TOOL_USAGE_WIDTH + 4)
+        return f"  • {usage:<{TOOL_USAGE_WIDTH}}  - {tool_summary(fn)}"
+
+    blocks = [
+        f"{title}\n" + "─" * 72 + "\n" + "\n".join(entry(fn) for fn in tools)
+        for title, tools in sections if tools
+    ]
+    return f"""
 ╔═══════════════════════════════════════════════════════════════════════╗
 ║              CUBASE MCP SERVER - AVAILABLE TOOLS                      ║
 ╚═══════════════════════════════════════════════════════════════════════╝
 
-🎵 TRANSPORT CONTROLS
-────────────────────────────────────────────────────────────────────────
-  • transport_play()         - Start playback
-  • transport_stop()         - Stop playback
-  • transport_record()       - Start recording
-  • transport_rewind()       - Rewind to beginning
-  • transport_forward()      - Fast forward
-
-🎚️ MIXER CONTROLS
-────────────────────────────────────────────────────────────────────────
-  • mixer_set_volume(track, volume)     - Set track volume (0-127)
-  • mixer_set_pan(track, pan)           - Set track pan (0-127)
-  • mixer_mute_track(track, mute)       - Mute/unmute track
-  • mixer_solo_track(track, solo)       - Solo/unsolo track
-
-🎹 MIDI FILE CREATION
-────────────────────────────────────────────────────────────────────────
-  • create_midi_note_sequence()         - Create a sequence of notes
-  • create_midi_chord_progression()     - Create chord progression
-  • create_midi_melody()                - Create melody from description
-
-🎼 SONG CREATION
-────────────────────────────────────────────────────────────────────────
-  • create_song_structure()             - Create complete song with:
-                                           - Chords
-                                           - Bass line
-                                           - Melody
-                                           - Drums
-
-ℹ️ INFORMATION
-────────────────────────────────────────────────────────────────────────
-  • get_setup_instructions()            - Setup guide
-  • list_available_tools()              - This list
-
+{chr(10).join(block + chr(10) for block in blocks)}
 ═══════════════════════════════════════════════════════════════════════
 
 Example usage:
@@ -605,18 +4784,141 @@ Example usage:
 """
 
 
+def render_midi_map() -> Dict[str, Any]:
+    """Every CC and NRPN address the tools send, as JSON-serializable data."""
+    return {
+        'port': VIRTUAL_PORT_NAME,
+        'transport': {
+            name: {'cc': command.cc, 'value': 127, 'channel': 1, 'command': command.remote_command}
+            for name, command in TRANSPORT_COMMANDS.items()
+        },
+        'mixer': {
+            'tracks': MIXER_TRACKS,
+            'source': MIXER_MAP_FILE or "default",
+            'parameters': {parameter: mixer_map_runs(parameter) for parameter in MIXER_PARAMETERS},
+        },
+    }
+
+
+def resource_version(text: str) -> str:
+    """Version tag of a rendered resource: a hash of its content."""
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+def publish_resource(uri: str, name: str, description: str, text: str, mime_type: str = "text/plain"):
+    """Register a fixed MCP resource whose description carries its version tag."""
+    version = resource_version(text)
+
+    @mcp.resource(uri, name=name, description=f"{description} (version {version})", mime_type=mime_type)
+    def read_resource() -> str:
+        return text
+
+
+@mcp_tool()
+def get_setup_instructions() -> str:
+    """
+    Get instructions for setting up the Cubase MCP server.
+
+    Rendered once at startup; also available as the cubase://setup resource.
+    """
+    return SETUP_INSTRUCTIONS
+
+
+@mcp_tool()
+def list_available_tools() -> str:
+    """
+    List all available tools in this MCP server.
+
+    Rendered once at startup; also available as the cubase://tools resource.
+    """
+    return TOOL_CATALOG
+
+
+# Rendered once, after every tool above is registered. Nothing they depend
+# on changes while the server runs, so clients can read each resource once
+# per session and compare version tags to spot a changed server.
+SETUP_INSTRUCTIONS = render_setup_instructions()
+TOOL_CATALOG = render_tool_catalog()
+MIDI_MAP = json.dumps(render_midi_map(), indent=2)
+publish_resource(SETUP_RESOURCE, "setup", "Cubase Generic Remote setup guide", SETUP_INSTRUCTIONS)
+publish_resource(TOOLS_RESOURCE, "tools", "Catalog of the server's tools", TOOL_CATALOG)
+publish_resource(MIDI_MAP_RESOURCE, "midi-map", "Transport and mixer CC/NRPN map", MIDI_MAP, "application/json")
+
+
+# ============================================================================
+# STARTUP
+# ============================================================================
+
+def measure_startup(runs: int = 5) -> str:
+    """
+    Time cold starts of this server the way an MCP client sees them.
+
+    Spawns `runs` fresh server processes on the stdio transport and times the
+    initialize and tools/list responses from process launch.
+    """
+    requests = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "startup-timer", "version": "1.0"},
+        }},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+    ]
+    initialize, tools_list = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        try:
+            for request in requests:
+                process.stdin.write(json.dumps(request) + "\n")
+                process.stdin.flush()
+                if "id" not in request:
+                    continue
+                line = process.stdout.readline()
+                if not line:
+                    raise RuntimeError("server exited before answering")
+                elapsed = (time.perf_counter() - started) * 1000
+                (initialize if request["id"] == 1 else tools_list).append(elapsed)
+        finally:
+            process.kill()
+            process.wait()
+
+    def summary(samples: List[float]) -> str:
+        samples = sorted(samples)
+        return f"min {samples[0]:.0f} ms, median {samples[len(samples) // 2]:.0f} ms, max {samples[-1]:.0f} ms"
+
+    return f"""Cold start over {runs} runs (stdio, from process launch):
+  initialize response: {summary(initialize)}
+  tools/list response: {summary(tools_list)}"""
+
+
 if __name__ == "__main__":
-    # Initialize MIDI port on startup
-    try:
-        get_midi_port()
-        print("\n" + "="*70)
-        print("  CUBASE MCP SERVER")
-        print("="*70)
-        print(f"\n✓ Virtual MIDI port created: {VIRTUAL_PORT_NAME}")
-        print("\nRun get_setup_instructions() for setup guide.")
-        print("="*70 + "\n")
-    except Exception as e:
-        print(f"\n✗ Failed to initialize: {e}\n")
+    args = ARGS
+
+    if args.startup_time:
+        print(measure_startup(args.startup_time))
+        sys.exit(0)
+
+    # stdout carries the MCP protocol, so the banner goes to stderr. The MIDI
+    # port is opened by the first real-time tool call, not here.
+    print("\n" + "=" * 70, file=sys.stderr)
+    print("  CUBASE MCP SERVER", file=sys.stderr)
+    print("=" * 70, file=sys.stderr)
+    print(f"\nVirtual MIDI port \"{VIRTUAL_PORT_NAME}\" opens on the first transport/mixer call.", file=sys.stderr)
+    if args.transport != "stdio":
+        path = mcp.settings.sse_path if args.transport == "sse" else mcp.settings.streamable_http_path
+        print(f"Serving {args.transport} on http://{args.host}:{args.port}{path}", file=sys.stderr)
+    if JOURNAL_FILE:
+        midi_journal.start(str(Path(JOURNAL_FILE).expanduser()))
+        print(f"Journaling MIDI output to {midi_journal.path}", file=sys.stderr)
+    # Write out the journal's last batch on exit
+    atexit.register(midi_journal.stop)
+    print("\nRun get_setup_instructions() for setup guide.", file=sys.stderr)
+    print("=" * 70 + "\n", file=sys.stderr)
 
     # Run the MCP server
-    mcp.run()
+    mcp.run(transport=args.transport)
@@ -0,0 +1,53 @@
+"""
+Shared fixtures. The virtual MIDI port is replaced by the benchmarks'
+recording port, so the tests run without a DAW or MIDI backend.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import recording_port
+import server as server_module
+
+
+class MessageLog(recording_port.RecordingMidiOut):
+    """Recording MidiOut that also keeps every message it was sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def send_message(self, data):
+        super().send_message(data)
+        self.messages.append(bytes(data))
+
+
+@pytest.fixture
+def server():
+    return server_module
+
+
+@pytest.fixture
+def sent(server):
+    """Messages handed to the port, in order. The output rate limit is off."""
+    port = recording_port.install(server)
+    port._rt = MessageLog()
+    max_rate = server.midi_output.max_rate
+    server.midi_output.max_rate = 0
+    yield port._rt.messages
+    server.midi_output.max_rate = max_rate
+    server.midi_port = None
+
+
+def drain(output) -> bool:
+    """Wait until everything queued on `output` so far has reached the port."""
+    done = threading.Event()
+    output.send_many([], on_sent=done.set)
+    return done.wait(5)
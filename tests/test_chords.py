@@ -0,0 +1,66 @@
+"""Chord symbol parsing and voicing."""
+
+import pytest
+
+
+@pytest.mark.parametrize("symbol, voicing", [
+    ("C", (60, 64, 67)),
+    ("F#m7", (66, 69, 73, 76)),
+    ("Bb", (70, 74, 77)),
+    ("Ebmaj7", (63, 67, 70, 74)),
+    ("Dm(maj7)", (62, 65, 69, 73)),
+    ("Abø", (68, 71, 74, 78)),
+    ("B#", (60, 64, 67)),  # Enharmonic roots wrap around the octave
+    ("Cbb", (70, 74, 77)),
+    (" C ", (60, 64, 67)),
+])
+def test_chord_voicing(server, symbol, voicing):
+    assert server.chord_voicing(server.parse_chord(symbol)) == voicing
+
+
+def test_six_nine_is_a_quality_not_a_slash_chord(server):
+    chord = server.parse_chord("C6/9")
+    assert chord.bass is None
+    assert chord.intervals == (0, 4, 7, 9, 14)
+
+
+def test_slash_bass_that_is_a_chord_tone_gives_an_inversion(server):
+    assert server.chord_voicing(server.parse_chord("G/B")) == (71, 74, 79)
+
+
+def test_slash_bass_outside_the_chord_goes_below(server):
+    assert server.chord_voicing(server.parse_chord("C/F#")) == (54, 60, 64, 67)
+
+
+@pytest.mark.parametrize("symbol, error", [
+    ("", "Unknown chord"),
+    ("H", "Unknown chord"),
+    ("Cfoo", "Unknown chord"),
+    ("C/H", "Unknown bass note"),
+])
+def test_unknown_chords_are_rejected(server, symbol, error):
+    with pytest.raises(ValueError, match=error):
+        server.parse_chord(symbol)
+
+
+def test_voice_leading_keeps_the_slash_bass_lowest(server):
+    voicings = server.chord_voicings(["C", "G/B", "Am", "F"], voice_leading=True)
+    assert voicings[0] == [60, 64, 67]
+    assert min(voicings[1]) % 12 == 11
+    # Each chord stays close to the one before it
+    for previous, current in zip(voicings, voicings[1:]):
+        assert abs(sum(current) / len(current) - sum(previous) / len(previous)) <= 7
+
+
+def test_parse_note_events(server):
+    assert server.parse_note_events("60+64+67@0:1.0, 72@0.5:0.25", 0.5) == [
+        (0.0, 1.0, [60, 64, 67]),
+        (0.5, 0.25, [72]),
+    ]
+    assert server.parse_note_events("60,", 0.5) == [(0.0, 0.5, [60])]
+
+
+@pytest.mark.parametrize("notes", ["", "128", "60@-1", "60:0"])
+def test_parse_note_events_rejects(server, notes):
+    with pytest.raises(ValueError):
+        server.parse_note_events(notes, 0.5)
@@ -0,0 +1,81 @@
+"""The MIDI journal: binary format, recording and replay."""
+
+import re
+
+import pytest
+
+from tests.conftest import drain
+
+
+@pytest.fixture
+def journal(server, sent, tmp_path):
+    """Record a short session to a journal file and return (path, messages)."""
+    path = str(tmp_path / "session.midj")
+    messages = [bytes((0xB0, 7, value)) for value in range(20)]
+    messages += [server.note_on_bytes(60, 100), server.note_off_bytes(60)]
+    assert server.journal_midi_output(True, path).startswith("✓")
+    try:
+        server.midi_output.send_many(messages, coalesce=False)
+        assert drain(server.midi_output)
+    finally:
+        server.journal_midi_output(False)
+    return path, messages
+
+
+def test_journal_round_trip(server, journal):
+    path, messages = journal
+    data, started_at = server.open_journal(path)
+    try:
+        records = list(server.iter_journal(data))
+    finally:
+        data.close()
+    assert started_at > 0
+    assert [message for _, message in records] == messages
+    times = [seconds for seconds, _ in records]
+    assert times == sorted(times) and times[0] >= 0
+
+
+def test_record_layout(server, journal):
+    path, messages = journal
+    with open(path, 'rb') as f:
+        content = f.read()
+    assert content[:4] == server.JOURNAL_MAGIC
+    assert len(content) == server.JOURNAL_HEADER.size + len(messages) * (server.JOURNAL_RECORD.size + 3)
+
+
+def test_truncated_record_ends_iteration(server, journal):
+    path, messages = journal
+    with open(path, 'rb') as f:
+        content = f.read()
+    records = list(server.iter_journal(content[:-1]))
+    assert [message for _, message in records] == messages[:-1]
+
+
+def test_not_a_journal(server, tmp_path):
+    for content in (b'', b'MThd' + bytes(20)):
+        path = tmp_path / "bad.midj"
+        path.write_bytes(content)
+        with pytest.raises(ValueError, match="not a MIDI journal"):
+            server.open_journal(str(path))
+
+
+def test_replay_as_fast_as_possible_delivers_everything(server, journal, sent):
+    path, messages = journal
+    sent.clear()
+    result = server.replay_journal(path, speed=0)
+    assert result.startswith("✓")
+    playback_id = int(re.search(r"Playback (\d+)", result).group(1))
+    with server.active_playbacks_lock:
+        player = server.active_playbacks.get(playback_id) or next(
+            p for p in server.finished_playbacks if p.playback_id == playback_id
+        )
+    player.thread.join(5)
+    assert player.finished and player.error is None
+    # CCs are never coalesced on replay, so the port sees every journaled message
+    assert player.sent == len(messages)
+    assert sent == messages
+
+
+def test_replay_rejects_bad_speed(server, journal):
+    path, _ = journal
+    assert server.replay_journal(path, speed=10).startswith("✗ Speed")
@@ -0,0 +1,38 @@
+"""Key names, modes and the chords derived from them."""
+
+import pytest
+
+
+@pytest.mark.parametrize("key, root, mode", [
+    ("C", 0, "major"),
+    ("c", 0, "major"),
+    ("Am", 9, "minor"),
+    ("F# minor", 6, "minor"),
+    ("B♭m", 10, "minor"),
+    ("Bb dorian", 10, "dorian"),
+    ("E blues", 4, "blues"),
+    ("D  harmonic   minor", 2, "harmonic minor"),
+    ("C##", 2, "major"),
+    ("Cbb", 10, "major"),
+    ("Cbb minor", 10, "minor"),
+    ("Fx dorian", 7, "dorian"),
+])
+def test_parse_key(server, key, root, mode):
+    parsed = server.parse_key(key)
+    assert (parsed.root, parsed.mode) == (root, mode)
+
+
+@pytest.mark.parametrize("key", ["", "H", "C foo", "C###"])
+def test_unknown_keys_are_rejected(server, key):
+    with pytest.raises(ValueError, match="Unknown key"):
+        server.parse_key(key)
+
+
+def test_key_progression(server):
+    assert server.key_progression(server.parse_key("C")) == ["C", "Am", "F", "G"]
+    assert server.key_progression(server.parse_key("Am")) == ["Am", "F", "C", "G"]
+
+
+def test_flat_keys_are_spelled_with_flats(server):
+    assert server.key_progression(server.parse_key("Bb dorian")) == ["Bbm", "Eb", "Db", "Ab"]
+    assert server.diatonic_chord(server.parse_key("F"), 3) == "Bb"
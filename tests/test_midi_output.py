@@ -0,0 +1,79 @@
+"""Raw message bytes and the MidiOutput queue: coalescing, ordering, drops."""
+
+from tests.conftest import drain
+
+
+def cc(control, value, channel=0):
+    return bytes((0xB0 | channel, control, value))
+
+
+def test_note_bytes(server):
+    assert server.note_on_bytes(60, 100) == b'\x90\x3c\x64'
+    assert server.note_on_bytes(36, 127, 9) == b'\x99\x24\x7f'
+    assert server.note_off_bytes(60) == b'\x80\x3c\x00'
+    assert server.note_off_bytes(127, 15) == b'\x8f\x7f\x00'
+
+
+def test_status_tables(server):
+    assert server.CC_STATUS[0] == 0xB0 and server.CC_STATUS[15] == 0xBF
+    assert server.NOTE_ON_STATUS[9] == 0x99
+    assert server.NOTE_OFF_STATUS[1] == 0x81
+
+
+def test_send_midi_cc_bytes(server, sent):
+    assert server.send_midi_cc(7, 100, 3)
+    assert drain(server.midi_output)
+    assert sent == [b'\xb3\x07\x64']
+
+
+def test_cc_burst_collapses_to_latest_value(server, sent):
+    output = server.MidiOutput(max_rate=0)
+    with output._cond:  # Holds the output thread off while the burst is queued
+        assert output.send_many([cc(7, value) for value in range(10)])
+    assert drain(output)
+    assert sent == [cc(7, 9)]
+    assert output.stats['coalesced'] == 9
+
+
+def test_cc_is_not_merged_past_other_messages_on_its_channel(server, sent):
+    output = server.MidiOutput(max_rate=0)
+    messages = [cc(7, 1), server.note_on_bytes(60, 100), cc(7, 2)]
+    with output._cond:
+        output.send_many(messages)
+    assert drain(output)
+    assert sent == messages
+
+
+def test_other_channels_do_not_block_merging(server, sent):
+    output = server.MidiOutput(max_rate=0)
+    with output._cond:
+        output.send_many([cc(7, 1), cc(7, 1, channel=1), cc(7, 5)])
+    assert drain(output)
+    assert sent == [cc(7, 5), cc(7, 1, channel=1)]
+
+
+def test_coalesce_off_sends_every_value(server, sent):
+    output = server.MidiOutput(max_rate=0)
+    messages = [cc(7, value) for value in range(10)]
+    with output._cond:
+        output.send_many(messages, coalesce=False)
+    assert drain(output)
+    assert sent == messages
+    assert output.stats['coalesced'] == 0
+
+
+def test_full_queue_drops_but_keeps_note_offs(server, sent):
+    output = server.MidiOutput(max_size=2, max_rate=0)
+    with output._cond:
+        assert not output.send_many([server.note_on_bytes(note, 100) for note in (60, 61, 62)])
+        assert output.send(server.note_off_bytes(60))
+    assert drain(output)
+    assert sent == [server.note_on_bytes(60, 100), server.note_on_bytes(61, 100), server.note_off_bytes(60)]
+    assert output.stats['dropped'] == 1
+
+
+def test_send_all_queues_nothing_on_timeout(server, sent):
+    output = server.MidiOutput(max_size=2, max_rate=0)
+    with output._cond:
+        assert not output.send_all([cc(7, 1), cc(10, 1), cc(11, 1)], timeout=0)
+        assert output.depth() == 0
@@ -0,0 +1,87 @@
+"""Mixer address maps and snapshot validation."""
+
+import pytest
+
+
+def test_default_map(server):
+    tracks, table = server.compile_mixer_map(server.DEFAULT_MIXER_MAP)
+    assert tracks == 8
+    assert table[(1, 'volume')].messages(100) == [b'\xb0\x07\x64']
+    assert table[(8, 'volume')].messages(100) == [b'\xb7\x07\x64']
+    assert table[(1, 'mute')].messages(127) == [b'\xb0\x15\x7f']
+    assert table[(8, 'solo')].messages(0) == [b'\xb0\x26\x00']
+
+
+def test_cc_banks_span_channels(server):
+    tracks, table = server.compile_mixer_map({
+        'tracks': 20,
+        'parameters': {
+            'volume': {'cc': 0, 'channel': 4, 'tracks_per_channel': 16},
+            'pan': {'cc': 20, 'channel': 4, 'tracks_per_channel': 16},
+            'mute': {'cc': 40, 'channel': 4, 'tracks_per_channel': 16},
+            'solo': {'cc': 60, 'channel': 4, 'tracks_per_channel': 16},
+        },
+    })
+    assert tracks == 20
+    assert (table[(16, 'volume')].channel, table[(16, 'volume')].number) == (4, 15)
+    assert (table[(17, 'volume')].channel, table[(17, 'volume')].number) == (5, 0)
+
+
+def test_nrpn_address(server):
+    _, table = server.compile_mixer_map({
+        'tracks': 128,
+        'parameters': {
+            'volume': {'nrpn': 0, 'channel': 2, 'tracks_per_channel': 128},
+            'pan': {'nrpn': 200, 'channel': 2, 'tracks_per_channel': 128},
+            'mute': {'cc': 0, 'channel': 4, 'tracks_per_channel': 64},
+            'solo': {'cc': 0, 'channel': 6, 'tracks_per_channel': 64},
+        },
+    })
+    # NRPN 200 + 99 = 299: select MSB 2, LSB 43, then the value as Data Entry
+    assert table[(100, 'pan')].messages(64) == [b'\xb2\x63\x02', b'\xb2\x62\x2b', b'\xb2\x06\x40']
+
+
+@pytest.mark.parametrize("mixer_map, error", [
+    ([], "must be an object"),
+    ({'parameters': []}, "must be an object"),
+    ({'tracks': 0}, "tracks must be between"),
+    ({'tracks': True}, "tracks must be between"),
+    ({'parameters': {'eq': {'cc': 40}}}, "unknown mixer parameter"),
+    ({'parameters': {'volume': 7}}, "expected an object"),
+    ({'parameters': {'volume': {'cc': 7, 'nrpn': 7}}}, "exactly one of"),
+    ({'parameters': {'volume': {'cc': "7"}}}, "must be integers"),
+    ({'parameters': {'volume': {'cc': 7, 'channel': True}}}, "must be integers"),
+    ({'parameters': {'volume': {'cc': 7, 'tracks_per_channel': 0}}}, "tracks_per_channel"),
+    ({'parameters': {'volume': {'cc': 7, 'channel': 10}}}, "MIDI channel 17"),
+    ({'parameters': {'volume': {'cc': 115, 'channel': 2, 'tracks_per_channel': 8}}}, "max 119"),
+    ({'parameters': {'pan': {'cc': 7}}}, "both use CC 7"),
+    ({'parameters': {'volume': {'cc': 90, 'tracks_per_channel': 8}}}, "transport"),
+    ({'parameters': {'pan': {'nrpn': 0}, 'volume': {'cc': 99, 'channel': 0, 'tracks_per_channel': 8},
+                     'mute': {'cc': 50, 'channel': 9, 'tracks_per_channel': 8},
+                     'solo': {'cc': 60, 'channel': 9, 'tracks_per_channel': 8}}},
+     "clashes with NRPN"),
+])
+def test_bad_maps_are_rejected(server, mixer_map, error):
+    with pytest.raises(ValueError, match=error):
+        server.compile_mixer_map(mixer_map)
+
+
+def test_snapshot_values(server):
+    assert server.mixer_snapshot_values([
+        {'track': 1, 'volume': 100, 'mute': True},
+        {'track': 2, 'pan': 0, 'solo': False},
+    ]) == [(1, 'volume', 100), (1, 'mute', 127), (2, 'pan', 0), (2, 'solo', 0)]
+
+
+@pytest.mark.parametrize("entry", [
+    {'volume': 100},
+    {'track': 0, 'volume': 100},
+    {'track': True, 'volume': 100},
+    {'track': 1, 'volume': 128},
+    {'track': 1, 'volume': True},
+    {'track': 1, 'mute': 1},
+    {'track': 1, 'eq': 3},
+])
+def test_bad_snapshot_entries_are_rejected(server, entry):
+    with pytest.raises(ValueError):
+        server.mixer_snapshot_values([entry])
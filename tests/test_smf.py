@@ -0,0 +1,120 @@
+"""Generated Standard MIDI Files, read back with the server's own SMF reader."""
+
+import pytest
+
+
+NOTES = [  # (tick, note, velocity, duration, channel)
+    (0, 60, 100, 480, 0),
+    (0, 64, 90, 480, 0),
+    (480, 67, 80, 240, 0),
+    (600, 36, 127, 60, 9),
+    (100000, 72, 1, 200000, 0),  # Multi-byte delta times
+]
+
+
+def read_notes(path, server):
+    """Decode every note in a file as (tick, note, velocity, duration, channel)."""
+    data, header = server.open_smf(path)
+    try:
+        notes, starts = [], {}
+        for track_start, track_end in header.tracks:
+            for tick, status, message in server.iter_track_events(data, track_start, track_end):
+                kind, channel = status & 0xF0, status & 0x0F
+                if kind == 0x90 and message[2]:
+                    starts[channel, message[1]] = (tick, message[2])
+                elif kind in (0x80, 0x90):
+                    start, velocity = starts.pop((channel, message[1]))
+                    notes.append((start, message[1], velocity, tick - start, channel))
+        return header, sorted(notes)
+    finally:
+        data.close()
+
+
+def test_note_events_round_trip(server, tmp_path):
+    events = server.NoteEvents()
+    events.extend(reversed(NOTES))  # Any order is allowed
+    path = str(tmp_path / "notes.mid")
+    server.write_midi_file(path, [events.encode_track(tempo=120, name="Test")])
+
+    header, notes = read_notes(path, server)
+    assert header.format == 1
+    assert header.ticks_per_beat == server.TICKS_PER_BEAT
+    assert len(header.tracks) == 1
+    assert notes == sorted(NOTES)
+
+
+def test_track_starts_with_name_and_tempo(server, tmp_path):
+    events = server.NoteEvents()
+    events.add(0, 60, 100, 480)
+    path = str(tmp_path / "meta.mid")
+    server.write_midi_file(path, [events.encode_track(tempo=120, name="Bass")])
+
+    data, header = server.open_smf(path)
+    try:
+        start, end = header.tracks[0]
+        meta = [message for _, status, message in server.iter_track_events(data, start, end) if status == 0xFF]
+    finally:
+        data.close()
+    assert meta[0] == b'\x03Bass'
+    assert meta[1] == b'\x51' + (500000).to_bytes(3, 'big')
+    assert meta[-1] == b'\x2f'
+
+
+def test_smf_writer_matches_note_events(server, tmp_path):
+    path = str(tmp_path / "streamed.mid")
+    with server.SmfWriter(path) as smf:
+        smf.begin_track(tempo=120)
+        smf.add_notes(sorted(NOTES))
+        smf.end_track()
+        smf.begin_track()
+        smf.add_notes(server.sequence_notes([48, 50], 70, 240, repeat=2))
+        smf.end_track()
+
+    header, notes = read_notes(path, server)
+    assert len(header.tracks) == 2
+    assert notes == sorted(NOTES + [(0, 48, 70, 240, 0), (240, 50, 70, 240, 0),
+                                    (480, 48, 70, 240, 0), (720, 50, 70, 240, 0)])
+
+
+def test_smf_writer_rejects_notes_out_of_order(server, tmp_path):
+    path = tmp_path / "bad.mid"
+    with pytest.raises(ValueError):
+        with server.SmfWriter(str(path)) as smf:
+            smf.begin_track()
+            smf.add_note(480, 60, 100, 240)
+            smf.add_note(0, 62, 100, 240)
+    # A failed write leaves nothing behind, not even the temporary file
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_vlq_round_trip(server):
+    for value in (0, 0x7F, 0x80, 0x3FFF, 0x4000, 0x0FFFFFFF):
+        out = bytearray()
+        server.write_vlq(out, value)
+        assert server.read_vlq(out, 0) == (value, len(out))
+
+
+@pytest.mark.parametrize("data, error", [
+    (b'', "not a Standard MIDI File"),
+    (b'RIFF' + bytes(10), "not a Standard MIDI File"),
+    (b'MThd\x00\x00\x00\x06\x00\x01\x00\x01\xe7\x28', "SMPTE"),
+    (b'MThd\x00\x00\x00\x06\x00\x01\x00\x01\x00\x00', "time division 0"),
+    (b'MThd\x00\x00\x00\x06\x00\x01\x00\x01\x01\xe0MTrk\x00\x00\x00\x10\x00', "truncated"),
+])
+def test_read_smf_header_rejects(server, data, error):
+    with pytest.raises(ValueError, match=error):
+        server.read_smf_header(data)
+
+
+def test_running_status_is_expanded(server):
+    # Note on, then a second note on and a note off in running status
+    body = b'\x00\x90\x3c\x64\x00\x40\x64\x60\x3c\x00\x00\xff\x2f\x00'
+    events = list(server.iter_track_events(body, 0, len(body)))
+    assert [message for _, _, message in events[:3]] == [b'\x90\x3c\x64', b'\x90\x40\x64', b'\x90\x3c\x00']
+    assert events[2][0] == 0x60
+
+
+def test_track_cut_mid_event_is_an_error(server):
+    body = b'\x00\x90\x3c'
+    with pytest.raises(ValueError):
+        list(server.iter_track_events(body, 0, len(body)))
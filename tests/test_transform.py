@@ -0,0 +1,80 @@
+"""transform_midi_file: argument checks and the transforms themselves."""
+
+import pytest
+
+from tests.test_smf import read_notes
+
+
+@pytest.fixture
+def song(server, tmp_path):
+    """Two tracks: a melody on channel 1 and drums on channel 10."""
+    melody, drums = server.NoteEvents(), server.NoteEvents()
+    melody.extend([(0, 60, 100, 240, 0), (250, 62, 80, 240, 0), (470, 120, 60, 240, 0)])
+    drums.extend([(0, 36, 100, 60, 9), (480, 38, 100, 60, 9)])
+    path = str(tmp_path / "song.mid")
+    server.write_midi_file(path, [melody.encode_track(tempo=120), drums.encode_track()])
+    return path
+
+
+@pytest.mark.parametrize("arguments, error", [
+    ({'transpose': 49}, "Transpose must be"),
+    ({'quantize': -0.25}, "Quantize grid"),
+    ({'quantize': 0.25, 'quantize_strength': 1.5}, "Quantize grid"),
+    ({'humanize_timing': 2}, "Humanize"),
+    ({'humanize_velocity': 65}, "Humanize"),
+    ({'velocity_scale': 0}, "Velocity scale"),
+    ({'velocity_scale': 5}, "Velocity scale"),
+    ({}, "No transform given"),
+    ({'transpose': 2, 'tracks': []}, "No tracks selected"),
+    ({'transpose': 2, 'tracks': [3]}, "between 1 and 2"),
+    ({'transpose': 2, 'tracks': [0]}, "between 1 and 2"),
+])
+def test_bad_arguments_are_rejected(server, song, tmp_path, arguments, error):
+    output = tmp_path / "out.mid"
+    result = server.transform_midi_file(song, str(output), **arguments)
+    assert result.startswith("✗") and error in result
+    assert not output.exists()
+
+
+def test_unreadable_file(server, tmp_path):
+    path = tmp_path / "empty.mid"
+    path.write_bytes(b'')
+    assert server.transform_midi_file(str(path), str(path), transpose=1).startswith("✗ Cannot read")
+
+
+def test_transpose_skips_drums_and_drops_notes_out_of_range(server, song, tmp_path):
+    output = str(tmp_path / "out.mid")
+    result = server.transform_midi_file(song, output, transpose=12)
+    assert "Removed 1 notes" in result
+    _, notes = read_notes(output, server)
+    assert notes == [
+        (0, 36, 100, 60, 9), (0, 72, 100, 240, 0), (250, 74, 80, 240, 0), (480, 38, 100, 60, 9),
+    ]
+
+
+def test_quantize_keeps_note_lengths(server, song, tmp_path):
+    output = str(tmp_path / "out.mid")
+    server.transform_midi_file(song, output, quantize=0.5, tracks=[1])
+    _, notes = read_notes(output, server)
+    melody = [note for note in notes if note[4] == 0]
+    assert melody == [(0, 60, 100, 240, 0), (240, 62, 80, 240, 0), (480, 120, 60, 240, 0)]
+
+
+def test_tracks_listed_twice_are_changed_once(server, song, tmp_path):
+    output = str(tmp_path / "out.mid")
+    result = server.transform_midi_file(song, output, transpose=1, tracks=[1, 1])
+    assert "Tracks changed: 1 of 2" in result
+    _, notes = read_notes(output, server)
+    assert [note[1] for note in notes if note[4] == 0] == [61, 63, 121]
+
+
+def test_velocity_scale_and_seeded_humanize(server, song, tmp_path):
+    output = str(tmp_path / "out.mid")
+    server.transform_midi_file(song, output, velocity_scale=0.5, tracks=[2])
+    _, notes = read_notes(output, server)
+    assert [note[2] for note in notes if note[4] == 9] == [50, 50]
+
+    first, second = str(tmp_path / "a.mid"), str(tmp_path / "b.mid")
+    for path in (first, second):
+        server.transform_midi_file(song, path, humanize_timing=0.05, humanize_velocity=10, seed=7)
+    assert read_notes(first, server) == read_notes(second, server)